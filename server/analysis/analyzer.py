@@ -2,6 +2,8 @@
 import re
 from typing import List, Dict, Any, Optional
 
+from services import tracing
+
 class ScriptAnalyzer:
     def __init__(self, raw_script: str, marker_configs: List[Dict] = None):
         self.raw_script = raw_script or ""
@@ -35,6 +37,7 @@ class ScriptAnalyzer:
             "pauseItems": []
         }
         
+    @tracing.traced("analysis.ScriptAnalyzer.analyze")
     def analyze(self) -> Dict[str, Any]:
         result = self.defaults.copy()
         
@@ -0,0 +1,266 @@
+"""Synthetic, reproducible dataset for load tests and benchmarks.
+
+Everything is written through the ORM models so column defaults, JSONList
+normalization and the Script.content stats hooks run exactly as in production.
+The same seed always produces the same rows.
+"""
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import crud_ops as crud
+import models
+
+FIRST_NAMES = ["ALICE", "BEN", "CHEN", "DANA", "ELI", "FANG", "GRACE", "HAO", "IVY", "JUN", "KAI", "LIN"]
+PLACES = ["KITCHEN", "ROOFTOP", "TRAIN STATION", "NIGHT MARKET", "OFFICE", "HOSPITAL CORRIDOR", "BEACH", "TEMPLE"]
+TIMES = ["DAY", "NIGHT", "DAWN", "DUSK", "CONTINUOUS", "LATER"]
+WORDS = (
+    "rain light door window street city phone letter silence memory promise coffee smoke mirror "
+    "river bridge shadow song ticket storm garden lantern secret envelope clock"
+).split()
+TAG_NAMES = ["drama", "comedy", "thriller", "romance", "short", "feature", "pilot", "sci-fi", "horror", "audio"]
+SEARCH_TERMS = ["rain", "memory", "lantern", "KITCHEN", "promise", "NIGHT MARKET"]
+
+# Marker rule shapes used by the script editor's themes, from cheap to expensive
+# for the analyzer (prefix < enclosure regex < multi-line blocks).
+MARKER_RULES = [
+    {"id": "sfx", "name": "SFX", "start": "~", "isBlock": False, "matchMode": "prefix"},
+    {"id": "note", "name": "Note", "start": "[[", "end": "]]", "isBlock": False, "matchMode": "enclosure"},
+    {"id": "pause", "name": "Pause", "start": "{{", "end": "}}", "isBlock": False, "matchMode": "enclosure", "fixedDuration": 3},
+    {"id": "bgm", "name": "BGM", "start": "<<", "end": ">>", "isBlock": False, "matchMode": "enclosure"},
+    {"id": "insert", "name": "Insert", "start": "/*", "end": "*/", "isBlock": True},
+    {"id": "flash", "name": "Flashback", "start": "%%", "end": "%%", "isBlock": True, "fixedDuration": 5},
+]
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    text = " ".join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + rng.choice([".", ".", "!", "?", "..."])
+
+
+def marker_configs(rule_count: int) -> List[Dict]:
+    return [dict(rule) for rule in MARKER_RULES[:rule_count]]
+
+
+def fountain_script(rng: random.Random, scenes: int, title: str = "Untitled", marker_rules: int = 0) -> str:
+    # Title page, then scenes of action / cue / parenthetical / dialogue /
+    # transition. With marker_rules > 0 the body also carries markup for the
+    # first N MARKER_RULES so themed analysis has something to match.
+    rules = MARKER_RULES[:marker_rules]
+    lines = [f"Title: {title}", "Credit: Written by", "Author: Bench", "Draft date: 2024-01-01", ""]
+    for scene in range(scenes):
+        prefix = rng.choice(["INT.", "EXT.", "INT./EXT."])
+        lines += [f"{prefix} {rng.choice(PLACES)} - {rng.choice(TIMES)}", ""]
+        lines += [_sentence(rng, rng.randint(8, 24)), ""]
+        for _ in range(rng.randint(2, 6)):
+            lines.append(rng.choice(FIRST_NAMES))
+            if rng.random() < 0.3:
+                lines.append(f"({rng.choice(WORDS)})")
+            line = _sentence(rng, rng.randint(4, 16))
+            for rule in rules:
+                if rule.get("isBlock") or rule["matchMode"] != "enclosure" or rng.random() > 0.4:
+                    continue
+                line += f" {rule['start']}{rng.choice(WORDS)}{rule['end']}"
+            lines += [line, ""]
+        for rule in rules:
+            if rng.random() > 0.5:
+                continue
+            if rule.get("isBlock"):
+                lines += [rule["start"], _sentence(rng, 10), _sentence(rng, 6), rule["end"], ""]
+            elif rule["matchMode"] == "prefix":
+                lines += [f"{rule['start']} {_sentence(rng, 4)}", ""]
+        if scene % 4 == 3:
+            lines += ["CUT TO:", ""]
+    return "\n".join(lines)
+
+
+@dataclass
+class DatasetConfig:
+    users: int = 50
+    personas_per_user: int = 1
+    orgs: int = 5
+    scripts_per_user: int = 20
+    folder_depth: int = 2
+    scenes_per_script: int = 12
+    public_ratio: float = 0.5
+    likes_per_user: int = 10
+    acceptances: int = 200
+    seed: int = 42
+
+
+@dataclass
+class Dataset:
+    # Ids the load generator needs to build realistic requests.
+    user_ids: List[str] = field(default_factory=list)
+    public_script_ids: List[str] = field(default_factory=list)
+    scripts_by_owner: Dict[str, List[str]] = field(default_factory=dict)
+    search_terms: List[str] = field(default_factory=lambda: list(SEARCH_TERMS))
+    counts: Dict[str, int] = field(default_factory=dict)
+
+
+def _folder_rows(rng, owner_id, depth, now):
+    # A chain /f0/f1/... per owner; each level is public half the time, which
+    # exercises the inherited-visibility checks on the public routes.
+    rows, paths, public_paths, parent = [], ["/"], set(), "/"
+    for level in range(depth):
+        title = f"folder-{level}"
+        is_public = 1 if rng.random() < 0.5 else 0
+        rows.append(models.Script(
+            id=f"{owner_id}-folder-{level}",
+            ownerId=owner_id,
+            title=title,
+            type="folder",
+            folder=parent,
+            isPublic=is_public,
+            createdAt=now,
+            lastModified=now,
+        ))
+        parent = (parent if parent != "/" else "") + "/" + title
+        paths.append(parent)
+        if is_public:
+            public_paths.add(parent)
+    return rows, paths, public_paths
+
+
+def generate_dataset(db, config: DatasetConfig = None) -> Dataset:
+    config = config or DatasetConfig()
+    rng = random.Random(config.seed)
+    now = int(time.time() * 1000)
+    out = Dataset()
+
+    users = [
+        models.User(id=f"bench-user-{i}", handle=f"bench{i}", email=f"bench{i}@example.com", displayName=f"Bench {i}")
+        for i in range(config.users)
+    ]
+    out.user_ids = [user.id for user in users]
+    db.add_all(users)
+    # users <-> organizations reference each other, so the flush cannot order them.
+    db.flush()
+
+    orgs = [
+        models.Organization(
+            id=f"bench-org-{i}",
+            name=f"Bench Studio {i}",
+            ownerId=users[i % len(users)].id,
+            tags=rng.sample(TAG_NAMES, 2),
+        )
+        for i in range(min(config.orgs, len(users)))
+    ]
+    db.add_all(orgs)
+    db.flush()
+
+    personas = []
+    for user in users:
+        for j in range(config.personas_per_user):
+            persona = models.Persona(
+                id=f"{user.id}-persona-{j}",
+                ownerId=user.id,
+                displayName=f"{user.displayName} pen name {j}",
+                links=[{"label": "site", "url": f"https://example.com/{user.handle}"}],
+                tags=rng.sample(TAG_NAMES, 2),
+            )
+            personas.append(persona)
+            if orgs and rng.random() < 0.6:
+                org = rng.choice(orgs)
+                db.add(models.PersonaOrganizationMembership(id=f"{persona.id}-{org.id}", orgId=org.id, personaId=persona.id))
+        if orgs and rng.random() < 0.4:
+            org = rng.choice(orgs)
+            db.add(models.OrganizationMembership(id=f"{user.id}-{org.id}", orgId=org.id, userId=user.id))
+    db.add_all(personas)
+
+    themes = []
+    for i, user in enumerate(users[: max(1, len(users) // 10)]):
+        theme = models.MarkerTheme(
+            id=f"bench-theme-{i}",
+            ownerId=user.id,
+            name=f"Theme {i}",
+            configs=json.dumps(marker_configs(1 + i % len(MARKER_RULES))),
+            isPublic=True,
+        )
+        themes.append(theme)
+    db.add_all(themes)
+    db.flush()
+
+    tag_id = 0
+    public_scripts = {}
+    script_count = 0
+    for user in users:
+        user_tags = []
+        for name in rng.sample(TAG_NAMES, 4):
+            tag_id += 1
+            user_tags.append(models.Tag(id=tag_id, name=name, color="bg-blue-500", ownerId=user.id))
+        db.add_all(user_tags)
+        folders, paths, public_folders = _folder_rows(rng, user.id, config.folder_depth, now)
+        db.add_all(folders)
+        user_personas = [p for p in personas if p.ownerId == user.id]
+        owned = out.scripts_by_owner.setdefault(user.id, [])
+        for k in range(config.scripts_per_user):
+            script_id = f"{user.id}-script-{k}"
+            folder = rng.choice(paths)
+            is_public = 1 if rng.random() < config.public_ratio else 0
+            title = f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {k}"
+            theme = rng.choice(themes) if themes and rng.random() < 0.3 else None
+            script = models.Script(
+                id=script_id,
+                ownerId=user.id,
+                title=title,
+                type="script",
+                folder=folder,
+                isPublic=is_public,
+                personaId=rng.choice(user_personas).id if user_personas and rng.random() < 0.7 else None,
+                organizationId=rng.choice(orgs).id if orgs and rng.random() < 0.3 else None,
+                markerThemeId=theme.id if theme else None,
+                createdAt=now - k * 60_000,
+                lastModified=now - k * 60_000,
+                sortOrder=float(k),
+            )
+            script.content = fountain_script(
+                rng,
+                rng.randint(max(1, config.scenes_per_script // 2), config.scenes_per_script * 2),
+                title=title,
+                marker_rules=len(json.loads(theme.configs)) if theme else 0,
+            )
+            script.tags = rng.sample(user_tags, rng.randint(0, 3))
+            db.add(script)
+            owned.append(script_id)
+            if is_public or folder in public_folders:
+                out.public_script_ids.append(script_id)
+                public_scripts[script_id] = script
+            script_count += 1
+        db.flush()
+
+    like_count = 0
+    if out.public_script_ids:
+        for user in users:
+            for script_id in rng.sample(out.public_script_ids, min(config.likes_per_user, len(out.public_script_ids))):
+                db.add(models.ScriptLike(userId=user.id, scriptId=script_id))
+                public_scripts[script_id].likes = (public_scripts[script_id].likes or 0) + 1
+                like_count += 1
+        for i in range(config.acceptances):
+            db.add(models.PublicTermsAcceptance(
+                id=f"bench-accept-{i}",
+                termsVersion="v1",
+                scriptId=rng.choice(out.public_script_ids),
+                userId=rng.choice(out.user_ids) if rng.random() < 0.5 else None,
+                visitorId=f"visitor-{rng.randrange(10_000)}",
+                userAgent="bench",
+            ))
+    db.commit()
+
+    crud.refresh_tag_usage(db, range(1, tag_id + 1))
+    db.commit()
+    crud.refresh_public_rankings(db)
+
+    out.counts = {
+        "users": len(users),
+        "personas": len(personas),
+        "organizations": len(orgs),
+        "themes": len(themes),
+        "scripts": script_count,
+        "publicScripts": len(out.public_script_ids),
+        "likes": like_count,
+        "acceptances": config.acceptances if out.public_script_ids else 0,
+    }
+    return out
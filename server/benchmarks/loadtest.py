@@ -0,0 +1,309 @@
+"""Concurrent load test against the in-process ASGI app.
+
+Seeds a synthetic dataset (benchmarks.dataset), then replays a weighted mix of
+public bundle / reader / search / autosave / analysis requests from N virtual
+users and reports p50/p95/p99 latency and throughput per scenario.
+
+Run from server/:
+    python -m benchmarks.loadtest [--users 50] [--scripts-per-user 20]
+        [--concurrency 16] [--requests 2000 | --duration 30]
+        [--database-url postgresql://...] [--json results.json]
+
+SQLite goes to a throwaway file unless --database-url points at a (local,
+disposable) Postgres. The dataset uses fixed ids, so a second run against the
+same Postgres needs --reset, which drops and recreates its tables first; it
+refuses non-local hosts unless --yes-drop is also given.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+SCENARIOS = {
+    # name: default weight
+    "bundle": 30,
+    "reader": 35,
+    "search": 10,
+    "autosave": 20,
+    "analysis": 5,
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    # Nearest-rank, so small samples report a latency that was actually seen.
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def _utf16_length(text: str) -> int:
+    # Patch offsets are UTF-16 code units, as the browser editor counts them.
+    return len(text.encode("utf-16-le")) // 2
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = {name: [] for name in SCENARIOS}
+        self.errors: Dict[str, int] = {name: 0 for name in SCENARIOS}
+        self.statuses: Dict[str, Dict[int, int]] = {name: {} for name in SCENARIOS}
+
+    def record(self, scenario: str, status: int, elapsed_ms: float, ok: bool):
+        self.latencies[scenario].append(elapsed_ms)
+        self.statuses[scenario][status] = self.statuses[scenario].get(status, 0) + 1
+        if not ok:
+            self.errors[scenario] += 1
+
+    def summary(self, wall_seconds: float) -> Dict:
+        scenarios = {}
+        total = 0
+        for name, values in self.latencies.items():
+            if not values:
+                continue
+            total += len(values)
+            scenarios[name] = {
+                "requests": len(values),
+                "errors": self.errors[name],
+                "statuses": {str(code): count for code, count in sorted(self.statuses[name].items())},
+                "rps": round(len(values) / wall_seconds, 1) if wall_seconds else 0.0,
+                "p50Ms": round(percentile(values, 50), 2),
+                "p95Ms": round(percentile(values, 95), 2),
+                "p99Ms": round(percentile(values, 99), 2),
+                "maxMs": round(max(values), 2),
+            }
+        return {
+            "requests": total,
+            "errors": sum(self.errors.values()),
+            "wallSeconds": round(wall_seconds, 3),
+            "rps": round(total / wall_seconds, 1) if wall_seconds else 0.0,
+            "scenarios": scenarios,
+        }
+
+
+class VirtualUser:
+    # One signed-in writer that also browses the public site. Autosaves go to
+    # its own scripts and track revisions like the editor does.
+    def __init__(self, client, dataset, user_id: str, rng: random.Random, recorder: Recorder):
+        self.client = client
+        self.dataset = dataset
+        self.user_id = user_id
+        self.headers = {"X-User-ID": user_id}
+        self.rng = rng
+        self.recorder = recorder
+        self.own_scripts = dataset.scripts_by_owner.get(user_id, [])
+        self.revisions: Dict[str, int] = {}
+        self.lengths: Dict[str, int] = {}
+
+    async def _timed(self, scenario: str, method: str, url: str, ok_statuses=(200,), **kwargs):
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.recorder.record(scenario, response.status_code, elapsed_ms, response.status_code in ok_statuses)
+        return response
+
+    async def bundle(self):
+        await self._timed("bundle", "GET", "/api/public-bundle")
+
+    async def reader(self):
+        if self.dataset.public_script_ids:
+            script_id = self.rng.choice(self.dataset.public_script_ids)
+            await self._timed("reader", "GET", f"/api/public-scripts/{script_id}")
+
+    async def search(self):
+        term = self.rng.choice(self.dataset.search_terms)
+        await self._timed("search", "GET", "/api/search", params={"q": term}, headers=self.headers)
+
+    async def autosave(self):
+        if not self.own_scripts:
+            return
+        script_id = self.rng.choice(self.own_scripts)
+        if script_id not in self.revisions:
+            # First touch loads the script like opening it in the editor (not timed).
+            response = await self.client.get(f"/api/scripts/{script_id}", headers=self.headers)
+            body = response.json()
+            self.revisions[script_id] = body.get("revision") or 0
+            self.lengths[script_id] = _utf16_length(body.get("content") or "")
+        # Typing at the end of the script: a small append patch per save.
+        text = "\n" + " ".join(self.rng.choice(("rain", "door", "light", "smoke")) for _ in range(6))
+        position = self.lengths[script_id]
+        payload = {
+            "baseRevision": self.revisions[script_id],
+            "edits": [{"start": position, "end": position, "text": text}],
+        }
+        response = await self._timed("autosave", "PATCH", f"/api/scripts/{script_id}/content", json=payload, headers=self.headers)
+        if response.status_code == 200:
+            self.revisions[script_id] = response.json()["revision"]
+            self.lengths[script_id] = position + _utf16_length(text)
+        else:
+            # Another virtual user with the same identity won the race; reload next time.
+            self.revisions.pop(script_id, None)
+
+    async def analysis(self):
+        if self.own_scripts:
+            script_id = self.rng.choice(self.own_scripts)
+            await self._timed("analysis", "GET", f"/api/analysis/script/{script_id}", headers=self.headers)
+
+
+async def run_load(app, dataset, *, concurrency: int = 8, requests: int = 0, duration: float = 0.0,
+                   weights: Dict[str, int] = None, seed: int = 42) -> Dict:
+    import httpx
+
+    weights = {name: w for name, w in (weights or SCENARIOS).items() if w > 0}
+    names, cumulative = list(weights), list(weights.values())
+    recorder = Recorder()
+    remaining = [requests]
+    deadline = time.perf_counter() + duration if duration else None
+
+    def take() -> bool:
+        if deadline is not None:
+            return time.perf_counter() < deadline
+        if remaining[0] <= 0:
+            return False
+        remaining[0] -= 1
+        return True
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+        async def worker(index: int):
+            rng = random.Random(seed * 1000 + index)
+            user_id = dataset.user_ids[index % len(dataset.user_ids)]
+            vu = VirtualUser(client, dataset, user_id, rng, recorder)
+            while take():
+                scenario = rng.choices(names, weights=cumulative)[0]
+                await getattr(vu, scenario)()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        wall = time.perf_counter() - started
+    return recorder.summary(wall)
+
+
+def _parse_weights(raw: str) -> Dict[str, int]:
+    weights = dict(SCENARIOS)
+    for item in filter(None, (raw or "").split(",")):
+        name, _, value = item.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name] = int(value)
+    return weights
+
+
+def _print_report(result: Dict, counts: Dict):
+    print("dataset: " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+    print(f"{'scenario':<10} {'reqs':>7} {'err':>5} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name, row in result["scenarios"].items():
+        print(f"{name:<10} {row['requests']:>7} {row['errors']:>5} {row['rps']:>8} "
+              f"{row['p50Ms']:>9} {row['p95Ms']:>9} {row['p99Ms']:>9} {row['maxMs']:>9}")
+    print(f"{'total':<10} {result['requests']:>7} {result['errors']:>5} {result['rps']:>8}   "
+          f"wall {result['wallSeconds']}s")
+
+
+LOCAL_DATABASE_HOSTS = {"", "localhost", "127.0.0.1", "::1"}
+
+
+def _is_local_database(url: str) -> bool:
+    """True for SQLite and for Postgres over localhost or a unix socket."""
+    from sqlalchemy.engine import make_url
+
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        return True
+    return (parsed.host or "") in LOCAL_DATABASE_HOSTS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--database-url", default="", help="Postgres URL; defaults to a temporary SQLite file")
+    parser.add_argument(
+        "--reset",
+        action="store_true",
+        help="drop and recreate all tables before seeding; required to rerun against the same "
+             "--database-url, since the dataset uses fixed ids",
+    )
+    parser.add_argument("--yes-drop", action="store_true", help="allow --reset on a non-local --database-url")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--scripts-per-user", type=int, default=20)
+    parser.add_argument("--orgs", type=int, default=5)
+    parser.add_argument("--folder-depth", type=int, default=2)
+    parser.add_argument("--scenes", type=int, default=12, help="average scenes per script")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--duration", type=float, default=0.0, help="seconds; overrides --requests")
+    parser.add_argument("--mix", default="", help="scenario weights, e.g. bundle=50,autosave=0")
+    parser.add_argument("--cache-seconds", default="10", help="PUBLIC_JSON_CACHE_SECONDS for the run")
+    parser.add_argument("--keep-rate-limits", action="store_true", help="leave slowapi limits on (expect 429s)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", dest="json_path", default="", help="also write the report here")
+    args = parser.parse_args()
+    if args.reset and args.database_url and not args.yes_drop and not _is_local_database(args.database_url):
+        parser.error("--reset drops every table; pass --yes-drop to run it against a non-local database")
+
+    # The app reads its configuration at import time.
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        os.environ["DB_PATH"] = os.path.join(workdir, "loadtest.db")
+    os.environ.setdefault("MEDIA_STORAGE_ROOT", os.path.join(workdir, "media"))
+    # Virtual users sign in with X-User-ID, which only non-production envs accept.
+    os.environ["ENVIRONMENT"] = "local"
+    os.environ["ALLOW_X_USER_ID"] = "1"
+    os.environ["PUBLIC_JSON_CACHE_SECONDS"] = args.cache_seconds
+    os.environ.setdefault("SLOW_QUERY_MS", "1000")
+
+    import database
+    import models
+
+    if args.reset:
+        models.Base.metadata.drop_all(bind=database.engine)
+    import main as app_module
+    import rate_limit
+    from benchmarks.dataset import DatasetConfig, generate_dataset
+
+    if not args.keep_rate_limits and rate_limit.RATE_LIMIT_ENABLED:
+        rate_limit.limiter.enabled = False
+
+    seed_started = time.perf_counter()
+    db = database.SessionLocal()
+    try:
+        if db.get(models.User, "bench-user-0") is not None:
+            parser.error("the database already holds a seeded dataset; rerun with --reset")
+        dataset = generate_dataset(db, DatasetConfig(
+            users=args.users,
+            scripts_per_user=args.scripts_per_user,
+            orgs=args.orgs,
+            folder_depth=args.folder_depth,
+            scenes_per_script=args.scenes,
+            seed=args.seed,
+        ))
+    finally:
+        db.close()
+    print(f"seeded in {time.perf_counter() - seed_started:.1f}s on {database.engine.dialect.name}", file=sys.stderr)
+
+    result = asyncio.run(run_load(
+        app_module.app,
+        dataset,
+        concurrency=args.concurrency,
+        requests=0 if args.duration else args.requests,
+        duration=args.duration,
+        weights=_parse_weights(args.mix),
+        seed=args.seed,
+    ))
+    result["dataset"] = dataset.counts
+    result["database"] = database.engine.dialect.name
+    result["concurrency"] = args.concurrency
+    _print_report(result, dataset.counts)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
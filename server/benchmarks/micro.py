@@ -0,0 +1,249 @@
+"""Microbenchmarks for the pure-CPU hot paths: ScriptAnalyzer and SEO injection.
+
+Fixture scripts come from benchmarks.dataset with a fixed seed, in three sizes
+and three marker-theme complexities; SEO runs against three HTML templates.
+Each case reports ops/sec (best of --repeat timed rounds) and per-op memory
+from tracemalloc (peak while running, and bytes still held afterwards).
+
+Run from server/:
+    python -m benchmarks.micro                    # print only
+    python -m benchmarks.micro --save             # also store results/<commit>.json
+    python -m benchmarks.micro --compare results/<base>.json [--threshold 10]
+
+--compare exits with status 1 when any case is slower than the baseline by
+more than --threshold percent, so it can gate an optimization branch.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+
+# benchmarks.dataset pulls in the models/database modules; keep them off disk.
+os.environ.setdefault("DB_PATH", ":memory:")
+
+from analysis.analyzer import ScriptAnalyzer
+from benchmarks.dataset import MARKER_RULES, fountain_script, marker_configs
+from services.seo import inject_seo_html
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+FIXTURE_SEED = 1234
+
+SCRIPT_SIZES = {"small": 10, "medium": 60, "large": 300}  # scenes
+THEMES = {"plain": 0, "simple": 2, "complex": len(MARKER_RULES)}  # marker rules
+
+_HEAD = """    <meta charset="UTF-8" />
+    <meta name="viewport" content="width=device-width, initial-scale=1.0" />
+    <title>Screenplay Reader</title>
+    <meta name="description" content="線上閱讀、瀏覽與分享公開台本的閱讀器。" />
+    <meta property="og:title" content="Screenplay Reader" />
+    <meta property="og:description" content="線上閱讀、瀏覽與分享公開台本的閱讀器。" />
+    <meta property="og:type" content="website" />
+    <script type="module" crossorigin src="/assets/index-3f9a1c.js"></script>
+    <link rel="stylesheet" crossorigin href="/assets/index-8be2d0.css">
+"""
+_BODY = """  <body>
+    <div id="root"></div>
+  </body>
+</html>
+"""
+SEO_TEMPLATES = {
+    # No tags to replace: every upsert falls through to the </head> insert.
+    "bare": "<!doctype html>\n<html>\n  <head>\n  </head>\n" + _BODY,
+    # Shape of the built index.html served in production.
+    "app": '<!doctype html>\n<html lang="zh-Hant">\n  <head>\n' + _HEAD + "  </head>\n" + _BODY,
+    # Same plus many preloads and inline critical CSS, so each regex scans more.
+    "large": '<!doctype html>\n<html lang="zh-Hant">\n  <head>\n' + _HEAD
+    + "".join(f'    <link rel="modulepreload" href="/assets/chunk-{i:03d}.js">\n' for i in range(80))
+    + "    <style>" + ".c{color:#123456;margin:0 auto;padding:4px}" * 400 + "</style>\n"
+    + "  </head>\n" + _BODY,
+}
+
+SEO_PAGES = {
+    "script": dict(
+        title="雨夜的燈籠｜Screenplay Reader",
+        description="INT. NIGHT MARKET - NIGHT 雨水落在燈籠上，人潮在攤位間穿梭。" * 3,
+        canonical_url="https://example.com/read/script-1",
+        og_type="article",
+        image_url="https://example.com/media/cover.jpg",
+        structured_data={
+            "@context": "https://schema.org",
+            "@type": "CreativeWork",
+            "name": "雨夜的燈籠",
+            "url": "https://example.com/read/script-1",
+            "inLanguage": "zh-Hant",
+            "description": "<b>rain</b> & lanterns",
+            "isAccessibleForFree": True,
+        },
+    ),
+    "about": dict(
+        title="關於｜Screenplay Reader",
+        description="這是一個面向公開閱讀與創作工作室的台本平台。",
+        canonical_url="https://example.com/about",
+    ),
+}
+
+
+def analyzer_cases() -> Dict[str, Callable[[], object]]:
+    cases = {}
+    for size, scenes in SCRIPT_SIZES.items():
+        for theme, rules in THEMES.items():
+            text = fountain_script(random.Random(FIXTURE_SEED), scenes, title=f"{size}-{theme}", marker_rules=rules)
+            configs = marker_configs(rules)
+            cases[f"analyzer/{size}/{theme}"] = lambda text=text, configs=configs: ScriptAnalyzer(text, marker_configs=configs).analyze()
+    return cases
+
+
+def seo_cases() -> Dict[str, Callable[[], object]]:
+    cases = {}
+    for template_name, template in SEO_TEMPLATES.items():
+        for page, kwargs in SEO_PAGES.items():
+            cases[f"seo/{template_name}/{page}"] = lambda template=template, kwargs=kwargs: inject_seo_html(template, **kwargs)
+    return cases
+
+
+def all_cases() -> Dict[str, Callable[[], object]]:
+    return {**analyzer_cases(), **seo_cases()}
+
+
+def _calibrate(fn, min_time: float) -> int:
+    # Smallest power-of-two loop count that runs for at least min_time.
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - started >= min_time or number >= 1 << 20:
+            return number
+        number *= 2
+
+
+def measure_speed(fn, min_time: float = 0.2, repeat: int = 5) -> Tuple[float, int]:
+    number = _calibrate(fn, min_time)
+    best = float("inf")
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                fn()
+            best = min(best, (time.perf_counter() - started) / number)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return best, number
+
+
+def measure_memory(fn) -> Tuple[int, int]:
+    # (peak bytes, retained bytes) for one call; the first call warms caches
+    # (compiled regexes, interned strings) so they are not counted.
+    fn()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = fn()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak - baseline, current - baseline
+
+
+def run(cases: Dict[str, Callable[[], object]], min_time: float = 0.2, repeat: int = 5) -> Dict[str, Dict]:
+    results = {}
+    for name, fn in cases.items():
+        seconds, number = measure_speed(fn, min_time=min_time, repeat=repeat)
+        peak, retained = measure_memory(fn)
+        results[name] = {
+            "opsPerSec": round(1 / seconds, 1),
+            "usPerOp": round(seconds * 1e6, 2),
+            "loops": number,
+            "peakBytes": peak,
+            "retainedBytes": retained,
+        }
+    return results
+
+
+def compare(baseline: Dict[str, Dict], current: Dict[str, Dict], threshold: float = 10.0) -> List[Dict]:
+    # Positive changePct = slower than the baseline.
+    rows = []
+    for name, now in current.items():
+        before = baseline.get(name)
+        if not before:
+            continue
+        change = (now["usPerOp"] - before["usPerOp"]) / before["usPerOp"] * 100
+        rows.append({
+            "case": name,
+            "baseUs": before["usPerOp"],
+            "currentUs": now["usPerOp"],
+            "changePct": round(change, 1),
+            "peakBytesChange": now["peakBytes"] - before["peakBytes"],
+            "regression": change > threshold,
+        })
+    return rows
+
+
+def _git_revision() -> str:
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{sha}-dirty" if dirty else sha
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filter", default="", help="only run cases containing this text, e.g. analyzer/large")
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timed round")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", nargs="?", const="", default=None, metavar="PATH",
+                        help="store results as JSON (default results/<commit>.json)")
+    parser.add_argument("--compare", default="", metavar="PATH", help="baseline results JSON")
+    parser.add_argument("--threshold", type=float, default=10.0, help="regression threshold in percent")
+    args = parser.parse_args()
+
+    cases = {name: fn for name, fn in all_cases().items() if args.filter in name}
+    results = run(cases, min_time=args.min_time, repeat=args.repeat)
+    revision = _git_revision()
+
+    print(f"{'case':<28} {'ops/sec':>11} {'us/op':>10} {'peak KiB':>9} {'kept B':>8}")
+    for name, row in results.items():
+        print(f"{name:<28} {row['opsPerSec']:>11} {row['usPerOp']:>10} {row['peakBytes'] / 1024:>9.1f} {row['retainedBytes']:>8}")
+
+    if args.save is not None:
+        path = args.save or os.path.join(RESULTS_DIR, f"{revision}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "revision": revision,
+                "createdAt": int(time.time() * 1000),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "results": results,
+            }, f, indent=2)
+        print(f"saved {path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare(baseline["results"], results, args.threshold)
+        print(f"\nvs {baseline.get('revision', args.compare)} (threshold {args.threshold}%)")
+        for row in rows:
+            flag = "  REGRESSION" if row["regression"] else ""
+            print(f"{row['case']:<28} {row['baseUs']:>10} -> {row['currentUs']:>10} us {row['changePct']:>+7.1f}%{flag}")
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""CPU per request for the public listing payload: validated vs projected vs cached.
+
+Run from server/:  python -m benchmarks.public_json [--scripts 500] [--rounds 50]
+"""
+import argparse
+import json
+import os
+import time
+from typing import List
+
+os.environ.setdefault("DB_PATH", ":memory:")
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import crud_ops as crud
+import models
+import schemas
+from database import Base
+from routers.public import public_script_payload
+from services import fast_json
+
+
+def seed(db, count: int):
+    now = int(time.time() * 1000)
+    db.add(models.User(id="bench-owner", email="owner@example.com", displayName="Bench"))
+    db.add(models.Organization(id="bench-org", name="Bench Org", ownerId="bench-owner"))
+    db.add(models.Persona(id="bench-persona", ownerId="bench-owner", displayName="Bench Persona"))
+    tags = [models.Tag(id=i + 1, name=f"tag-{i}", color="bg-blue-500", ownerId="bench-owner") for i in range(8)]
+    db.add_all(tags)
+    for i in range(count):
+        script = models.Script(
+            id=f"bench-{i}",
+            title=f"Benchmark script {i}",
+            ownerId="bench-owner",
+            personaId="bench-persona",
+            organizationId="bench-org",
+            isPublic=1,
+            type="script",
+            content="INT. ROOM - DAY\n\nSomeone talks for a while.\n" * 40,
+            createdAt=now - i,
+            lastModified=now - i,
+        )
+        script.tags = tags[i % 3:i % 3 + 3]
+        db.add(script)
+    db.commit()
+
+
+def measure(fn, rounds: int) -> float:
+    fn()
+    start = time.process_time()
+    for _ in range(rounds):
+        fn()
+    return (time.process_time() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scripts", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    seed(db, args.scripts)
+    adapter = TypeAdapter(List[schemas.PublicScriptSummary])
+
+    def validated(rows):
+        return json.dumps(jsonable_encoder(adapter.validate_python(rows, from_attributes=True))).encode("utf-8")
+
+    def projected(rows):
+        return fast_json.dumps([public_script_payload(s) for s in rows])
+
+    rows = crud.get_public_scripts(db)
+
+    cache = fast_json.PayloadCache()
+    cache.put(("public-scripts",), projected(rows), ttl=3600)
+
+    print(f"{args.scripts} public scripts, {args.rounds} rounds, orjson={'yes' if fast_json.orjson else 'no'}")
+    for name, fn in (
+        ("query + validate + encode + json", lambda: validated(crud.get_public_scripts(db))),
+        ("query + projection + fast dumps", lambda: projected(crud.get_public_scripts(db))),
+        ("serialize only: validated", lambda: validated(rows)),
+        ("serialize only: projected", lambda: projected(rows)),
+        ("cached bytes", lambda: cache.get(("public-scripts",))),
+    ):
+        print(f"  {name:<36} {measure(fn, args.rounds):8.2f} ms CPU/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+import base64
+import hashlib
+import os
+import re
+import zlib
+
+from sqlalchemy import String
+from sqlalchemy.types import TypeDecorator
+
+try:
+    import zstandard
+except Exception:
+    zstandard = None
+
+# off | zlib | zstd. zstd falls back to zlib when the `zstandard` package is missing.
+CONTENT_COMPRESSION = os.getenv("SCRIPT_CONTENT_COMPRESSION", "off").strip().lower()
+CONTENT_COMPRESSION_MIN_BYTES = int(os.getenv("SCRIPT_CONTENT_COMPRESSION_MIN_BYTES", "1024"))
+
+# Compressed bodies are stored as `<prefix><base64>` in the same text column so
+# SQLite and Postgres need no schema change. \x01 never shows up in real script text
+# (and Postgres text columns reject \x00); plain text that does start with it is
+# always compressed so the prefix stays unambiguous.
+COMPRESSED_MARKER = "\x01"
+_ZLIB_PREFIX = "\x01zlib:"
+_ZSTD_PREFIX = "\x01zstd:"
+EMPTY_CONTENT_HASH = hashlib.sha256(b"").hexdigest()
+
+
+def _active_codec():
+    if CONTENT_COMPRESSION == "zstd" and zstandard is not None:
+        return "zstd"
+    if CONTENT_COMPRESSION in {"zlib", "zstd"}:
+        return "zlib"
+    return None
+
+
+def encode_content(text):
+    if text is None:
+        return None
+    codec = _active_codec()
+    must_escape = text.startswith(COMPRESSED_MARKER)
+    if codec is None and not must_escape:
+        return text
+    raw = text.encode("utf-8")
+    if not must_escape and len(raw) < CONTENT_COMPRESSION_MIN_BYTES:
+        return text
+
+    if codec == "zstd":
+        encoded = _ZSTD_PREFIX + base64.b64encode(zstandard.ZstdCompressor(level=3).compress(raw)).decode("ascii")
+    else:
+        encoded = _ZLIB_PREFIX + base64.b64encode(zlib.compress(raw, 6)).decode("ascii")
+    if not must_escape and len(encoded) >= len(text):
+        return text
+    return encoded
+
+
+def decode_content(stored):
+    if not stored or not stored.startswith(COMPRESSED_MARKER):
+        return stored
+    if stored.startswith(_ZLIB_PREFIX):
+        return zlib.decompress(base64.b64decode(stored[len(_ZLIB_PREFIX):])).decode("utf-8")
+    if stored.startswith(_ZSTD_PREFIX):
+        if zstandard is None:
+            raise RuntimeError("Script content is zstd-compressed but `zstandard` is not installed")
+        return zstandard.ZstdDecompressor().decompress(base64.b64decode(stored[len(_ZSTD_PREFIX):])).decode("utf-8")
+    return stored
+
+
+def content_stats(text) -> tuple[int, str]:
+    text = text or ""
+    return len(text), hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+EXCERPT_CHARS = 200
+# Same reading rate as the analyzer's "all" estimate (dialogue + action chars / 300).
+READING_CHARS_PER_MINUTE = 300
+_TITLE_KEY_RE = re.compile(r"^[A-Za-z][A-Za-z ]*:")
+_SCENE_HEADING_RE = re.compile(r"^(\.(?=[^.])|(INT|EXT|EST|INT\./EXT|INT/EXT|I/E)[. ])", re.IGNORECASE)
+_NOTE_RE = re.compile(r"\[\[.*?\]\]|/\*.*?\*/", re.DOTALL)
+_EMPHASIS_RE = re.compile(r"[*_]+")
+
+
+def _body_lines(text: str):
+    lines = _NOTE_RE.sub("", text).split("\n")
+    # A leading "Key: value" block followed by a blank line is the title page.
+    if lines and _TITLE_KEY_RE.match(lines[0].strip()):
+        for i, line in enumerate(lines[:40]):
+            if not line.strip():
+                return lines[i + 1:]
+    return lines
+
+
+def content_summary(text) -> tuple[str, float]:
+    # (excerpt, durationMinutes) for listings, stored on write like content_stats.
+    excerpt_parts = []
+    excerpt_len = 0
+    chars = 0
+    for raw in _body_lines(text or ""):
+        line = raw.strip()
+        if not line or line.startswith(("#", "=", "~", "!!")) or _SCENE_HEADING_RE.match(line):
+            continue
+        chars += len(line)
+        if excerpt_len <= EXCERPT_CHARS:
+            line = _EMPHASIS_RE.sub("", line.lstrip("!@>").rstrip("<")).strip()
+            # Character cues and transitions are all caps; they read badly in a teaser.
+            if line and not line.isupper():
+                excerpt_parts.append(line)
+                excerpt_len += len(line) + 1
+    excerpt = " ".join(excerpt_parts)
+    if len(excerpt) > EXCERPT_CHARS:
+        excerpt = excerpt[:EXCERPT_CHARS].rstrip() + "…"
+    return excerpt, round(chars / READING_CHARS_PER_MINUTE, 1)
+
+
+class CompressedText(TypeDecorator):
+    impl = String
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return encode_content(value)
+
+    def process_result_value(self, value, dialect):
+        return decode_content(value)
+
+    def coerce_compared_value(self, op, value):
+        # LIKE patterns and equality operands are compared against the stored text as-is.
+        return String()
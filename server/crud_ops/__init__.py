@@ -1,8 +1,31 @@
 from .common import (
-    _ensure_list,
     ensure_folder_tree,
     ensure_folders_for_owner,
+    insert_ignore,
+    insert_ignore_rows,
     touch_parent_folders,
+    upsert_counters,
+)
+from .engagement import (
+    bump_daily_stats,
+    flush_view_counts,
+    get_owner_engagement,
+    get_script_engagement,
+    get_view_buffer_stats,
+    record_script_view,
+)
+from .export_jobs import (
+    create_export_job,
+    expire_export_jobs,
+    fail_stale_export_jobs,
+    get_export_job,
+    list_export_jobs,
+    update_export_job,
+)
+from .loaders import (
+    BatchLoader,
+    RequestLoaders,
+    get_loaders,
 )
 from .organizations import (
     accept_invite,
@@ -35,19 +58,62 @@ from .organizations import (
 )
 from .personas import create_persona, delete_persona, get_user_personas, update_persona
 from .scripts import (
+    RevisionConflict,
     create_script,
     delete_script,
+    get_liked_script_ids,
     get_public_scripts,
+    import_scripts,
     get_script,
     get_scripts,
     increment_script_view,
+    move_script,
+    patch_script_content,
+    rebalance_folder_order,
     reorder_scripts,
     search_scripts,
     toggle_script_like,
     update_script,
 )
+from .rankings import (
+    get_public_ranking,
+    get_rankings_computed_at,
+    get_top_tag_names,
+    get_trending_public_scripts,
+    get_trending_script_ids,
+    refresh_public_rankings,
+    refresh_public_rankings_if_stale,
+    start_ranking_refresher,
+)
+from .readers import (
+    add_script_readers,
+    get_organization_readers,
+    get_persona_readers,
+    get_script_readers,
+    record_script_readers,
+)
+from .revisions import (
+    build_snapshot_revision,
+    delete_script_revisions,
+    diff_script_revisions,
+    get_script_revision,
+    list_script_revisions,
+    prune_script_revisions,
+    reconstruct_revision,
+    record_script_revision,
+)
 from .series import create_series, delete_series, get_series, get_series_by_id, update_series
-from .tags import add_tag_to_script, create_tag, delete_tag, get_tags, remove_tag_from_script
+from .sync import get_library_changes, record_script_tombstones
+from .tags import (
+    add_tag_to_script,
+    bulk_update_script_tags,
+    create_tag,
+    delete_tag,
+    get_tags,
+    refresh_tag_usage,
+    remove_tag_from_script,
+    tag_ids_for_scripts,
+)
 from .themes import (
     SYSTEM_DEFAULT_THEME_ID,
     SYSTEM_DEFAULT_THEME_NAME,
@@ -73,10 +139,27 @@ from .transfers import (
 from .users import get_user, search_users, update_user
 
 __all__ = [
-    "_ensure_list",
     "ensure_folder_tree",
     "ensure_folders_for_owner",
     "touch_parent_folders",
+    "upsert_counters",
+    "insert_ignore",
+    "insert_ignore_rows",
+    "bump_daily_stats",
+    "flush_view_counts",
+    "get_owner_engagement",
+    "get_script_engagement",
+    "get_view_buffer_stats",
+    "record_script_view",
+    "create_export_job",
+    "expire_export_jobs",
+    "fail_stale_export_jobs",
+    "get_export_job",
+    "list_export_jobs",
+    "update_export_job",
+    "BatchLoader",
+    "RequestLoaders",
+    "get_loaders",
     "accept_invite",
     "accept_request",
     "add_organization_member",
@@ -109,25 +192,57 @@ __all__ = [
     "get_user_personas",
     "update_persona",
     "create_script",
+    "import_scripts",
     "delete_script",
     "get_public_scripts",
     "get_script",
     "get_scripts",
     "increment_script_view",
+    "move_script",
+    "patch_script_content",
+    "rebalance_folder_order",
     "reorder_scripts",
     "search_scripts",
+    "get_liked_script_ids",
     "toggle_script_like",
     "update_script",
+    "RevisionConflict",
+    "delete_script_revisions",
+    "diff_script_revisions",
+    "get_script_revision",
+    "list_script_revisions",
+    "prune_script_revisions",
+    "reconstruct_revision",
+    "get_public_ranking",
+    "get_rankings_computed_at",
+    "get_top_tag_names",
+    "get_trending_public_scripts",
+    "get_trending_script_ids",
+    "refresh_public_rankings",
+    "refresh_public_rankings_if_stale",
+    "start_ranking_refresher",
+    "add_script_readers",
+    "get_organization_readers",
+    "get_persona_readers",
+    "get_script_readers",
+    "record_script_readers",
+    "record_script_revision",
+    "build_snapshot_revision",
     "create_series",
     "delete_series",
     "get_series",
     "get_series_by_id",
     "update_series",
+    "get_library_changes",
+    "record_script_tombstones",
     "add_tag_to_script",
     "create_tag",
     "delete_tag",
     "get_tags",
     "remove_tag_from_script",
+    "bulk_update_script_tags",
+    "refresh_tag_usage",
+    "tag_ids_for_scripts",
     "SYSTEM_DEFAULT_THEME_ID",
     "SYSTEM_DEFAULT_THEME_NAME",
     "_parse_theme_configs",
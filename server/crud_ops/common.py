@@ -1,12 +1,16 @@
-from typing import List
-import json
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 import time
 import uuid
 
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 import models
 
+MAX_ENGAGEMENT_DAYS = 365
+
 
 def touch_parent_folders(db: Session, folder_path: str, ownerId: str, timestamp: int):
     if not folder_path or folder_path == "/":
@@ -24,7 +28,7 @@ def touch_parent_folders(db: Session, folder_path: str, ownerId: str, timestamp:
             models.Script.type == "folder",
             models.Script.title == title,
             models.Script.folder == parent,
-        ).update({"lastModified": timestamp})
+        ).update({"lastModified": timestamp, "changedAt": timestamp})
 
         path = parent
 
@@ -58,31 +62,131 @@ def ensure_folder_tree(db: Session, ownerId: str, folder_path: str):
 
 
 def ensure_folders_for_owner(db: Session, ownerId: str, folder_paths: List[str]):
-    for path in {p for p in folder_paths if p and p != "/"}:
-        ensure_folder_tree(db, ownerId, path)
-
-
-def _ensure_list(val):
-    if isinstance(val, list):
-        return val
-    if isinstance(val, str):
-        try:
-            parsed = json.loads(val)
-            if isinstance(parsed, str):
-                try:
-                    parsed = json.loads(parsed)
-                except Exception:
-                    pass
-            if isinstance(parsed, list):
-                return parsed
-        except Exception:
-            pass
-    return []
+    paths = {p for p in folder_paths if p and p != "/"}
+    if not paths:
+        return
+    # One read of the owner's folder rows, then create whatever is missing. Tracking
+    # what we add also keeps shared ancestors from being inserted twice.
+    existing = {
+        (row.folder, row.title)
+        for row in db.query(models.Script.folder, models.Script.title)
+        .filter(models.Script.ownerId == ownerId, models.Script.type == "folder")
+        .all()
+    }
+    now = int(time.time() * 1000)
+    for path in sorted(paths):
+        parent = "/"
+        for part in [p for p in path.strip("/").split("/") if p]:
+            if (parent, part) not in existing:
+                existing.add((parent, part))
+                db.add(
+                    models.Script(
+                        id=str(uuid.uuid4()),
+                        ownerId=ownerId,
+                        title=part,
+                        type="folder",
+                        folder=parent,
+                        createdAt=now,
+                        lastModified=now,
+                    )
+                )
+            parent = f"{parent.rstrip('/')}/{part}" if parent != "/" else f"/{part}"
+
+
+def upsert_counters(db: Session, model, rows: List[dict], key_columns: List[str], counter_columns: List[str]):
+    # INSERT ... ON CONFLICT DO UPDATE: counters are added to the existing row, any
+    # other column in the row overwrites it. One statement per call on SQLite/Postgres.
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else pg_insert
+        stmt = insert(table).values(rows)
+        set_ = {
+            col: (table.c[col] + stmt.excluded[col]) if col in counter_columns else stmt.excluded[col]
+            for col in rows[0]
+            if col not in key_columns
+        }
+        db.execute(stmt.on_conflict_do_update(index_elements=key_columns, set_=set_))
+        return
+
+    for row in rows:
+        key_filter = [getattr(model, col) == row[col] for col in key_columns]
+        updated = db.query(model).filter(*key_filter).update(
+            {
+                getattr(model, col): (getattr(model, col) + value) if col in counter_columns else value
+                for col, value in row.items()
+                if col not in key_columns
+            },
+            synchronize_session=False,
+        )
+        if not updated:
+            db.add(model(**row))
+
+
+def insert_ignore(db: Session, model, columns: List[str], source) -> int:
+    # INSERT ... SELECT ... ON CONFLICT DO NOTHING on the primary key. Returns the
+    # number of rows actually inserted, so callers can tell a new row from a duplicate.
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else pg_insert
+        stmt = insert(table).from_select(columns, source).on_conflict_do_nothing(
+            index_elements=[col.name for col in table.primary_key.columns]
+        )
+        return db.execute(stmt).rowcount
+
+    inserted = 0
+    for values in db.execute(source).all():
+        row = dict(zip(columns, values))
+        key_filter = [getattr(model, col.name) == row[col.name] for col in table.primary_key.columns]
+        if not db.query(model).filter(*key_filter).first():
+            db.add(model(**row))
+            inserted += 1
+    db.flush()
+    return inserted
+
+
+def insert_ignore_rows(db: Session, model, rows: List[dict]) -> int:
+    # Same as insert_ignore, for literal rows instead of a SELECT.
+    if not rows:
+        return 0
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else pg_insert
+        stmt = insert(table).values(rows).on_conflict_do_nothing(
+            index_elements=[col.name for col in table.primary_key.columns]
+        )
+        return db.execute(stmt).rowcount
+
+    inserted = 0
+    for row in rows:
+        key_filter = [getattr(model, col.name) == row[col.name] for col in table.primary_key.columns]
+        if not db.query(model).filter(*key_filter).first():
+            db.add(model(**row))
+            inserted += 1
+    db.flush()
+    return inserted
+
+
+def utc_day(ts: Optional[float] = None) -> str:
+    return datetime.fromtimestamp(time.time() if ts is None else ts, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _day_range(days: int):
+    # The last `days` UTC days, oldest first, for zero-filled stats series.
+    days = max(1, min(int(days or 30), MAX_ENGAGEMENT_DAYS))
+    today = datetime.now(timezone.utc).date()
+    return [(today - timedelta(days=offset)).strftime("%Y-%m-%d") for offset in range(days - 1, -1, -1)]
 
 
 __all__ = [
     "touch_parent_folders",
     "ensure_folder_tree",
     "ensure_folders_for_owner",
-    "_ensure_list",
+    "upsert_counters",
+    "insert_ignore",
+    "insert_ignore_rows",
 ]
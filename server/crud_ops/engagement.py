@@ -0,0 +1,292 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+import database
+import models
+from services.hyperloglog import hash_visitor
+from .common import _day_range, upsert_counters, utc_day
+from .readers import add_script_readers
+
+# Views are counted in memory per process and written in one batched UPDATE every
+# VIEW_FLUSH_INTERVAL_SECONDS, so a crash loses at most one interval of views.
+# 0 writes through on every view (used by tests and single-user setups).
+VIEW_FLUSH_INTERVAL_SECONDS = float(os.getenv("VIEW_FLUSH_INTERVAL_SECONDS", "5"))
+VIEW_FLUSH_MAX_SCRIPTS = int(os.getenv("VIEW_FLUSH_MAX_SCRIPTS", "2000"))
+# A visitor re-opening the same script inside this window is not counted again.
+VIEW_DEDUP_WINDOW_SECONDS = int(os.getenv("VIEW_DEDUP_WINDOW_SECONDS", "1800"))
+VIEW_DEDUP_MAX_ENTRIES = int(os.getenv("VIEW_DEDUP_MAX_ENTRIES", "200000"))
+_FLUSH_CHUNK = 500
+DAILY_STAT_COUNTERS = ["views", "likes", "unlikes"]
+
+
+class ViewBuffer:
+    def __init__(self, dedup_window_seconds: int = VIEW_DEDUP_WINDOW_SECONDS, dedup_max_entries: int = VIEW_DEDUP_MAX_ENTRIES):
+        self.dedup_window = dedup_window_seconds
+        self.dedup_max_entries = dedup_max_entries
+        self._lock = threading.Lock()
+        self._pending: Dict[str, int] = {}
+        self._pending_since: Optional[float] = None
+        # Hashed visitor ids per script, merged into the daily reader sketches on flush.
+        self._readers: Dict[str, Set[int]] = {}
+        self._seen: "OrderedDict[tuple, float]" = OrderedDict()
+        self.counters = {
+            "recorded": 0,
+            "deduplicated": 0,
+            "flushedViews": 0,
+            "flushes": 0,
+            "flushFailures": 0,
+            "lastFlushAt": None,
+            "lastFlushDurationMs": 0,
+        }
+
+    def record(self, script_id: str, visitor_key: Optional[str] = None, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        visitor_hash = hash_visitor(visitor_key) if visitor_key else None
+        with self._lock:
+            if visitor_key and self.dedup_window > 0:
+                while self._seen:
+                    expires_at = next(iter(self._seen.values()))
+                    if expires_at > now and len(self._seen) < self.dedup_max_entries:
+                        break
+                    self._seen.popitem(last=False)
+                seen_key = (script_id, visitor_key)
+                if seen_key in self._seen:
+                    self.counters["deduplicated"] += 1
+                    return False
+                self._seen[seen_key] = now + self.dedup_window
+            self._pending[script_id] = self._pending.get(script_id, 0) + 1
+            if visitor_hash is not None:
+                self._readers.setdefault(script_id, set()).add(visitor_hash)
+            if self._pending_since is None:
+                self._pending_since = now
+            self.counters["recorded"] += 1
+            return True
+
+    def take(self):
+        with self._lock:
+            pending, since, readers = self._pending, self._pending_since, self._readers
+            self._pending, self._pending_since, self._readers = {}, None, {}
+            return pending, since, readers
+
+    def restore(self, counts: Dict[str, int], since: Optional[float], readers: Optional[Dict[str, Set[int]]] = None):
+        # A failed flush puts its counts back so they go out with the next one.
+        with self._lock:
+            for script_id, count in counts.items():
+                self._pending[script_id] = self._pending.get(script_id, 0) + count
+            for script_id, hashes in (readers or {}).items():
+                self._readers.setdefault(script_id, set()).update(hashes)
+            if since is not None and (self._pending_since is None or since < self._pending_since):
+                self._pending_since = since
+            self.counters["flushFailures"] += 1
+
+    def note_flush(self, views: int, duration_ms: int):
+        with self._lock:
+            self.counters["flushes"] += 1
+            self.counters["flushedViews"] += views
+            self.counters["lastFlushAt"] = int(time.time() * 1000)
+            self.counters["lastFlushDurationMs"] = duration_ms
+
+    def is_due(self, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        with self._lock:
+            if not self._pending:
+                return False
+            return (
+                now - self._pending_since >= VIEW_FLUSH_INTERVAL_SECONDS
+                or len(self._pending) >= VIEW_FLUSH_MAX_SCRIPTS
+            )
+
+    def stats(self, now: Optional[float] = None) -> dict:
+        now = time.time() if now is None else now
+        with self._lock:
+            return {
+                **self.counters,
+                "pendingScripts": len(self._pending),
+                "pendingViews": sum(self._pending.values()),
+                "pendingReaders": sum(len(hashes) for hashes in self._readers.values()),
+                "flushLagMs": int((now - self._pending_since) * 1000) if self._pending_since else 0,
+                "dedupEntries": len(self._seen),
+                "flushIntervalSeconds": VIEW_FLUSH_INTERVAL_SECONDS,
+            }
+
+
+view_buffer = ViewBuffer()
+_flusher_lock = threading.Lock()
+_flusher_thread: Optional[threading.Thread] = None
+
+
+def bump_daily_stats(db: Session, day: str, column: str, counts: Dict[str, int]):
+    # Adds to the per-script rollup row for `day`; rows are created on first use.
+    now = int(time.time() * 1000)
+    rows = [
+        {"scriptId": script_id, "day": day, **{c: (n if c == column else 0) for c in DAILY_STAT_COUNTERS}, "updatedAt": now}
+        for script_id, n in counts.items()
+        if n
+    ]
+    for start in range(0, len(rows), _FLUSH_CHUNK):
+        upsert_counters(db, models.ScriptDailyStat, rows[start:start + _FLUSH_CHUNK], ["scriptId", "day"], DAILY_STAT_COUNTERS)
+
+
+def _write_view_counts(db: Session, counts: Dict[str, int], day: Optional[str] = None, readers: Optional[Dict[str, Set[int]]] = None):
+    ids = list(counts)
+    existing = set()
+    for start in range(0, len(ids), _FLUSH_CHUNK):
+        chunk = {script_id: counts[script_id] for script_id in ids[start:start + _FLUSH_CHUNK]}
+        db.query(models.Script).filter(models.Script.id.in_(list(chunk))).update(
+            {models.Script.views: models.Script.views + case(chunk, value=models.Script.id, else_=0)},
+            synchronize_session=False,
+        )
+        existing.update(row[0] for row in db.query(models.Script.id).filter(models.Script.id.in_(list(chunk))).all())
+    # Views for unknown ids are dropped rather than breaking the rollup's foreign key.
+    day = day or utc_day()
+    bump_daily_stats(db, day, "views", {k: v for k, v in counts.items() if k in existing})
+    if readers:
+        add_script_readers(db, day, {k: v for k, v in readers.items() if k in existing})
+
+
+def flush_view_counts(db: Optional[Session] = None) -> int:
+    started = time.time()
+    counts, since, readers = view_buffer.take()
+    if not counts:
+        return 0
+    own_session = db is None
+    if own_session:
+        db = database.SessionLocal()
+    try:
+        # Attributed to the day the oldest buffered view arrived.
+        _write_view_counts(db, counts, utc_day(since), readers)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        view_buffer.restore(counts, since, readers)
+        print(f"View flush failed: {e}")
+        return 0
+    finally:
+        if own_session:
+            db.close()
+    flushed = sum(counts.values())
+    view_buffer.note_flush(flushed, int((time.time() - started) * 1000))
+    return flushed
+
+
+def _flush_loop():
+    while True:
+        time.sleep(VIEW_FLUSH_INTERVAL_SECONDS)
+        try:
+            flush_view_counts()
+        except Exception as e:
+            print(f"View flusher error: {e}")
+
+
+def _ensure_flusher():
+    global _flusher_thread
+    if _flusher_thread is not None:
+        return
+    with _flusher_lock:
+        if _flusher_thread is None:
+            _flusher_thread = threading.Thread(target=_flush_loop, name="view-flusher", daemon=True)
+            _flusher_thread.start()
+
+
+def record_script_view(db: Session, script_id: str, visitor_key: Optional[str] = None) -> bool:
+    counted = view_buffer.record(script_id, visitor_key)
+    if VIEW_FLUSH_INTERVAL_SECONDS <= 0 or view_buffer.is_due():
+        # Write-through mode, or the buffer is overdue/large: flush on this request.
+        flush_view_counts(db)
+    else:
+        _ensure_flusher()
+    return counted
+
+
+def get_view_buffer_stats():
+    return view_buffer.stats()
+
+
+def _fill_days(day_keys, rows):
+    by_day = {row.day: row for row in rows}
+    series = []
+    for day in day_keys:
+        row = by_day.get(day)
+        series.append({
+            "day": day,
+            "views": int(row.views or 0) if row else 0,
+            "likes": int(row.likes or 0) if row else 0,
+            "unlikes": int(row.unlikes or 0) if row else 0,
+        })
+    return series
+
+
+def _totals(series):
+    return {c: sum(point[c] for point in series) for c in DAILY_STAT_COUNTERS}
+
+
+def get_script_engagement(db: Session, script_id: str, ownerId: str, days: int = 30):
+    owned = db.query(models.Script.id).filter(models.Script.id == script_id, models.Script.ownerId == ownerId).first()
+    if not owned:
+        return None
+    day_keys = _day_range(days)
+    rows = (
+        db.query(models.ScriptDailyStat)
+        .filter(models.ScriptDailyStat.scriptId == script_id, models.ScriptDailyStat.day >= day_keys[0])
+        .all()
+    )
+    series = _fill_days(day_keys, rows)
+    return {"scriptId": script_id, "days": series, "totals": _totals(series)}
+
+
+def get_owner_engagement(db: Session, ownerId: str, days: int = 30, top: int = 10):
+    day_keys = _day_range(days)
+    in_window = (
+        db.query(models.ScriptDailyStat)
+        .join(models.Script, models.Script.id == models.ScriptDailyStat.scriptId)
+        .filter(models.Script.ownerId == ownerId, models.ScriptDailyStat.day >= day_keys[0])
+    )
+    per_day = (
+        in_window.with_entities(
+            models.ScriptDailyStat.day.label("day"),
+            func.sum(models.ScriptDailyStat.views).label("views"),
+            func.sum(models.ScriptDailyStat.likes).label("likes"),
+            func.sum(models.ScriptDailyStat.unlikes).label("unlikes"),
+        )
+        .group_by(models.ScriptDailyStat.day)
+        .all()
+    )
+    views_sum = func.sum(models.ScriptDailyStat.views)
+    top_scripts = (
+        in_window.with_entities(
+            models.Script.id,
+            models.Script.title,
+            views_sum.label("views"),
+            func.sum(models.ScriptDailyStat.likes).label("likes"),
+        )
+        .group_by(models.Script.id, models.Script.title)
+        .order_by(views_sum.desc())
+        .limit(top)
+        .all()
+    )
+    series = _fill_days(day_keys, per_day)
+    return {
+        "days": series,
+        "totals": _totals(series),
+        "topScripts": [
+            {"id": row.id, "title": row.title, "views": int(row.views or 0), "likes": int(row.likes or 0)}
+            for row in top_scripts
+        ],
+    }
+
+
+__all__ = [
+    "record_script_view",
+    "flush_view_counts",
+    "get_view_buffer_stats",
+    "utc_day",
+    "bump_daily_stats",
+    "get_script_engagement",
+    "get_owner_engagement",
+]
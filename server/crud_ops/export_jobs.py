@@ -0,0 +1,133 @@
+import os
+import time
+import uuid
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+import models
+
+ACTIVE_EXPORT_STATUSES = ("queued", "running")
+# A running job bumps updatedAt after every batch. An active job idle for
+# longer than this belonged to a worker that died (or a queue lost with it),
+# so it is failed and no longer blocks a new export of the same scope.
+EXPORT_JOB_STALE_MS = int(os.getenv("EXPORT_JOB_STALE_MINUTES", "30")) * 60 * 1000
+STALE_EXPORT_ERROR = "Export was interrupted; please start it again"
+
+
+def create_export_job(db: Session, ownerId: str, scope: str = "account", folder: Optional[str] = None, seriesId: Optional[str] = None):
+    if scope == "folder":
+        folder = "/" + (folder or "").strip("/")
+        if folder == "/":
+            return None
+        seriesId = None
+    elif scope == "series":
+        series = db.query(models.Series.id).filter(models.Series.id == seriesId, models.Series.ownerId == ownerId).first()
+        if not series:
+            return None
+        folder = None
+    else:
+        scope, folder, seriesId = "account", None, None
+
+    fail_stale_export_jobs(db, int(time.time() * 1000) - EXPORT_JOB_STALE_MS, ownerId=ownerId)
+    # Re-requesting the same export while one is in flight returns the existing job.
+    existing = (
+        db.query(models.ExportJob)
+        .filter(
+            models.ExportJob.ownerId == ownerId,
+            models.ExportJob.scope == scope,
+            models.ExportJob.folder == folder,
+            models.ExportJob.seriesId == seriesId,
+            models.ExportJob.status.in_(ACTIVE_EXPORT_STATUSES),
+        )
+        .first()
+    )
+    if existing:
+        return existing
+
+    now = int(time.time() * 1000)
+    job = models.ExportJob(
+        id=str(uuid.uuid4()),
+        ownerId=ownerId,
+        scope=scope,
+        folder=folder,
+        seriesId=seriesId,
+        status="queued",
+        createdAt=now,
+        updatedAt=now,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_export_job(db: Session, job_id: str, ownerId: str):
+    return db.query(models.ExportJob).filter(models.ExportJob.id == job_id, models.ExportJob.ownerId == ownerId).first()
+
+
+def list_export_jobs(db: Session, ownerId: str, limit: int = 20):
+    return (
+        db.query(models.ExportJob)
+        .filter(models.ExportJob.ownerId == ownerId)
+        .order_by(models.ExportJob.createdAt.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+def update_export_job(db: Session, job_id: str, **fields):
+    fields["updatedAt"] = int(time.time() * 1000)
+    db.query(models.ExportJob).filter(models.ExportJob.id == job_id).update(
+        {getattr(models.ExportJob, key): value for key, value in fields.items()},
+        synchronize_session=False,
+    )
+    db.commit()
+
+
+def fail_stale_export_jobs(db: Session, before: int, ownerId: Optional[str] = None) -> int:
+    query = db.query(models.ExportJob).filter(
+        models.ExportJob.status.in_(ACTIVE_EXPORT_STATUSES),
+        models.ExportJob.updatedAt < before,
+    )
+    if ownerId is not None:
+        query = query.filter(models.ExportJob.ownerId == ownerId)
+    failed = query.update(
+        {
+            models.ExportJob.status: "failed",
+            models.ExportJob.error: STALE_EXPORT_ERROR,
+            models.ExportJob.updatedAt: int(time.time() * 1000),
+        },
+        synchronize_session=False,
+    )
+    if failed:
+        db.commit()
+    return failed
+
+
+def expire_export_jobs(db: Session, before: int) -> List[str]:
+    # Returns the archive paths of removed jobs so the caller can unlink them.
+    fail_stale_export_jobs(db, int(time.time() * 1000) - EXPORT_JOB_STALE_MS)
+    jobs = (
+        db.query(models.ExportJob.id, models.ExportJob.filePath)
+        .filter(
+            models.ExportJob.createdAt < before,
+            models.ExportJob.status.notin_(ACTIVE_EXPORT_STATUSES),
+        )
+        .all()
+    )
+    if not jobs:
+        return []
+    db.query(models.ExportJob).filter(models.ExportJob.id.in_([j.id for j in jobs])).delete(synchronize_session=False)
+    db.commit()
+    return [j.filePath for j in jobs if j.filePath]
+
+
+__all__ = [
+    "create_export_job",
+    "get_export_job",
+    "list_export_jobs",
+    "update_export_job",
+    "fail_stale_export_jobs",
+    "expire_export_jobs",
+]
@@ -0,0 +1,153 @@
+from typing import Callable, Dict, Hashable, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+import models
+
+_LOADERS_KEY = "batch_loaders"
+
+
+class BatchLoader:
+    # Coalesces per-entity lookups into one `IN (...)` query per batch. Results
+    # (including misses) are remembered for the rest of the session/request.
+    def __init__(self, batch_fn: Callable[[list], Dict], default=None):
+        self._batch_fn = batch_fn
+        self._default = default
+        self._cache: Dict[Hashable, object] = {}
+
+    def load_many(self, keys: Iterable[Hashable]) -> Dict:
+        keys = [key for key in dict.fromkeys(keys) if key]
+        missing = [key for key in keys if key not in self._cache]
+        if missing:
+            found = self._batch_fn(missing)
+            for key in missing:
+                self._cache[key] = found.get(key, self._default)
+        return {key: self._cache[key] for key in keys}
+
+    def load(self, key: Hashable):
+        if not key:
+            return self._default
+        return self.load_many([key])[key]
+
+
+def _folder_path(folder: Optional[str], title: Optional[str]) -> str:
+    return (folder if folder != "/" else "") + "/" + (title or "")
+
+
+def _parent_is_public(public_folders, owner_id: str, folder: Optional[str]) -> bool:
+    # Same rule as the public routes: the script's immediate parent folder row
+    # must be public.
+    if not folder or folder == "/":
+        return False
+    return (owner_id, "/" + folder.strip("/")) in public_folders
+
+
+def _public_folder_paths(db: Session, owner_ids) -> set:
+    if not owner_ids:
+        return set()
+    rows = (
+        db.query(models.Script.ownerId, models.Script.folder, models.Script.title)
+        .filter(
+            models.Script.ownerId.in_(list(owner_ids)),
+            models.Script.type == "folder",
+            models.Script.isPublic == 1,
+        )
+        .all()
+    )
+    return {(row.ownerId, _folder_path(row.folder, row.title)) for row in rows}
+
+
+def _batch_has_public_script(db: Session, column, ids: list, *filters) -> Dict:
+    rows = (
+        db.query(column, models.Script.ownerId, models.Script.folder, models.Script.isPublic)
+        .filter(column.in_(ids), *filters)
+        .all()
+    )
+    found = {key: True for key, _, _, is_public in rows if is_public}
+    pending = [(key, owner_id, folder) for key, owner_id, folder, is_public in rows if key not in found]
+    if pending:
+        public_folders = _public_folder_paths(db, {owner_id for _, owner_id, _ in pending})
+        for key, owner_id, folder in pending:
+            if _parent_is_public(public_folders, owner_id, folder):
+                found[key] = True
+    return found
+
+
+def _batch_persona_org_ids(db: Session, persona_ids: list) -> Dict:
+    # Membership rows first, then legacy personas.organizationIds, as in
+    # get_persona_org_ids.
+    out = {persona_id: [] for persona_id in persona_ids}
+    rows = (
+        db.query(models.PersonaOrganizationMembership.personaId, models.PersonaOrganizationMembership.orgId)
+        .filter(models.PersonaOrganizationMembership.personaId.in_(persona_ids))
+        .all()
+    )
+    for persona_id, org_id in rows:
+        if org_id:
+            out[persona_id].append(org_id)
+    legacy = (
+        db.query(models.Persona.id, models.Persona.organizationIds)
+        .filter(models.Persona.id.in_(persona_ids))
+        .all()
+    )
+    for persona_id, org_ids in legacy:
+        for org_id in org_ids or []:
+            if org_id and org_id not in out[persona_id]:
+                out[persona_id].append(org_id)
+    return out
+
+
+def _batch_users(db: Session, user_ids: list) -> Dict:
+    return {user.id: user for user in db.query(models.User).filter(models.User.id.in_(user_ids)).all()}
+
+
+def _batch_organizations(db: Session, org_ids: list) -> Dict:
+    return {org.id: org for org in db.query(models.Organization).filter(models.Organization.id.in_(org_ids)).all()}
+
+
+class RequestLoaders:
+    def __init__(self, db: Session):
+        self.persona_org_ids = BatchLoader(lambda ids: _batch_persona_org_ids(db, ids), default=[])
+        self.persona_has_public_script = BatchLoader(
+            lambda ids: _batch_has_public_script(db, models.Script.personaId, ids), default=False
+        )
+        self.org_has_public_script = BatchLoader(
+            lambda ids: _batch_has_public_script(db, models.Script.organizationId, ids), default=False
+        )
+        self.user_has_public_script = BatchLoader(
+            lambda ids: _batch_has_public_script(db, models.Script.ownerId, ids, models.Script.personaId.is_(None)),
+            default=False,
+        )
+        self.users = BatchLoader(lambda ids: _batch_users(db, ids))
+        self.organizations = BatchLoader(lambda ids: _batch_organizations(db, ids))
+
+
+def get_loaders(db: Session) -> RequestLoaders:
+    # One set per session, i.e. per request via get_db.
+    loaders = db.info.get(_LOADERS_KEY)
+    if loaders is None:
+        loaders = db.info[_LOADERS_KEY] = RequestLoaders(db)
+    return loaders
+
+
+def _reset_loaders(session, *args):
+    # Anything written in this session may change what the loaders would return.
+    session.info.pop(_LOADERS_KEY, None)
+
+
+for _event_name in ("after_flush", "after_commit", "after_rollback"):
+    event.listen(Session, _event_name, _reset_loaders)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _reset_loaders_on_bulk_write(orm_execute_state):
+    if orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert:
+        _reset_loaders(orm_execute_state.session)
+
+
+__all__ = [
+    "BatchLoader",
+    "RequestLoaders",
+    "get_loaders",
+]
@@ -1,22 +1,13 @@
-import json
 import time
 import uuid
 
 from sqlalchemy.orm import Session
 
 import models
-from .common import _ensure_list
 
 
 def get_user_organizations(db: Session, ownerId: str):
-    orgs = db.query(models.Organization).filter(models.Organization.ownerId == ownerId).all()
-    for o in orgs:
-        if isinstance(o.tags, str):
-            try:
-                o.tags = json.loads(o.tags)
-            except Exception:
-                o.tags = []
-    return orgs
+    return db.query(models.Organization).filter(models.Organization.ownerId == ownerId).all()
 
 
 def get_organization_members(db: Session, org_id: str):
@@ -51,11 +42,8 @@ def get_organization_members(db: Session, org_id: str):
     if persona_ids:
         linked_personas = db.query(models.Persona).filter(models.Persona.id.in_(list(persona_ids))).all()
         for p in linked_personas:
-            p.tags = _ensure_list(p.tags)
-            p.organizationIds = _ensure_list(p.organizationIds)
             if org_id not in p.organizationIds:
                 p.organizationIds = [*p.organizationIds, org_id]
-            p.defaultLicenseSpecialTerms = _ensure_list(p.defaultLicenseSpecialTerms)
             setattr(p, "organizationRole", persona_role_map.get(p.id, "member"))
             personas.append(p)
 
@@ -65,11 +53,7 @@ def get_organization_members(db: Session, org_id: str):
     for p in all_personas:
         if p.id in persona_id_set:
             continue
-        org_ids = _ensure_list(p.organizationIds)
-        if org_id in org_ids:
-            p.tags = _ensure_list(p.tags)
-            p.organizationIds = org_ids
-            p.defaultLicenseSpecialTerms = _ensure_list(p.defaultLicenseSpecialTerms)
+        if org_id in p.organizationIds:
             setattr(p, "organizationRole", "member")
             personas.append(p)
     return users, personas
@@ -208,7 +192,7 @@ def remove_persona_org_membership(db: Session, persona_id: str, org_id: str) ->
     persona = db.query(models.Persona).filter(models.Persona.id == persona_id).first()
     if not persona:
         return False
-    org_ids = _ensure_list(persona.organizationIds)
+    org_ids = persona.organizationIds or []
     if org_id in org_ids:
         persona.organizationIds = [oid for oid in org_ids if oid != org_id]
     return row is not None or org_id in org_ids
@@ -239,7 +223,7 @@ def get_persona_org_ids(db: Session, persona: models.Persona):
         models.PersonaOrganizationMembership.personaId == persona.id
     ).all()
     org_ids.extend([row[0] for row in rows if row and row[0]])
-    legacy_org_ids = _ensure_list(persona.organizationIds)
+    legacy_org_ids = persona.organizationIds or []
     for org_id in legacy_org_ids:
         if org_id and org_id not in org_ids:
             org_ids.append(org_id)
@@ -247,7 +231,7 @@ def get_persona_org_ids(db: Session, persona: models.Persona):
 
 
 def sync_persona_org_memberships(db: Session, persona: models.Persona):
-    desired_org_ids = set(_ensure_list(persona.organizationIds))
+    desired_org_ids = set(persona.organizationIds or [])
     existing_rows = db.query(models.PersonaOrganizationMembership).filter(
         models.PersonaOrganizationMembership.personaId == persona.id
     ).all()
@@ -5,13 +5,12 @@ from sqlalchemy.orm import Session
 
 import models
 import schemas
-from .common import _ensure_list
 from .organizations_query import is_user_org_manager, sync_persona_org_memberships
 
 
 def _sanitize_persona_org_ids(db: Session, owner_id: str, org_ids) -> list[str]:
     sanitized = []
-    for org_id in _ensure_list(org_ids):
+    for org_id in org_ids or []:
         org_id_str = str(org_id or "").strip()
         if not org_id_str:
             continue
@@ -66,23 +65,11 @@ def update_persona(db: Session, persona_id: str, persona: schemas.PersonaCreate,
     db_persona.updatedAt = int(time.time() * 1000)
     db.commit()
     db.refresh(db_persona)
-
-    db_persona.tags = _ensure_list(db_persona.tags)
-    db_persona.organizationIds = _ensure_list(db_persona.organizationIds)
-    db_persona.defaultLicenseSpecialTerms = _ensure_list(db_persona.defaultLicenseSpecialTerms)
-    db_persona.links = _ensure_list(db_persona.links)
-
     return db_persona
 
 
 def get_user_personas(db: Session, ownerId: str):
-    personas = db.query(models.Persona).filter(models.Persona.ownerId == ownerId).all()
-    for p in personas:
-        p.organizationIds = _ensure_list(p.organizationIds)
-        p.tags = _ensure_list(p.tags)
-        p.defaultLicenseSpecialTerms = _ensure_list(p.defaultLicenseSpecialTerms)
-        p.links = _ensure_list(p.links)
-    return personas
+    return db.query(models.Persona).filter(models.Persona.ownerId == ownerId).all()
 
 
 def delete_persona(db: Session, persona_id: str):
@@ -91,7 +78,9 @@ def delete_persona(db: Session, persona_id: str):
         db.query(models.PersonaOrganizationMembership).filter(
             models.PersonaOrganizationMembership.personaId == persona_id
         ).delete()
-        db.query(models.Script).filter(models.Script.personaId == persona_id).update({models.Script.personaId: None})
+        db.query(models.Script).filter(models.Script.personaId == persona_id).update(
+            {models.Script.personaId: None, models.Script.changedAt: int(time.time() * 1000)}
+        )
         db.delete(persona)
         db.commit()
         return True
@@ -0,0 +1,210 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from sqlalchemy import case, func, orm, text
+from sqlalchemy.orm import Session
+
+import database
+import models
+from .common import upsert_counters
+from .engagement import utc_day
+from .scripts_query import _normalize_personas_for_public
+
+# Trending = sum over the window of (views + like weight * net likes), each day
+# decayed by its age so yesterday's spike outranks last week's.
+TRENDING_WINDOW_DAYS = int(os.getenv("TRENDING_WINDOW_DAYS", "14"))
+TRENDING_HALF_LIFE_DAYS = float(os.getenv("TRENDING_HALF_LIFE_DAYS", "3"))
+TRENDING_LIKE_WEIGHT = float(os.getenv("TRENDING_LIKE_WEIGHT", "5"))
+# Background refresh period per worker; 0 disables it (refresh via the admin endpoint).
+PUBLIC_RANKING_REFRESH_SECONDS = int(os.getenv("PUBLIC_RANKING_REFRESH_SECONDS", "300"))
+TRENDING_LIMIT = 100
+TOP_TAGS_LIMIT = 20
+KIND_TRENDING = "trending"
+KIND_TOP_TAGS = "top_tags"
+# Transaction-scoped Postgres advisory lock key: one refresh at a time across workers.
+RANKING_REFRESH_LOCK_KEY = 0x52414E4B
+
+
+def _compute_trending(db: Session, now: float):
+    window_start = utc_day(now - (TRENDING_WINDOW_DAYS - 1) * 86400)
+    today = datetime.fromtimestamp(now, tz=timezone.utc).date()
+    rows = (
+        db.query(
+            models.ScriptDailyStat.scriptId,
+            models.ScriptDailyStat.day,
+            models.ScriptDailyStat.views,
+            models.ScriptDailyStat.likes,
+            models.ScriptDailyStat.unlikes,
+        )
+        .join(models.Script, models.Script.id == models.ScriptDailyStat.scriptId)
+        .filter(
+            models.Script.isPublic == 1,
+            models.Script.type == "script",
+            models.ScriptDailyStat.day >= window_start,
+        )
+        .all()
+    )
+    scores = {}
+    for row in rows:
+        age_days = (today - datetime.strptime(row.day, "%Y-%m-%d").date()).days
+        weight = 0.5 ** (max(age_days, 0) / TRENDING_HALF_LIFE_DAYS)
+        raw = (row.views or 0) + TRENDING_LIKE_WEIGHT * ((row.likes or 0) - (row.unlikes or 0))
+        scores[row.scriptId] = scores.get(row.scriptId, 0.0) + raw * weight
+    ranked = sorted(((sid, score) for sid, score in scores.items() if score > 0), key=lambda kv: kv[1], reverse=True)
+    return ranked[:TRENDING_LIMIT]
+
+
+def _compute_top_tags(db: Session):
+    # Same weighting the bundle used per request (views, or 1 for unviewed
+    # scripts), but over the whole public catalogue.
+    score = func.sum(case((models.Script.views > 0, models.Script.views), else_=1))
+    rows = (
+        db.query(models.Tag.name, score.label("score"))
+        .join(models.ScriptTag, models.ScriptTag.tagId == models.Tag.id)
+        .join(models.Script, models.Script.id == models.ScriptTag.scriptId)
+        .filter(models.Script.isPublic == 1, models.Tag.name.isnot(None), models.Tag.name != "")
+        .group_by(models.Tag.name)
+        .order_by(score.desc(), models.Tag.name.asc())
+        .limit(TOP_TAGS_LIMIT)
+        .all()
+    )
+    return [(row.name, float(row.score or 0)) for row in rows]
+
+
+def _try_refresh_lock(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return True
+    return bool(db.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": RANKING_REFRESH_LOCK_KEY}).scalar())
+
+
+def refresh_public_rankings(db: Session, now: Optional[float] = None):
+    now = time.time() if now is None else now
+    computed_at = int(now * 1000)
+    try:
+        if not _try_refresh_lock(db):
+            # Another worker is mid-refresh; its result is just as fresh.
+            db.rollback()
+            return None
+        rankings = {
+            KIND_TRENDING: _compute_trending(db, now),
+            KIND_TOP_TAGS: _compute_top_tags(db),
+        }
+        # Upsert by (kind, rank) and trim the tail instead of delete + insert, so
+        # two refreshes that do overlap (SQLite, no advisory lock) cannot collide
+        # on the primary key.
+        upsert_counters(
+            db,
+            models.PublicRanking,
+            [
+                {"kind": kind, "rank": idx, "itemId": item_id, "score": score, "computedAt": computed_at}
+                for kind, items in rankings.items()
+                for idx, (item_id, score) in enumerate(items, start=1)
+            ],
+            key_columns=["kind", "rank"],
+            counter_columns=[],
+        )
+        for kind, items in rankings.items():
+            db.query(models.PublicRanking).filter(
+                models.PublicRanking.kind == kind,
+                models.PublicRanking.rank > len(items),
+            ).delete(synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Ranking refresh failed: {e}")
+        return None
+    return {"computedAt": computed_at, **{kind: len(items) for kind, items in rankings.items()}}
+
+
+def get_public_ranking(db: Session, kind: str, limit: int = 10) -> List[str]:
+    rows = (
+        db.query(models.PublicRanking.itemId)
+        .filter(models.PublicRanking.kind == kind)
+        .order_by(models.PublicRanking.rank.asc())
+        .limit(limit)
+        .all()
+    )
+    return [row[0] for row in rows]
+
+
+def get_trending_script_ids(db: Session, limit: int = 20) -> List[str]:
+    return get_public_ranking(db, KIND_TRENDING, limit)
+
+
+def get_trending_public_scripts(db: Session, limit: int = 20):
+    ids = get_trending_script_ids(db, limit)
+    if not ids:
+        return []
+    scripts = (
+        db.query(models.Script)
+        .options(
+            orm.joinedload(models.Script.owner),
+            orm.joinedload(models.Script.tags),
+            orm.joinedload(models.Script.organization),
+            orm.joinedload(models.Script.persona),
+            orm.joinedload(models.Script.series),
+            orm.defer(models.Script.content),
+        )
+        .filter(models.Script.id.in_(ids), models.Script.isPublic == 1)
+        .all()
+    )
+    by_id = {s.id: s for s in scripts}
+    ranked = [by_id[i] for i in ids if i in by_id]
+    _normalize_personas_for_public(db, ranked)
+    return ranked
+
+
+def get_top_tag_names(db: Session, limit: int = 5) -> List[str]:
+    return get_public_ranking(db, KIND_TOP_TAGS, limit)
+
+
+def get_rankings_computed_at(db: Session) -> Optional[int]:
+    return db.query(func.max(models.PublicRanking.computedAt)).scalar()
+
+
+def refresh_public_rankings_if_stale(max_age_seconds: int = PUBLIC_RANKING_REFRESH_SECONDS):
+    # Every worker runs this; whoever finds the table stale recomputes it, so N
+    # workers still refresh roughly once per period.
+    db = database.SessionLocal()
+    try:
+        computed_at = get_rankings_computed_at(db)
+        if computed_at and time.time() * 1000 - computed_at < max_age_seconds * 1000:
+            return None
+        return refresh_public_rankings(db)
+    finally:
+        db.close()
+
+
+def _refresh_loop():
+    while True:
+        try:
+            refresh_public_rankings_if_stale()
+        except Exception as e:
+            print(f"Ranking refresher error: {e}")
+        time.sleep(PUBLIC_RANKING_REFRESH_SECONDS)
+
+
+_refresher_thread: Optional[threading.Thread] = None
+
+
+def start_ranking_refresher():
+    global _refresher_thread
+    if PUBLIC_RANKING_REFRESH_SECONDS <= 0 or _refresher_thread is not None:
+        return
+    _refresher_thread = threading.Thread(target=_refresh_loop, name="ranking-refresher", daemon=True)
+    _refresher_thread.start()
+
+
+__all__ = [
+    "refresh_public_rankings",
+    "refresh_public_rankings_if_stale",
+    "get_public_ranking",
+    "get_trending_script_ids",
+    "get_trending_public_scripts",
+    "get_top_tag_names",
+    "get_rankings_computed_at",
+    "start_ranking_refresher",
+]
@@ -0,0 +1,111 @@
+import time
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy.orm import Session
+
+import models
+from services.hyperloglog import HyperLogLog, hash_visitor
+from .common import _day_range, insert_ignore_rows, utc_day
+
+_SKETCH_CHUNK = 500
+
+
+def add_script_readers(db: Session, day: str, readers: Dict[str, Iterable[int]]):
+    # Merges hashed visitor ids into each script's sketch for `day`. Missing
+    # rows are created empty with INSERT ... ON CONFLICT DO NOTHING first, so
+    # a concurrent first reader never fails on the primary key; the merge then
+    # runs under the row lock (Postgres) or the write lock the insert already
+    # took (SQLite).
+    now = int(time.time() * 1000)
+    ids = [script_id for script_id, hashes in readers.items() if hashes]
+    empty = HyperLogLog().to_bytes()
+    for start in range(0, len(ids), _SKETCH_CHUNK):
+        chunk = ids[start:start + _SKETCH_CHUNK]
+        insert_ignore_rows(
+            db,
+            models.ScriptReaderSketch,
+            [{"scriptId": script_id, "day": day, "registers": empty, "updatedAt": now} for script_id in chunk],
+        )
+        rows = {
+            row.scriptId: row
+            for row in db.query(models.ScriptReaderSketch)
+            .filter(models.ScriptReaderSketch.scriptId.in_(chunk), models.ScriptReaderSketch.day == day)
+            .with_for_update()
+            .populate_existing()
+            .all()
+        }
+        for script_id in chunk:
+            row = rows[script_id]
+            sketch = HyperLogLog.from_bytes(row.registers)
+            sketch.update(readers[script_id])
+            row.registers = sketch.to_bytes()
+            row.updatedAt = now
+    db.flush()
+
+
+def record_script_readers(db: Session, script_id: str, visitor_keys: Iterable[str], day: Optional[str] = None):
+    hashes = {hash_visitor(key) for key in visitor_keys if key}
+    if hashes:
+        add_script_readers(db, day or utc_day(), {script_id: hashes})
+
+
+def _unique_readers(db: Session, script_ids_query, days: int):
+    # Sketches merge by register-wise max, so a visitor seen on several days or
+    # several scripts of the same persona/org is still counted once.
+    day_keys = _day_range(days)
+    rows = (
+        db.query(models.ScriptReaderSketch.day, models.ScriptReaderSketch.registers)
+        .filter(
+            models.ScriptReaderSketch.scriptId.in_(script_ids_query),
+            models.ScriptReaderSketch.day >= day_keys[0],
+        )
+        .yield_per(_SKETCH_CHUNK)
+    )
+    per_day: Dict[str, HyperLogLog] = {}
+    for day, registers in rows:
+        sketch = HyperLogLog.from_bytes(registers)
+        if day in per_day:
+            per_day[day].merge(sketch)
+        else:
+            per_day[day] = sketch
+    total = HyperLogLog()
+    for sketch in per_day.values():
+        total.merge(sketch)
+    return {
+        "uniqueReaders": total.count(),
+        "days": [
+            {"day": day, "uniqueReaders": per_day[day].count() if day in per_day else 0}
+            for day in day_keys
+        ],
+    }
+
+
+def get_script_readers(db: Session, script_id: str, ownerId: str, days: int = 30):
+    owned = db.query(models.Script.id).filter(models.Script.id == script_id, models.Script.ownerId == ownerId).first()
+    if not owned:
+        return None
+    ids = db.query(models.Script.id).filter(models.Script.id == script_id)
+    return {"scope": "script", "id": script_id, **_unique_readers(db, ids, days)}
+
+
+def get_persona_readers(db: Session, persona_id: str, ownerId: str, days: int = 30):
+    owned = db.query(models.Persona.id).filter(models.Persona.id == persona_id, models.Persona.ownerId == ownerId).first()
+    if not owned:
+        return None
+    ids = db.query(models.Script.id).filter(models.Script.personaId == persona_id)
+    return {"scope": "persona", "id": persona_id, **_unique_readers(db, ids, days)}
+
+
+def get_organization_readers(db: Session, org_id: str, days: int = 30):
+    # Access is checked by the router (members and persona members may read).
+    ids = db.query(models.Script.id).filter(models.Script.organizationId == org_id)
+    return {"scope": "organization", "id": org_id, **_unique_readers(db, ids, days)}
+
+
+__all__ = [
+    "add_script_readers",
+    "record_script_readers",
+    "get_script_readers",
+    "get_persona_readers",
+    "get_organization_readers",
+]
@@ -0,0 +1,254 @@
+import difflib
+import json
+import os
+import time
+import zlib
+from typing import List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+import models
+
+# Every Nth revision (and the first one we ever record for a script) is stored as
+# a full compressed snapshot; everything in between is a compressed line delta
+# against the previous revision. Reconstruction therefore replays at most N-1 deltas.
+SNAPSHOT_INTERVAL = max(1, int(os.getenv("SCRIPT_REVISION_SNAPSHOT_INTERVAL", "20")))
+# History keeps roughly the last REVISION_RETENTION revisions. Pruning runs
+# whenever a snapshot is written and cuts at the newest snapshot old enough to
+# fall outside the window, so every retained delta still has its base.
+REVISION_RETENTION = max(
+    SNAPSHOT_INTERVAL, int(os.getenv("SCRIPT_REVISION_RETENTION", "100"))
+)
+KIND_SNAPSHOT = "snapshot"
+KIND_DELTA = "delta"
+
+
+def _compress(payload: str) -> bytes:
+    return zlib.compress(payload.encode("utf-8"), 6)
+
+
+def _decompress(blob: bytes) -> str:
+    return zlib.decompress(blob).decode("utf-8")
+
+
+def _encode_delta(old: str, new: str) -> str:
+    old_lines = old.splitlines(keepends=True)
+    new_lines = new.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    ops = [
+        [i1, i2, new_lines[j1:j2]]
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+    return json.dumps(ops, ensure_ascii=False, separators=(",", ":"))
+
+
+def _apply_delta(old: str, delta: str) -> str:
+    old_lines = old.splitlines(keepends=True)
+    out = []
+    cursor = 0
+    for i1, i2, lines in json.loads(delta):
+        out.extend(old_lines[cursor:i1])
+        out.extend(lines)
+        cursor = i2
+    out.extend(old_lines[cursor:])
+    return "".join(out)
+
+
+def record_script_revision(
+    db: Session,
+    script_id: str,
+    revision: int,
+    content: str,
+    previous_content: Optional[str] = None,
+    author_id: Optional[str] = None,
+):
+    content = content or ""
+    latest = (
+        db.query(func.max(models.ScriptRevision.revision))
+        .filter(models.ScriptRevision.scriptId == script_id)
+        .scalar()
+    )
+    last_snapshot = (
+        db.query(func.max(models.ScriptRevision.revision))
+        .filter(
+            models.ScriptRevision.scriptId == script_id,
+            models.ScriptRevision.kind == KIND_SNAPSHOT,
+        )
+        .scalar()
+    )
+    can_delta = (
+        previous_content is not None
+        and latest is not None
+        and latest == revision - 1
+        and last_snapshot is not None
+        and revision - last_snapshot < SNAPSHOT_INTERVAL
+    )
+    if can_delta:
+        kind = KIND_DELTA
+        payload = _compress(_encode_delta(previous_content or "", content))
+    else:
+        kind = KIND_SNAPSHOT
+        payload = _compress(content)
+
+    row = models.ScriptRevision(
+        scriptId=script_id,
+        revision=revision,
+        kind=kind,
+        payload=payload,
+        contentLength=len(content),
+        authorId=author_id,
+        createdAt=int(time.time() * 1000),
+    )
+    db.add(row)
+    if kind == KIND_SNAPSHOT:
+        prune_script_revisions(db, script_id, revision)
+    return row
+
+
+def prune_script_revisions(db: Session, script_id: str, latest_revision: int) -> int:
+    cutoff = latest_revision - max(REVISION_RETENTION, SNAPSHOT_INTERVAL) + 1
+    if cutoff <= 0:
+        return 0
+    base = (
+        db.query(func.max(models.ScriptRevision.revision))
+        .filter(
+            models.ScriptRevision.scriptId == script_id,
+            models.ScriptRevision.kind == KIND_SNAPSHOT,
+            models.ScriptRevision.revision <= cutoff,
+        )
+        .scalar()
+    )
+    if base is None:
+        return 0
+    return (
+        db.query(models.ScriptRevision)
+        .filter(
+            models.ScriptRevision.scriptId == script_id,
+            models.ScriptRevision.revision < base,
+        )
+        .delete(synchronize_session=False)
+    )
+
+
+def build_snapshot_revision(script_id: str, revision: int, content: str, author_id: Optional[str] = None):
+    # For brand-new scripts there is nothing to diff against; skips the lookups above.
+    content = content or ""
+    return models.ScriptRevision(
+        scriptId=script_id,
+        revision=revision,
+        kind=KIND_SNAPSHOT,
+        payload=_compress(content),
+        contentLength=len(content),
+        authorId=author_id,
+        createdAt=int(time.time() * 1000),
+    )
+
+
+def _owned_script(db: Session, script_id: str, ownerId: str):
+    return (
+        db.query(models.Script.id)
+        .filter(models.Script.id == script_id, models.Script.ownerId == ownerId)
+        .first()
+    )
+
+
+def list_script_revisions(db: Session, script_id: str, ownerId: str):
+    if not _owned_script(db, script_id, ownerId):
+        return None
+    rows = (
+        db.query(
+            models.ScriptRevision.revision,
+            models.ScriptRevision.kind,
+            models.ScriptRevision.contentLength,
+            func.length(models.ScriptRevision.payload).label("storedBytes"),
+            models.ScriptRevision.authorId,
+            models.ScriptRevision.createdAt,
+        )
+        .filter(models.ScriptRevision.scriptId == script_id)
+        .order_by(models.ScriptRevision.revision.desc())
+        .all()
+    )
+    return [dict(row._mapping) for row in rows]
+
+
+def reconstruct_revision(db: Session, script_id: str, revision: int):
+    base = (
+        db.query(func.max(models.ScriptRevision.revision))
+        .filter(
+            models.ScriptRevision.scriptId == script_id,
+            models.ScriptRevision.kind == KIND_SNAPSHOT,
+            models.ScriptRevision.revision <= revision,
+        )
+        .scalar()
+    )
+    if base is None:
+        return None
+    rows: List[models.ScriptRevision] = (
+        db.query(models.ScriptRevision)
+        .filter(
+            models.ScriptRevision.scriptId == script_id,
+            models.ScriptRevision.revision >= base,
+            models.ScriptRevision.revision <= revision,
+        )
+        .order_by(models.ScriptRevision.revision.asc())
+        .all()
+    )
+    if not rows or rows[-1].revision != revision:
+        return None
+
+    content = ""
+    expected = base
+    for row in rows:
+        if row.revision != expected:
+            # A gap in the chain means the delta base is missing.
+            return None
+        if row.kind == KIND_SNAPSHOT:
+            content = _decompress(row.payload)
+        else:
+            content = _apply_delta(content, _decompress(row.payload))
+        expected += 1
+    return {"revision": revision, "content": content, "createdAt": rows[-1].createdAt}
+
+
+def get_script_revision(db: Session, script_id: str, revision: int, ownerId: str):
+    if not _owned_script(db, script_id, ownerId):
+        return None
+    return reconstruct_revision(db, script_id, revision)
+
+
+def diff_script_revisions(db: Session, script_id: str, from_revision: int, to_revision: int, ownerId: str):
+    if not _owned_script(db, script_id, ownerId):
+        return None
+    old = reconstruct_revision(db, script_id, from_revision)
+    new = reconstruct_revision(db, script_id, to_revision)
+    if old is None or new is None:
+        return None
+    diff = difflib.unified_diff(
+        old["content"].splitlines(keepends=True),
+        new["content"].splitlines(keepends=True),
+        fromfile=f"r{from_revision}",
+        tofile=f"r{to_revision}",
+    )
+    return {"fromRevision": from_revision, "toRevision": to_revision, "diff": "".join(diff)}
+
+
+def delete_script_revisions(db: Session, script_ids):
+    if not script_ids:
+        return
+    db.query(models.ScriptRevision).filter(
+        models.ScriptRevision.scriptId.in_(script_ids)
+    ).delete(synchronize_session=False)
+
+
+__all__ = [
+    "record_script_revision",
+    "build_snapshot_revision",
+    "prune_script_revisions",
+    "list_script_revisions",
+    "reconstruct_revision",
+    "get_script_revision",
+    "diff_script_revisions",
+    "delete_script_revisions",
+]
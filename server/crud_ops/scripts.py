@@ -6,10 +6,16 @@ __all__ = [
     "get_script",
     "get_public_scripts",
     "search_scripts",
+    "get_liked_script_ids",
     "create_script",
+    "import_scripts",
     "update_script",
+    "patch_script_content",
     "delete_script",
     "reorder_scripts",
+    "move_script",
+    "rebalance_folder_order",
     "increment_script_view",
     "toggle_script_like",
+    "RevisionConflict",
 ]
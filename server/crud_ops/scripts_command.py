@@ -1,19 +1,40 @@
-from typing import List
+from typing import Dict, List, Optional
 import time
 import uuid
 
-from sqlalchemy import or_
+from sqlalchemy import case, func, literal, or_, select, tuple_
 from sqlalchemy.orm import Session
 
 import models
 import schemas
-from .common import touch_parent_folders
+from content_storage import content_stats, content_summary
+from .common import ensure_folders_for_owner, insert_ignore, touch_parent_folders
+from .engagement import bump_daily_stats, record_script_view, utc_day
+from .revisions import build_snapshot_revision, delete_script_revisions, record_script_revision
+from .sync import record_script_tombstones
+from .tags import refresh_tag_usage, tag_ids_for_scripts
 from .scripts_query import get_script
 
 VALID_COMMERCIAL = {"allow", "disallow"}
 VALID_DERIVATIVE = {"allow", "disallow", "limited"}
 VALID_NOTIFY = {"required", "not_required"}
 
+# sortOrder is a fractional rank: a move takes the midpoint between its new
+# neighbours, so only the moved row is written. When repeated moves into the
+# same gap collapse it below MIN_RANK_GAP the folder is renumbered once.
+RANK_STEP = 1000.0
+MIN_RANK_GAP = 1e-6
+IMPORT_BATCH_SIZE = 500
+# A full-content PUT is last-writer-wins, but the revision bump is still a
+# compare-and-set; on a lost race it re-reads the row and tries again.
+REVISION_CLAIM_ATTEMPTS = 3
+
+
+class RevisionConflict(Exception):
+    def __init__(self, revision: int):
+        super().__init__(f"revision conflict at {revision}")
+        self.revision = revision
+
 
 def _norm_key(key: str) -> str:
     return str(key or "").strip().lower().replace(" ", "")
@@ -76,6 +97,53 @@ def _folder_descendants_filter(folder_path: str):
     )
 
 
+def _next_rank(db: Session, ownerId: str, folder: str) -> float:
+    max_order = (
+        db.query(func.max(models.Script.sortOrder))
+        .filter(models.Script.ownerId == ownerId, models.Script.folder == folder)
+        .scalar()
+    )
+    return max_order + RANK_STEP if max_order is not None else 0.0
+
+
+def _rank_between(lower: Optional[float], upper: Optional[float]) -> float:
+    if lower is None and upper is None:
+        return 0.0
+    if lower is None:
+        return upper - RANK_STEP
+    if upper is None:
+        return lower + RANK_STEP
+    return (lower + upper) / 2.0
+
+
+def _bulk_update_sort_order(db: Session, ownerId: str, orders: Dict[str, float]):
+    if not orders:
+        return 0
+    # One UPDATE ... SET sortOrder = CASE id WHEN ... END for the whole batch.
+    return db.query(models.Script).filter(
+        models.Script.ownerId == ownerId,
+        models.Script.id.in_(list(orders.keys())),
+    ).update(
+        {
+            models.Script.sortOrder: case(orders, value=models.Script.id, else_=models.Script.sortOrder),
+            models.Script.changedAt: int(time.time() * 1000),
+        },
+        synchronize_session=False,
+    )
+
+
+def rebalance_folder_order(db: Session, ownerId: str, folder: str):
+    rows = (
+        db.query(models.Script.id)
+        .filter(models.Script.ownerId == ownerId, models.Script.folder == folder)
+        .order_by(models.Script.sortOrder.asc(), models.Script.lastModified.desc())
+        .all()
+    )
+    orders = {row[0]: idx * RANK_STEP for idx, row in enumerate(rows)}
+    _bulk_update_sort_order(db, ownerId, orders)
+    return orders
+
+
 def create_script(db: Session, script: schemas.ScriptCreate, ownerId: str):
     seed_license = {
         "licenseCommercial": _norm_choice(script.licenseCommercial, VALID_COMMERCIAL),
@@ -124,24 +192,87 @@ def create_script(db: Session, script: schemas.ScriptCreate, ownerId: str):
         licenseDerivative=seed_license.get("licenseDerivative", ""),
         licenseNotify=seed_license.get("licenseNotify", ""),
     )
-    max_order = (
-        db.query(models.Script)
-        .filter(models.Script.ownerId == ownerId, models.Script.folder == script.folder)
-        .order_by(models.Script.sortOrder.desc())
-        .first()
-    )
-    db_script.sortOrder = max_order.sortOrder + 1000.0 if max_order else 0.0
+    db_script.sortOrder = _next_rank(db, ownerId, db_script.folder)
 
     db.add(db_script)
     db.commit()
     db.refresh(db_script)
 
+    if db_script.type != "folder":
+        record_script_revision(db, db_script.id, db_script.revision or 0, db_script.content, author_id=ownerId)
     touch_parent_folders(db, db_script.folder, ownerId, int(time.time() * 1000))
     db.commit()
 
     return db_script
 
 
+def import_scripts(db: Session, ownerId: str, files: List[Dict[str, str]]):
+    # files: [{"path", "folder", "title", "content"}]. Everything lands in one
+    # transaction; the caller gets one result per file, in input order.
+    if not files:
+        return []
+    folders = {f["folder"] for f in files}
+    ensure_folders_for_owner(db, ownerId, list(folders))
+    db.flush()
+    next_rank = {
+        folder: (max_order + RANK_STEP if max_order is not None else 0.0)
+        for folder, max_order in db.query(models.Script.folder, func.max(models.Script.sortOrder))
+        .filter(models.Script.ownerId == ownerId, models.Script.folder.in_(folders))
+        .group_by(models.Script.folder)
+        .all()
+    }
+
+    now = int(time.time() * 1000)
+    results = []
+    new_scripts = []
+    for item in files:
+        folder = item["folder"]
+        rank = next_rank.get(folder, 0.0)
+        next_rank[folder] = rank + RANK_STEP
+        db_script = models.Script(
+            id=str(uuid.uuid4()),
+            ownerId=ownerId,
+            title=item["title"] or "Untitled",
+            content=item["content"] or "",
+            customMetadata=[],
+            type="script",
+            folder=folder,
+            sortOrder=rank,
+            createdAt=now,
+            lastModified=now,
+            changedAt=now,
+        )
+        new_scripts.append(db_script)
+        results.append({"path": item["path"], "status": "imported", "id": db_script.id, "title": db_script.title, "folder": folder})
+
+    try:
+        for start in range(0, len(new_scripts), IMPORT_BATCH_SIZE):
+            batch = new_scripts[start:start + IMPORT_BATCH_SIZE]
+            db.add_all(batch)
+            db.flush()
+            db.add_all([build_snapshot_revision(s.id, 0, s.content, author_id=ownerId) for s in batch])
+            db.flush()
+        # touch_parent_folders per folder would re-evaluate every pending object in
+        # the session; bump all ancestor folders with one statement instead.
+        ancestors = set()
+        for folder in folders:
+            parts = [p for p in folder.strip("/").split("/") if p]
+            for depth in range(len(parts)):
+                ancestors.add(("/" + "/".join(parts[:depth]), parts[depth]))
+        if ancestors:
+            db.query(models.Script).filter(
+                models.Script.ownerId == ownerId,
+                models.Script.type == "folder",
+                tuple_(models.Script.folder, models.Script.title).in_(list(ancestors)),
+            ).update({"lastModified": now, "changedAt": now}, synchronize_session=False)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Script import failed: {e}")
+        return None
+    return results
+
+
 def update_script(db: Session, script_id: str, script: schemas.ScriptUpdate, ownerId: str):
     db_script = get_script(db, script_id, ownerId)
     if not db_script:
@@ -172,6 +303,20 @@ def update_script(db: Session, script_id: str, script: schemas.ScriptUpdate, own
                 update_data["seriesOrder"] = None
         else:
             update_data["seriesOrder"] = None
+    if "content" in update_data and (update_data["content"] or "") != (db_script.content or ""):
+        new_revision = _claim_next_revision(db, db_script)
+        if new_revision is None:
+            db.rollback()
+            raise RevisionConflict(db_script.revision or 0)
+        db_script.revision = new_revision
+        record_script_revision(
+            db,
+            db_script.id,
+            new_revision,
+            update_data["content"] or "",
+            previous_content=db_script.content or "",
+            author_id=ownerId,
+        )
     for key, value in update_data.items():
         if key == "isPublic":
             setattr(db_script, key, 1 if value else 0)
@@ -184,30 +329,141 @@ def update_script(db: Session, script_id: str, script: schemas.ScriptUpdate, own
     return db_script
 
 
+def _claim_next_revision(db: Session, db_script: models.Script) -> Optional[int]:
+    # Same compare-and-set as patch_script_content, so concurrent writers never
+    # record two history rows for one revision number.
+    for _ in range(REVISION_CLAIM_ATTEMPTS):
+        current = db_script.revision or 0
+        claimed = db.query(models.Script).filter(
+            models.Script.id == db_script.id,
+            func.coalesce(models.Script.revision, 0) == current,
+        ).update({models.Script.revision: current + 1}, synchronize_session=False)
+        if claimed:
+            return current + 1
+        # Lost the race: reload the committed revision and content (the diff
+        # base for the history row) and try again.
+        db.refresh(db_script, attribute_names=["revision", "content"])
+    return None
+
+
+def _apply_text_edits(content: str, edits: List[schemas.ScriptTextEdit]):
+    # All edits are offsets into the same base text, in UTF-16 code units as the
+    # editor counts them, so the splice runs on the UTF-16 encoding. None means
+    # out of range, overlapping, or a result with a split surrogate pair.
+    base = content.encode("utf-16-le")
+    units = len(base) // 2
+    ordered = sorted(edits, key=lambda e: (e.start, e.end))
+    pieces = []
+    cursor = 0
+    try:
+        for edit in ordered:
+            if edit.start < cursor or edit.end < edit.start or edit.end > units:
+                return None
+            pieces.append(base[cursor * 2:edit.start * 2])
+            pieces.append((edit.text or "").encode("utf-16-le", "surrogatepass"))
+            cursor = edit.end
+        pieces.append(base[cursor * 2:])
+        return b"".join(pieces).decode("utf-16-le")
+    except UnicodeError:
+        return None
+
+
+def patch_script_content(db: Session, script_id: str, patch: schemas.ScriptContentPatch, ownerId: str):
+    # Returns (status, script); status is "ok", "conflict", "invalid" or "not_found".
+    db_script = get_script(db, script_id, ownerId)
+    if not db_script or db_script.type == "folder":
+        return "not_found", None
+
+    current_revision = db_script.revision or 0
+    if patch.baseRevision != current_revision:
+        return "conflict", db_script
+
+    if not patch.edits:
+        return "ok", db_script
+
+    new_content = _apply_text_edits(db_script.content or "", patch.edits)
+    if new_content is None:
+        return "invalid", db_script
+
+    now = int(time.time() * 1000)
+    content_length, content_hash = content_stats(new_content)
+    excerpt, duration = content_summary(new_content)
+    # Compare-and-set on revision so two concurrent patches against the same
+    # base cannot both win.
+    updated = db.query(models.Script).filter(
+        models.Script.id == db_script.id,
+        models.Script.revision == db_script.revision,
+    ).update(
+        {
+            models.Script.content: new_content,
+            models.Script.contentLength: content_length,
+            models.Script.contentHash: content_hash,
+            models.Script.excerpt: excerpt,
+            models.Script.durationMinutes: duration,
+            models.Script.revision: current_revision + 1,
+            models.Script.lastModified: now,
+            models.Script.changedAt: now,
+        },
+        synchronize_session=False,
+    )
+    if not updated:
+        db.rollback()
+        db.refresh(db_script)
+        return "conflict", db_script
+
+    record_script_revision(
+        db,
+        db_script.id,
+        current_revision + 1,
+        new_content,
+        previous_content=db_script.content or "",
+        author_id=ownerId,
+    )
+    touch_parent_folders(db, db_script.folder, ownerId, now)
+    db.commit()
+    db.refresh(db_script)
+    return "ok", db_script
+
+
 def delete_script(db: Session, script_id: str, ownerId: str):
     db_script = get_script(db, script_id, ownerId)
     if not db_script:
         return False
 
+    removed = {db_script.id: db_script.type}
     if db_script.type == "folder":
         folder_path = f"{db_script.folder}/{db_script.title}" if db_script.folder != "/" else f"/{db_script.title}"
-        db.query(models.Script).filter(
+        descendants = db.query(models.Script).filter(
             models.Script.ownerId == ownerId,
             _folder_descendants_filter(folder_path),
-        ).delete(synchronize_session=False)
-
+        )
+        removed.update(descendants.with_entities(models.Script.id, models.Script.type).all())
+    # Collected before the rows go so the tags' usage counts can be recounted.
+    affected_tags = tag_ids_for_scripts(db, removed)
+    db.query(models.ScriptTag).filter(
+        models.ScriptTag.scriptId.in_(list(removed))
+    ).delete(synchronize_session=False)
+    if db_script.type == "folder":
+        descendants.delete(synchronize_session=False)
+
+    delete_script_revisions(db, list(removed))
+    db.query(models.ScriptDailyStat).filter(
+        models.ScriptDailyStat.scriptId.in_(list(removed))
+    ).delete(synchronize_session=False)
+    db.query(models.ScriptReaderSketch).filter(
+        models.ScriptReaderSketch.scriptId.in_(list(removed))
+    ).delete(synchronize_session=False)
+    record_script_tombstones(db, ownerId, removed)
     db.delete(db_script)
+    db.flush()
+    refresh_tag_usage(db, affected_tags)
     db.commit()
     return True
 
 
 def reorder_scripts(db: Session, updates: List[schemas.ScriptReorderItem], ownerId: str):
     try:
-        for item in updates:
-            db.query(models.Script).filter(
-                models.Script.id == item.id,
-                models.Script.ownerId == ownerId,
-            ).update({"sortOrder": item.sortOrder})
+        _bulk_update_sort_order(db, ownerId, {item.id: item.sortOrder for item in updates})
         db.commit()
         return True
     except Exception as e:
@@ -216,40 +472,118 @@ def reorder_scripts(db: Session, updates: List[schemas.ScriptReorderItem], owner
         return False
 
 
-def increment_script_view(db: Session, script_id: str):
-    db.query(models.Script).filter(models.Script.id == script_id).update({models.Script.views: models.Script.views + 1})
+def _adjacent_sibling(db: Session, db_script, lower_id: Optional[str], upper_id: Optional[str], ranks: Dict[str, float]):
+    query = db.query(models.Script.id, models.Script.sortOrder).filter(
+        models.Script.ownerId == db_script.ownerId,
+        models.Script.folder == db_script.folder,
+        models.Script.id != db_script.id,
+    )
+    if lower_id:
+        row = query.filter(models.Script.sortOrder > ranks[lower_id]).order_by(models.Script.sortOrder.asc()).first()
+    else:
+        row = query.filter(models.Script.sortOrder < ranks[upper_id]).order_by(models.Script.sortOrder.desc()).first()
+    if row is None:
+        # Really moving to the start or end of the folder.
+        return lower_id, upper_id
+    ranks[row[0]] = row[1]
+    return (lower_id, row[0]) if lower_id else (row[0], upper_id)
+
+
+def move_script(
+    db: Session,
+    script_id: str,
+    ownerId: str,
+    beforeId: Optional[str] = None,
+    afterId: Optional[str] = None,
+):
+    db_script = get_script(db, script_id, ownerId)
+    if not db_script:
+        return "not_found", None
+
+    neighbour_ids = [sid for sid in (beforeId, afterId) if sid]
+    if script_id in neighbour_ids:
+        return "invalid", db_script
+    ranks = {}
+    if neighbour_ids:
+        rows = (
+            db.query(models.Script.id, models.Script.sortOrder, models.Script.folder)
+            .filter(models.Script.ownerId == ownerId, models.Script.id.in_(neighbour_ids))
+            .all()
+        )
+        if len(rows) < len(set(neighbour_ids)):
+            return "neighbour_not_found", db_script
+        if any(row[2] != db_script.folder for row in rows):
+            return "invalid", db_script
+        ranks = {row[0]: row[1] for row in rows}
+    lower_id, upper_id = beforeId, afterId
+    if lower_id and upper_id and ranks[lower_id] > ranks[upper_id]:
+        lower_id, upper_id = upper_id, lower_id
+    if bool(lower_id) != bool(upper_id):
+        # With one neighbour, bisect towards the real sibling on the other side so
+        # the moved row cannot tie with or jump past it.
+        lower_id, upper_id = _adjacent_sibling(db, db_script, lower_id, upper_id, ranks)
+    lower = ranks.get(lower_id)
+    upper = ranks.get(upper_id)
+
+    if lower is not None and upper is not None and upper - lower < MIN_RANK_GAP:
+        orders = rebalance_folder_order(db, ownerId, db_script.folder)
+        lower = orders.get(lower_id, lower)
+        upper = orders.get(upper_id, upper)
+        if lower > upper:
+            lower, upper = upper, lower
+
+    db_script.sortOrder = _rank_between(lower, upper)
     db.commit()
+    return "ok", db_script
 
 
-def toggle_script_like(db: Session, script_id: str, user_id: str):
-    script = db.query(models.Script).filter(models.Script.id == script_id).first()
-    if not script:
-        return None
+def increment_script_view(db: Session, script_id: str, visitor_key: Optional[str] = None):
+    return record_script_view(db, script_id, visitor_key)
 
-    existing = (
-        db.query(models.ScriptLike)
-        .filter(models.ScriptLike.scriptId == script_id, models.ScriptLike.userId == user_id)
-        .first()
-    )
 
-    if existing:
-        db.delete(existing)
-        db.query(models.Script).filter(models.Script.id == script_id).update({models.Script.likes: models.Script.likes - 1})
+def toggle_script_like(db: Session, script_id: str, user_id: str):
+    # The counter only moves by the rows the DELETE / INSERT actually changed, so
+    # concurrent taps can race each other but never drift `likes`.
+    removed = db.query(models.ScriptLike).filter(
+        models.ScriptLike.scriptId == script_id,
+        models.ScriptLike.userId == user_id,
+    ).delete(synchronize_session=False)
+    if removed:
+        db.query(models.Script).filter(models.Script.id == script_id).update(
+            {models.Script.likes: models.Script.likes - removed}, synchronize_session=False
+        )
+        bump_daily_stats(db, utc_day(), "unlikes", {script_id: removed})
         db.commit()
         return False
 
-    like = models.ScriptLike(scriptId=script_id, userId=user_id)
-    db.add(like)
-    db.query(models.Script).filter(models.Script.id == script_id).update({models.Script.likes: models.Script.likes + 1})
-    db.commit()
+    # Inserting from the scripts table doubles as the existence check.
+    source = select(literal(user_id), models.Script.id, literal(int(time.time() * 1000))).where(models.Script.id == script_id)
+    added = insert_ignore(db, models.ScriptLike, ["userId", "scriptId", "createdAt"], source)
+    if added:
+        db.query(models.Script).filter(models.Script.id == script_id).update(
+            {models.Script.likes: models.Script.likes + added}, synchronize_session=False
+        )
+        bump_daily_stats(db, utc_day(), "likes", {script_id: added})
+        db.commit()
+        return True
+
+    # Nothing was written; either the script is missing or a concurrent request
+    # from the same user inserted the like first.
+    if not db.query(models.Script.id).filter(models.Script.id == script_id).first():
+        return None
     return True
 
 
 __all__ = [
     "create_script",
+    "import_scripts",
     "update_script",
+    "patch_script_content",
     "delete_script",
     "reorder_scripts",
+    "move_script",
+    "rebalance_folder_order",
     "increment_script_view",
     "toggle_script_like",
+    "RevisionConflict",
 ]
@@ -1,36 +1,36 @@
-from typing import Optional
+from typing import List, Optional, Set
 
-from sqlalchemy import func, or_, orm
+from sqlalchemy import and_, not_, or_, orm
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 
 import models
-from .common import _ensure_list
-from .organizations_query import get_persona_org_ids
+from content_storage import COMPRESSED_MARKER
+from .loaders import get_loaders
 
+SEARCH_COMPRESSED_BATCH = 100
 
-def _normalize_persona_for_public(db: Session, persona):
-    if not persona:
-        return
-    persona.tags = _ensure_list(persona.tags)
-    persona.organizationIds = get_persona_org_ids(db, persona)
-    persona.defaultLicenseSpecialTerms = _ensure_list(persona.defaultLicenseSpecialTerms)
+
+def _normalize_personas_for_public(db: Session, scripts):
+    # One batched lookup for every persona on the page. Set as committed state
+    # so read paths never leave the personas dirty (and autoflushed).
+    personas = {s.persona.id: s.persona for s in scripts if s.persona}
+    org_ids = get_loaders(db).persona_org_ids.load_many(personas)
+    for persona_id, persona in personas.items():
+        set_committed_value(persona, "organizationIds", list(org_ids[persona_id]))
 
 
 def get_scripts(db: Session, ownerId: str):
-    results = (
-        db.query(models.Script, func.length(models.Script.content).label("contentLength"))
-        .options(orm.defer(models.Script.content))
+    # contentLength is a stored column, so the body is never read for listings.
+    # Tags are joined in the same query instead of lazy-loaded per script.
+    return (
+        db.query(models.Script)
+        .options(orm.defer(models.Script.content), orm.joinedload(models.Script.tags))
         .filter(models.Script.ownerId == ownerId)
         .order_by(models.Script.sortOrder.asc(), models.Script.lastModified.desc())
         .all()
     )
 
-    out = []
-    for script, length in results:
-        script.contentLength = length or 0
-        out.append(script)
-    return out
-
 
 def get_script(db: Session, script_id: str, ownerId: str):
     return (
@@ -53,6 +53,8 @@ def get_public_scripts(
         orm.joinedload(models.Script.organization),
         orm.joinedload(models.Script.persona),
         orm.joinedload(models.Script.series),
+        # Listings never ship the body; excerpt/contentLength/durationMinutes are stored.
+        orm.defer(models.Script.content),
     ).filter(models.Script.isPublic == 1)
 
     if personaId:
@@ -92,6 +94,7 @@ def get_public_scripts(
                 orm.joinedload(models.Script.organization),
                 orm.joinedload(models.Script.persona),
                 orm.joinedload(models.Script.series),
+                orm.defer(models.Script.content),
             ).filter(models.Script.ownerId == ownerId, models.Script.folder == folder)
             if personaId:
                 inherited_q = inherited_q.filter(models.Script.personaId == personaId)
@@ -104,23 +107,19 @@ def get_public_scripts(
                 models.Script.folder == folder,
             ).order_by(models.Script.sortOrder.asc(), models.Script.title.asc()).all()
 
-        for s in results:
-            if s.persona:
-                _normalize_persona_for_public(db, s.persona)
-            if s.organization:
-                s.organization.tags = _ensure_list(s.organization.tags)
+        _normalize_personas_for_public(db, results)
         return results
 
     if ownerId and folder is None:
         results = base_q.filter(models.Script.ownerId == ownerId).order_by(models.Script.lastModified.desc()).all()
-        for s in results:
-            if s.persona:
-                _normalize_persona_for_public(db, s.persona)
-            if s.organization:
-                s.organization.tags = _ensure_list(s.organization.tags)
+        _normalize_personas_for_public(db, results)
         return results
 
-    pub_folders = db.query(models.Script).filter(models.Script.isPublic == 1, models.Script.type == "folder").all()
+    pub_folders = (
+        db.query(models.Script.ownerId, models.Script.folder, models.Script.title)
+        .filter(models.Script.isPublic == 1, models.Script.type == "folder")
+        .all()
+    )
     public_paths = set()
     for f in pub_folders:
         path = (f.folder if f.folder != "/" else "") + "/" + f.title
@@ -133,29 +132,73 @@ def get_public_scripts(
         if (s.ownerId, s.folder) in public_paths:
             continue
 
-        if s.persona:
-            _normalize_persona_for_public(db, s.persona)
-        if s.organization:
-            s.organization.tags = _ensure_list(s.organization.tags)
-
         results.append(s)
         if len(results) >= 50:
             break
 
+    _normalize_personas_for_public(db, results)
     return results
 
 
-def search_scripts(db: Session, query: str, ownerId: str):
+def get_liked_script_ids(db: Session, user_id: str, script_ids: List[str]) -> Set[str]:
+    # One lookup on the (userId, scriptId) primary key for a whole page of scripts.
+    if not user_id or not script_ids:
+        return set()
+    rows = db.query(models.ScriptLike.scriptId).filter(
+        models.ScriptLike.userId == user_id,
+        models.ScriptLike.scriptId.in_(list(set(script_ids))),
+    )
+    return {row[0] for row in rows}
+
+
+def search_scripts(db: Session, query: str, ownerId: str, limit: int = 20):
     search = f"%{query}%"
-    return (
+    compressed = models.Script.content.like(f"{COMPRESSED_MARKER}%")
+    results = (
         db.query(models.Script)
         .filter(
             models.Script.ownerId == ownerId,
-            or_(models.Script.title.like(search), models.Script.content.like(search)),
+            # Case-insensitive, like the in-Python match on compressed bodies below.
+            or_(
+                models.Script.title.ilike(search),
+                and_(models.Script.content.ilike(search), not_(compressed)),
+            ),
         )
-        .limit(20)
+        .limit(limit)
         .all()
     )
+    if len(results) >= limit:
+        return results
+
+    # Compressed bodies cannot be matched with LIKE. Decode them in keyset-paged
+    # batches of (id, content) only, and stop as soon as the page is full.
+    seen = {script.id for script in results}
+    needle = (query or "").lower()
+    matched_ids = []
+    last_id = None
+    while len(seen) + len(matched_ids) < limit:
+        batch_q = db.query(models.Script.id, models.Script.content).filter(
+            models.Script.ownerId == ownerId,
+            compressed,
+        )
+        if last_id is not None:
+            batch_q = batch_q.filter(models.Script.id > last_id)
+        batch = batch_q.order_by(models.Script.id.asc()).limit(SEARCH_COMPRESSED_BATCH).all()
+        for script_id, content in batch:
+            if script_id not in seen and needle in (content or "").lower():
+                matched_ids.append(script_id)
+                if len(seen) + len(matched_ids) >= limit:
+                    break
+        if len(batch) < SEARCH_COMPRESSED_BATCH:
+            break
+        last_id = batch[-1][0]
+    if matched_ids:
+        by_id = {
+            script.id: script
+            for script in db.query(models.Script).filter(models.Script.id.in_(matched_ids))
+        }
+        results.extend(by_id[script_id] for script_id in matched_ids if script_id in by_id)
+    return results
 
 
 __all__ = [
@@ -163,4 +206,5 @@ __all__ = [
     "get_script",
     "get_public_scripts",
     "search_scripts",
+    "get_liked_script_ids",
 ]
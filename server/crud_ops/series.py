@@ -98,7 +98,7 @@ def delete_series(db: Session, series_id: str, owner_id: str):
     if not db_series:
         return False
     db.query(models.Script).filter(models.Script.seriesId == db_series.id, models.Script.ownerId == owner_id).update(
-        {models.Script.seriesId: None, models.Script.seriesOrder: None},
+        {models.Script.seriesId: None, models.Script.seriesOrder: None, models.Script.changedAt: int(time.time() * 1000)},
         synchronize_session=False,
     )
     db.delete(db_series)
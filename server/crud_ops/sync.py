@@ -0,0 +1,73 @@
+import os
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import orm
+from sqlalchemy.orm import Session
+
+import models
+
+TOMBSTONE_RETENTION_MS = int(os.getenv("SCRIPT_TOMBSTONE_RETENTION_DAYS", "30")) * 24 * 60 * 60 * 1000
+# Rows are stamped with the writer's clock before commit, so a cursor taken while a
+# write is in flight can be slightly ahead of it. Re-sending a short window keeps the
+# feed gap-free; clients apply upserts/deletes idempotently by id.
+SYNC_OVERLAP_MS = 5000
+
+
+def record_script_tombstones(db: Session, ownerId: str, script_types: Dict[str, str]):
+    # script_types maps script id -> 'script' | 'folder'.
+    now = int(time.time() * 1000)
+    for script_id, script_type in script_types.items():
+        if not script_id:
+            continue
+        db.merge(
+            models.ScriptTombstone(
+                scriptId=script_id,
+                ownerId=ownerId,
+                type=script_type or "script",
+                deletedAt=now,
+            )
+        )
+    db.query(models.ScriptTombstone).filter(
+        models.ScriptTombstone.ownerId == ownerId,
+        models.ScriptTombstone.deletedAt < now - TOMBSTONE_RETENTION_MS,
+    ).delete(synchronize_session=False)
+
+
+def get_library_changes(db: Session, ownerId: str, since: Optional[int] = None):
+    now = int(time.time() * 1000)
+    full = not since or since < now - TOMBSTONE_RETENTION_MS
+
+    query = (
+        db.query(models.Script)
+        .options(orm.defer(models.Script.content))
+        .filter(models.Script.ownerId == ownerId)
+    )
+    if full:
+        upserts = query.order_by(models.Script.sortOrder.asc(), models.Script.lastModified.desc()).all()
+        return {"cursor": now, "full": True, "upserts": upserts, "deletes": []}
+
+    window_start = since - SYNC_OVERLAP_MS
+    upserts = (
+        query.filter(models.Script.changedAt >= window_start)
+        .order_by(models.Script.changedAt.asc())
+        .all()
+    )
+    live_ids = {s.id for s in upserts}
+    deletes = [
+        row[0]
+        for row in db.query(models.ScriptTombstone.scriptId)
+        .filter(
+            models.ScriptTombstone.ownerId == ownerId,
+            models.ScriptTombstone.deletedAt >= window_start,
+        )
+        .all()
+        if row[0] not in live_ids
+    ]
+    return {"cursor": now, "full": False, "upserts": upserts, "deletes": deletes}
+
+
+__all__ = [
+    "record_script_tombstones",
+    "get_library_changes",
+]
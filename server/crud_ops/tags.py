@@ -1,8 +1,55 @@
+import time
+from typing import Iterable, List, Optional
+
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.orm import Session
 
 import models
 import schemas
 
+_TAG_CHUNK = 500
+
+
+def _touch_script(db: Session, script_id: str):
+    _touch_scripts(db, [script_id])
+
+
+def _touch_scripts(db: Session, script_ids: Iterable[str]):
+    script_ids = list(script_ids)
+    for start in range(0, len(script_ids), _TAG_CHUNK):
+        db.query(models.Script).filter(models.Script.id.in_(script_ids[start:start + _TAG_CHUNK])).update(
+            {models.Script.changedAt: int(time.time() * 1000)},
+            synchronize_session=False,
+        )
+
+
+def refresh_tag_usage(db: Session, tag_ids: Iterable[int]):
+    # Recounts from script_tags (indexed on tagId) instead of applying deltas, so
+    # the denormalized count cannot drift when writes race.
+    tag_ids = sorted(set(tag_ids))
+    if not tag_ids:
+        return
+    usage = (
+        select(func.count())
+        .select_from(models.ScriptTag)
+        .where(models.ScriptTag.tagId == models.Tag.id)
+        .scalar_subquery()
+    )
+    for start in range(0, len(tag_ids), _TAG_CHUNK):
+        db.query(models.Tag).filter(models.Tag.id.in_(tag_ids[start:start + _TAG_CHUNK])).update(
+            {models.Tag.usageCount: usage},
+            synchronize_session=False,
+        )
+
+
+def tag_ids_for_scripts(db: Session, script_ids: Iterable[str]) -> List[int]:
+    script_ids = list(script_ids)
+    tag_ids = set()
+    for start in range(0, len(script_ids), _TAG_CHUNK):
+        rows = db.query(models.ScriptTag.tagId).filter(models.ScriptTag.scriptId.in_(script_ids[start:start + _TAG_CHUNK]))
+        tag_ids.update(row[0] for row in rows)
+    return list(tag_ids)
+
 
 def get_tags(db: Session, ownerId: str):
     return db.query(models.Tag).filter(models.Tag.ownerId == ownerId).all()
@@ -21,6 +68,13 @@ def create_tag(db: Session, tag: schemas.TagCreate, ownerId: str):
 
 
 def delete_tag(db: Session, tag_id: int, ownerId: str):
+    # The cascade drops the script_tags rows; bump the scripts so sync clients see it.
+    tagged = (
+        db.query(models.ScriptTag.scriptId)
+        .join(models.Tag, models.Tag.id == models.ScriptTag.tagId)
+        .filter(models.ScriptTag.tagId == tag_id, models.Tag.ownerId == ownerId)
+    )
+    _touch_scripts(db, [row[0] for row in tagged])
     db.query(models.Tag).filter(models.Tag.id == tag_id, models.Tag.ownerId == ownerId).delete()
     db.commit()
 
@@ -36,7 +90,10 @@ def add_tag_to_script(db: Session, script_id: str, tag_id: int):
 
     link = models.ScriptTag(scriptId=script_id, tagId=tag_id)
     db.add(link)
+    _touch_script(db, script_id)
     try:
+        db.flush()
+        refresh_tag_usage(db, [tag_id])
         db.commit()
         return True
     except Exception:
@@ -45,8 +102,82 @@ def add_tag_to_script(db: Session, script_id: str, tag_id: int):
 
 
 def remove_tag_from_script(db: Session, script_id: str, tag_id: int):
-    db.query(models.ScriptTag).filter(models.ScriptTag.scriptId == script_id, models.ScriptTag.tagId == tag_id).delete()
+    removed = db.query(models.ScriptTag).filter(models.ScriptTag.scriptId == script_id, models.ScriptTag.tagId == tag_id).delete()
+    _touch_script(db, script_id)
+    if removed:
+        refresh_tag_usage(db, [tag_id])
+    db.commit()
+
+
+def bulk_update_script_tags(
+    db: Session,
+    ownerId: str,
+    script_ids: List[str],
+    add_tag_ids: Optional[List[int]] = None,
+    remove_tag_ids: Optional[List[int]] = None,
+):
+    # Applies and removes tags across many scripts in one transaction. Returns None
+    # if any script or tag is not the owner's, so nothing is half-applied.
+    script_ids = list(dict.fromkeys(script_ids or []))
+    add_tag_ids = list(dict.fromkeys(add_tag_ids or []))
+    remove_tag_ids = [t for t in dict.fromkeys(remove_tag_ids or []) if t not in add_tag_ids]
+    tag_ids = add_tag_ids + remove_tag_ids
+
+    owned_scripts = set()
+    for start in range(0, len(script_ids), _TAG_CHUNK):
+        owned_scripts.update(
+            row[0]
+            for row in db.query(models.Script.id).filter(
+                models.Script.id.in_(script_ids[start:start + _TAG_CHUNK]),
+                models.Script.ownerId == ownerId,
+            )
+        )
+    owned_tags = {
+        row[0] for row in db.query(models.Tag.id).filter(models.Tag.id.in_(tag_ids), models.Tag.ownerId == ownerId)
+    } if tag_ids else set()
+    if len(owned_scripts) != len(script_ids) or len(owned_tags) != len(tag_ids):
+        return None
+
+    added = removed = 0
+    changed_scripts = set()
+    for start in range(0, len(script_ids), _TAG_CHUNK):
+        chunk = script_ids[start:start + _TAG_CHUNK]
+        if add_tag_ids:
+            existing = set(
+                db.query(models.ScriptTag.scriptId, models.ScriptTag.tagId).filter(
+                    models.ScriptTag.scriptId.in_(chunk),
+                    models.ScriptTag.tagId.in_(add_tag_ids),
+                )
+            )
+            links = [
+                {"scriptId": script_id, "tagId": tag_id}
+                for script_id in chunk
+                for tag_id in add_tag_ids
+                if (script_id, tag_id) not in existing
+            ]
+            if links:
+                db.execute(models.ScriptTag.__table__.insert(), links)
+                added += len(links)
+                changed_scripts.update(link["scriptId"] for link in links)
+        if remove_tag_ids:
+            pairs = [
+                tuple(row)
+                for row in db.query(models.ScriptTag.scriptId, models.ScriptTag.tagId).filter(
+                    models.ScriptTag.scriptId.in_(chunk),
+                    models.ScriptTag.tagId.in_(remove_tag_ids),
+                )
+            ]
+            if pairs:
+                db.query(models.ScriptTag).filter(
+                    tuple_(models.ScriptTag.scriptId, models.ScriptTag.tagId).in_(pairs)
+                ).delete(synchronize_session=False)
+                removed += len(pairs)
+                changed_scripts.update(script_id for script_id, _ in pairs)
+
+    _touch_scripts(db, changed_scripts)
+    refresh_tag_usage(db, tag_ids)
     db.commit()
+    return {"added": added, "removed": removed, "scripts": len(changed_scripts)}
 
 
 __all__ = [
@@ -55,4 +186,7 @@ __all__ = [
     "delete_tag",
     "add_tag_to_script",
     "remove_tag_from_script",
+    "bulk_update_script_tags",
+    "refresh_tag_usage",
+    "tag_ids_for_scripts",
 ]
@@ -103,7 +103,7 @@ def delete_theme(db: Session, theme_id: str, ownerId: str):
     db.query(models.Script).filter(
         models.Script.ownerId == ownerId,
         models.Script.markerThemeId == theme_id,
-    ).update({models.Script.markerThemeId: None})
+    ).update({models.Script.markerThemeId: None, models.Script.changedAt: int(time.time() * 1000)})
 
     deleted = db.query(models.MarkerTheme).filter(
         models.MarkerTheme.id == theme_id,
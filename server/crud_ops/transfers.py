@@ -4,6 +4,20 @@ from sqlalchemy.orm import Session
 
 import models
 from .common import ensure_folder_tree, ensure_folders_for_owner
+from .sync import record_script_tombstones
+
+
+def _move_scripts_to_owner(db: Session, script_filter, new_owner_id: str):
+    moved = db.query(models.Script.id, models.Script.ownerId, models.Script.type).filter(script_filter).all()
+    by_owner = {}
+    for script_id, owner_id, script_type in moved:
+        if owner_id and owner_id != new_owner_id:
+            by_owner.setdefault(owner_id, {})[script_id] = script_type
+    for owner_id, script_types in by_owner.items():
+        record_script_tombstones(db, owner_id, script_types)
+    db.query(models.Script).filter(script_filter).update(
+        {models.Script.ownerId: new_owner_id, models.Script.changedAt: int(time.time() * 1000)}
+    )
 
 
 def transfer_organization(db: Session, org_id: str, new_owner_id: str, current_owner_id: str, transfer_scripts: bool = True):
@@ -22,7 +36,7 @@ def transfer_organization(db: Session, org_id: str, new_owner_id: str, current_o
         if transfer_scripts:
             folder_rows = db.query(models.Script.folder).filter(models.Script.organizationId == org_id).distinct().all()
             ensure_folders_for_owner(db, new_owner_id, [r[0] for r in folder_rows])
-            db.query(models.Script).filter(models.Script.organizationId == org_id).update({models.Script.ownerId: new_owner_id})
+            _move_scripts_to_owner(db, models.Script.organizationId == org_id, new_owner_id)
 
         db.commit()
         return True
@@ -48,7 +62,7 @@ def transfer_organization_admin(db: Session, org_id: str, new_owner_id: str, tra
         if transfer_scripts:
             folder_rows = db.query(models.Script.folder).filter(models.Script.organizationId == org_id).distinct().all()
             ensure_folders_for_owner(db, new_owner_id, [r[0] for r in folder_rows])
-            db.query(models.Script).filter(models.Script.organizationId == org_id).update({models.Script.ownerId: new_owner_id})
+            _move_scripts_to_owner(db, models.Script.organizationId == org_id, new_owner_id)
 
         db.commit()
         return True
@@ -68,6 +82,8 @@ def transfer_script_ownership(db: Session, script_id: str, new_owner_id: str, cu
 
     try:
         ensure_folder_tree(db, new_owner_id, db_script.folder or "/")
+        if db_script.ownerId != new_owner_id:
+            record_script_tombstones(db, db_script.ownerId, {db_script.id: db_script.type})
         db_script.ownerId = new_owner_id
         db_script.lastModified = int(time.time() * 1000)
         db.commit()
@@ -87,6 +103,8 @@ def transfer_script_ownership_admin(db: Session, script_id: str, new_owner_id: s
         return False
     try:
         ensure_folder_tree(db, new_owner_id, db_script.folder or "/")
+        if db_script.ownerId != new_owner_id:
+            record_script_tombstones(db, db_script.ownerId, {db_script.id: db_script.type})
         db_script.ownerId = new_owner_id
         db_script.lastModified = int(time.time() * 1000)
         db.commit()
@@ -112,7 +130,7 @@ def transfer_persona_ownership(db: Session, persona_id: str, new_owner_id: str,
 
         folder_rows = db.query(models.Script.folder).filter(models.Script.personaId == persona_id).distinct().all()
         ensure_folders_for_owner(db, new_owner_id, [r[0] for r in folder_rows])
-        db.query(models.Script).filter(models.Script.personaId == persona_id).update({models.Script.ownerId: new_owner_id})
+        _move_scripts_to_owner(db, models.Script.personaId == persona_id, new_owner_id)
 
         db.commit()
         return True
@@ -136,7 +154,7 @@ def transfer_persona_ownership_admin(db: Session, persona_id: str, new_owner_id:
         persona.updatedAt = int(time.time() * 1000)
         folder_rows = db.query(models.Script.folder).filter(models.Script.personaId == persona_id).distinct().all()
         ensure_folders_for_owner(db, new_owner_id, [r[0] for r in folder_rows])
-        db.query(models.Script).filter(models.Script.personaId == persona_id).update({models.Script.ownerId: new_owner_id})
+        _move_scripts_to_owner(db, models.Script.personaId == persona_id, new_owner_id)
         db.commit()
         return True
     except Exception as e:
@@ -0,0 +1,52 @@
+import json
+
+from sqlalchemy import JSON
+from sqlalchemy.types import TypeDecorator
+
+
+def coerce_json_list(value) -> list:
+    # Older clients stored these lists as JSON text, sometimes encoded twice.
+    # Normalized on write and by the one-time migration; reads still run it
+    # so rows the migration hasn't reached stay valid. Anything unreadable
+    # becomes [].
+    for _ in range(2):
+        if isinstance(value, bytes):
+            value = value.decode("utf-8", errors="replace")
+        if not isinstance(value, str):
+            break
+        text = value.strip()
+        if not text:
+            return []
+        try:
+            value = json.loads(text)
+        except ValueError:
+            return []
+    return value if isinstance(value, list) else []
+
+
+class JSONList(TypeDecorator):
+    impl = JSON
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return coerce_json_list(value)
+
+    def result_processor(self, dialect, coltype):
+        # SQLite keeps the raw text, so a legacy row may not even be valid
+        # JSON; fall back to coercing the text instead of failing the read.
+        impl_processor = self.impl_instance.result_processor(dialect, coltype)
+
+        def process(value):
+            if impl_processor is not None:
+                try:
+                    value = impl_processor(value)
+                except ValueError:
+                    pass
+            return self.process_result_value(value, dialect)
+
+        return process
+
+    def process_result_value(self, value, dialect):
+        if isinstance(value, list):
+            return value
+        return coerce_json_list(value)
@@ -1,8 +1,11 @@
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 import os
+import time
 from urllib.parse import urlparse
 
-from fastapi import Depends, FastAPI, HTTPException, Request, Response
+from fastapi import Depends, FastAPI, Header, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
 from fastapi.staticfiles import StaticFiles
@@ -10,11 +13,15 @@ from fastapi.staticfiles import StaticFiles
 import database
 import migration
 import models
-from dependencies import get_current_user_id, get_db
+from dependencies import get_current_user_id, get_db, is_admin_user, resolve_user_id
 from rate_limit import RATE_LIMIT_ENABLED, limiter
 from routers import analysis, scripts, users, orgs, personas, tags, themes, admin, public, seo, media, series
+from routers import exports
 from routers import public_bundle
+from services import metrics, profiler, query_stats, tracing
 from services.seo import inject_seo_for_route
+from crud_ops.engagement import flush_view_counts
+from crud_ops.rankings import start_ranking_refresher
 
 try:
     from slowapi.errors import RateLimitExceeded
@@ -38,6 +45,7 @@ if AUTO_CREATE_TABLES:
     models.Base.metadata.create_all(bind=database.engine)
 if RUN_LEGACY_MIGRATIONS:
     migration.run_migrations()
+    migration.normalize_json_list_columns()
 
 SERVER_DIR = os.path.dirname(__file__)
 DIST_CANDIDATES = [
@@ -113,8 +121,42 @@ def _build_csp_headers(allow_origins: list[str]) -> tuple[str, str]:
     return csp_enforced, csp_report_only
 
 
+def _user_is_admin(user_id: str) -> bool:
+    db = database.SessionLocal()
+    try:
+        return is_admin_user(db, user_id)
+    finally:
+        db.close()
+
+
+def _request_is_from_admin(authorization: str, x_user_id: str) -> bool:
+    try:
+        user_id = resolve_user_id(authorization, x_user_id)
+    except Exception:
+        # Missing, malformed or unverifiable credentials (e.g. a metrics token
+        # sent as a bearer) all just mean "not an admin".
+        return False
+    return _user_is_admin(user_id)
+
+
+async def _is_admin_request(request: Request) -> bool:
+    # Bearer verification and the admin lookup both block, so keep them off the loop.
+    return await run_in_threadpool(
+        _request_is_from_admin, request.headers.get("authorization"), request.headers.get("x-user-id")
+    )
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    start_ranking_refresher()
+    yield
+    # Buffered view counts are written out before the worker exits.
+    flush_view_counts()
+    metrics.registry.flush()
+
+
 def create_app() -> FastAPI:
-    app = FastAPI()
+    app = FastAPI(lifespan=_lifespan)
     app.state.limiter = limiter
     allow_origins = _cors_allow_origins()
     csp_enforced, csp_report_only = _build_csp_headers(allow_origins)
@@ -124,8 +166,92 @@ def create_app() -> FastAPI:
 
         @app.exception_handler(RateLimitExceeded)
         async def rate_limit_handler(request: Request, exc: RateLimitExceeded):
+            metrics.rate_limited.inc(route=metrics.route_label(request))
             return Response("Rate limit exceeded", status_code=429)
 
+    @app.middleware("http")
+    async def db_query_stats(request: Request, call_next):
+        stats, token = query_stats.begin_request(request.url.path)
+        try:
+            response = await call_next(request)
+        finally:
+            query_stats.end_request(token)
+        query_stats.log_request_stats(stats, request.method, response.status_code)
+        if query_stats.DB_QUERY_HEADERS:
+            response.headers["X-DB-Queries"] = str(stats.count)
+            response.headers["Server-Timing"] = stats.server_timing()
+        return response
+
+    @app.middleware("http")
+    async def http_tracing(request: Request, call_next):
+        if not tracing.tracing_enabled():
+            return await call_next(request)
+        trace, *tokens = tracing.begin_trace(request.headers.get("traceparent"))
+        status_code = 500
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+        finally:
+            route = metrics.route_label(request)
+            trace.root.name = f"{request.method} {route}"
+            trace.root.attributes.update({
+                "http.request.method": request.method,
+                "http.route": route,
+                "url.path": request.url.path,
+                "http.response.status_code": status_code,
+            })
+            exported = tracing.end_trace(trace, tokens)
+        if exported:
+            response.headers["X-Trace-Id"] = trace.trace_id
+        return response
+
+    @app.middleware("http")
+    async def http_metrics(request: Request, call_next):
+        started = time.perf_counter()
+        status_code = 500
+        metrics.http_in_progress.inc()
+        try:
+            response = await call_next(request)
+            status_code = response.status_code
+            return response
+        finally:
+            metrics.http_in_progress.dec()
+            route = metrics.route_label(request)
+            metrics.http_requests.inc(method=request.method, route=route, status=status_code)
+            metrics.http_duration.observe(time.perf_counter() - started, method=request.method, route=route)
+            metrics.registry.ensure_flusher()
+
+    @app.middleware("http")
+    async def request_profiler(request: Request, call_next):
+        # Anyone else sending the flag just gets the normal response.
+        mode = profiler.requested_mode(request.query_params, request.headers)
+        if not mode or not await _is_admin_request(request):
+            return await call_next(request)
+        sampler = profiler.try_begin()
+        if sampler is None:
+            response = await call_next(request)
+            response.headers["X-Profile"] = "busy"
+            return response
+        try:
+            response = await call_next(request)
+            if mode == "collapsed":
+                async for _ in response.body_iterator:
+                    pass
+        finally:
+            samples = profiler.finish(sampler)
+        headers = {
+            "X-Profile-Samples": str(sampler.sample_count),
+            "X-Profile-Seconds": f"{sampler.elapsed:.3f}",
+        }
+        if mode == "collapsed":
+            headers["X-Profiled-Status"] = str(response.status_code)
+            return Response(profiler.render_collapsed(samples), media_type="text/plain", headers=headers)
+        headers["X-Profile-Id"] = await run_in_threadpool(
+            profiler.store, samples, request.method, metrics.route_label(request)
+        )
+        response.headers.update(headers)
+        return response
+
     @app.middleware("http")
     async def security_headers(request: Request, call_next):
         response = await call_next(request)
@@ -148,6 +274,7 @@ def create_app() -> FastAPI:
     app.include_router(analysis.router)
     app.include_router(scripts.router)
     app.include_router(scripts.export_router)
+    app.include_router(exports.router)
     app.include_router(scripts.search_router)
     app.include_router(users.router)
     app.include_router(orgs.router)
@@ -161,6 +288,16 @@ def create_app() -> FastAPI:
     app.include_router(media.router)
     app.include_router(series.router)
 
+    metrics.watch_engine_pool(database.engine)
+    tracing.install_fastapi_serialization_span()
+
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics(request: Request, authorization: str = Header(None)):
+        # Deny by default: route-level traffic and pool internals are not public.
+        if not metrics.token_allows_scrape(authorization) and not await _is_admin_request(request):
+            raise HTTPException(status_code=401, detail="Metrics require a token or an admin login")
+        return Response(content=await run_in_threadpool(metrics.registry.render), media_type=metrics.CONTENT_TYPE)
+
     @app.get("/api/health/auth")
     async def auth_health_check(user_id: str = Depends(get_current_user_id)):
         return {"ok": True, "uid": user_id}
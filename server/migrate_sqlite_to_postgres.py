@@ -6,10 +6,11 @@ import os
 import sqlite3
 from typing import Any
 
-from sqlalchemy import Boolean, Float, Integer, JSON, MetaData, create_engine, text
+from sqlalchemy import Boolean, Float, Integer, JSON, LargeBinary, MetaData, create_engine, text
 from sqlalchemy.sql.sqltypes import Integer as SAInteger
 
 import models
+from json_columns import JSONList, coerce_json_list
 
 
 DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(__file__), "data", "scripts.db")
@@ -21,6 +22,11 @@ TABLE_ORDER = [
     "marker_themes",
     "series",
     "scripts",
+    "script_revisions",
+    "script_daily_stats",
+    "script_reader_sketches",
+    "public_rankings",
+    "script_tombstones",
     "tags",
     "script_tags",
     "script_likes",
@@ -31,6 +37,7 @@ TABLE_ORDER = [
     "public_terms_acceptances",
     "admin_users",
     "site_settings",
+    "export_jobs",
 ]
 
 JSON_DEFAULTS: dict[tuple[str, str], Any] = {
@@ -83,6 +90,9 @@ def _normalize_value(table_name: str, column, raw: Any) -> Any:
 
     col_type = column.type
 
+    if isinstance(col_type, JSONList):
+        return coerce_json_list(raw)
+
     if isinstance(col_type, JSON):
         return _normalize_json_value(table_name, column.name, raw)
 
@@ -105,6 +115,9 @@ def _normalize_value(table_name: str, column, raw: Any) -> Any:
             return None
         return float(raw)
 
+    if isinstance(col_type, LargeBinary):
+        return bytes(raw) if not isinstance(raw, str) else raw.encode("utf-8")
+
     if isinstance(raw, bytes):
         return raw.decode("utf-8", errors="replace")
 
@@ -2,9 +2,42 @@ import json
 import time
 import uuid
 from sqlalchemy import text
+from content_storage import content_stats, content_summary, decode_content
 from database import engine
+import models
+from json_columns import coerce_json_list
+
+JSON_LIST_COLUMNS = {
+    "personas": ("links", "organizationIds", "tags", "defaultLicenseSpecialTerms"),
+    "organizations": ("tags",),
+}
+JSON_LIST_MIGRATION_KEY = "migration.jsonListColumns"
+
+# Columns added to existing tables after the Postgres cut-over. create_all never
+# alters a table that already exists, so run_postgres_migrations adds them with
+# ADD COLUMN IF NOT EXISTS. Identifiers are quoted: Postgres folds bare names
+# to lower case.
+POSTGRES_ADDED_COLUMNS = (
+    ("scripts", "revision", "INTEGER DEFAULT 0"),
+    ("scripts", "contentLength", "INTEGER DEFAULT NULL"),
+    ("scripts", "contentHash", "TEXT DEFAULT NULL"),
+    ("scripts", "changedAt", "BIGINT DEFAULT NULL"),
+    ("scripts", "excerpt", "TEXT DEFAULT NULL"),
+    ("scripts", "durationMinutes", "DOUBLE PRECISION DEFAULT 0"),
+    # Added as NULL so the recount below only touches tags that predate it.
+    ("tags", "usageCount", "INTEGER DEFAULT NULL"),
+)
+POSTGRES_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS ix_scripts_owner_folder_sort ON scripts ("ownerId", folder, "sortOrder")',
+    'CREATE INDEX IF NOT EXISTS ix_scripts_owner_changed ON scripts ("ownerId", "changedAt")',
+    'CREATE INDEX IF NOT EXISTS ix_script_tags_tagId ON script_tags ("tagId")',
+)
+
 
 def run_migrations():
+    if engine.dialect.name == "postgresql":
+        run_postgres_migrations()
+        return
     if engine.dialect.name != "sqlite":
         print(f"Skipping legacy sqlite migrations for dialect: {engine.dialect.name}")
         return
@@ -83,10 +116,41 @@ def run_migrations():
                 print("Migrating: Adding 'licenseNotify' column")
                 conn.execute(text("ALTER TABLE scripts ADD COLUMN licenseNotify TEXT DEFAULT ''"))
 
+            if 'revision' not in columns:
+                print("Migrating: Adding 'revision' column")
+                conn.execute(text("ALTER TABLE scripts ADD COLUMN revision INTEGER DEFAULT 0"))
+
+            if 'contentLength' not in columns:
+                print("Migrating: Adding 'contentLength' column")
+                conn.execute(text("ALTER TABLE scripts ADD COLUMN contentLength INTEGER DEFAULT NULL"))
+
+            if 'contentHash' not in columns:
+                print("Migrating: Adding 'contentHash' column")
+                conn.execute(text("ALTER TABLE scripts ADD COLUMN contentHash TEXT DEFAULT NULL"))
+
+            backfill_content_stats(conn)
+
+            if 'excerpt' not in columns:
+                print("Migrating: Adding 'excerpt' column")
+                conn.execute(text("ALTER TABLE scripts ADD COLUMN excerpt TEXT DEFAULT NULL"))
+
+            if 'durationMinutes' not in columns:
+                print("Migrating: Adding 'durationMinutes' column")
+                conn.execute(text("ALTER TABLE scripts ADD COLUMN durationMinutes REAL DEFAULT 0"))
+
+            backfill_content_summaries(conn)
+
+            if 'changedAt' not in columns:
+                print("Migrating: Adding 'changedAt' column")
+                conn.execute(text("ALTER TABLE scripts ADD COLUMN changedAt INTEGER DEFAULT NULL"))
+            conn.execute(text("UPDATE scripts SET changedAt = lastModified WHERE changedAt IS NULL"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_scripts_owner_changed ON scripts(ownerId, changedAt)"))
+
             if 'customMetadata' not in columns:
                 print("Migrating: Adding 'customMetadata' column")
                 conn.execute(text("ALTER TABLE scripts ADD COLUMN customMetadata TEXT DEFAULT '[]'"))
             conn.execute(text("UPDATE scripts SET customMetadata = '[]' WHERE customMetadata IS NULL OR TRIM(customMetadata) = ''"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_scripts_owner_folder_sort ON scripts(ownerId, folder, sortOrder)"))
             
             # Check users columns
             result_users = conn.execute(text("PRAGMA table_info(users)"))
@@ -162,6 +226,16 @@ def run_migrations():
                 print("Migrating: Adding 'bannerUrl' column to organizations")
                 conn.execute(text("ALTER TABLE organizations ADD COLUMN bannerUrl TEXT DEFAULT ''"))
 
+            # Tags columns
+            result_tags = conn.execute(text("PRAGMA table_info(tags)"))
+            tag_columns = [row.name for row in result_tags.fetchall()]
+            if tag_columns and 'usageCount' not in tag_columns:
+                print("Migrating: Adding 'usageCount' column to tags")
+                conn.execute(text("ALTER TABLE tags ADD COLUMN usageCount INTEGER DEFAULT 0"))
+                conn.execute(text("UPDATE tags SET usageCount = (SELECT COUNT(*) FROM script_tags WHERE script_tags.tagId = tags.id)"))
+            if tag_columns:
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_script_tags_tagId ON script_tags(tagId)"))
+
             # Series table
             result_tables = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='series'"))
             has_series_table = result_tables.fetchone() is not None
@@ -182,6 +256,123 @@ def run_migrations():
                 conn.execute(text("CREATE INDEX IF NOT EXISTS ix_series_ownerId ON series(ownerId)"))
                 conn.execute(text("CREATE INDEX IF NOT EXISTS ix_series_slug ON series(slug)"))
 
+            # Script revision history (snapshots + compressed deltas)
+            result_tables = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='script_revisions'"))
+            has_script_revisions_table = result_tables.fetchone() is not None
+            if not has_script_revisions_table:
+                print("Migrating: Creating 'script_revisions' table")
+                conn.execute(text("""
+                    CREATE TABLE script_revisions (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        scriptId TEXT NOT NULL,
+                        revision INTEGER NOT NULL,
+                        kind TEXT DEFAULT 'snapshot',
+                        payload BLOB,
+                        contentLength INTEGER DEFAULT 0,
+                        authorId TEXT DEFAULT NULL,
+                        createdAt INTEGER NOT NULL,
+                        FOREIGN KEY(scriptId) REFERENCES scripts(id) ON DELETE CASCADE,
+                        UNIQUE(scriptId, revision)
+                    )
+                """))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_script_revisions_scriptId ON script_revisions(scriptId)"))
+
+            # Daily per-script engagement rollups (views/likes)
+            result_tables = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='script_daily_stats'"))
+            has_script_daily_stats_table = result_tables.fetchone() is not None
+            if not has_script_daily_stats_table:
+                print("Migrating: Creating 'script_daily_stats' table")
+                conn.execute(text("""
+                    CREATE TABLE script_daily_stats (
+                        scriptId TEXT NOT NULL,
+                        day TEXT NOT NULL,
+                        views INTEGER DEFAULT 0,
+                        likes INTEGER DEFAULT 0,
+                        unlikes INTEGER DEFAULT 0,
+                        updatedAt INTEGER,
+                        PRIMARY KEY (scriptId, day),
+                        FOREIGN KEY(scriptId) REFERENCES scripts(id) ON DELETE CASCADE
+                    )
+                """))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_script_daily_stats_day ON script_daily_stats(day)"))
+
+            # Daily per-script unique-reader sketches (HyperLogLog)
+            result_tables = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='script_reader_sketches'"))
+            has_script_reader_sketches_table = result_tables.fetchone() is not None
+            if not has_script_reader_sketches_table:
+                print("Migrating: Creating 'script_reader_sketches' table")
+                conn.execute(text("""
+                    CREATE TABLE script_reader_sketches (
+                        scriptId TEXT NOT NULL,
+                        day TEXT NOT NULL,
+                        registers BLOB NOT NULL,
+                        updatedAt INTEGER,
+                        PRIMARY KEY (scriptId, day),
+                        FOREIGN KEY(scriptId) REFERENCES scripts(id) ON DELETE CASCADE
+                    )
+                """))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_script_reader_sketches_day ON script_reader_sketches(day)"))
+
+            # Precomputed trending scripts / top tags
+            result_tables = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='public_rankings'"))
+            has_public_rankings_table = result_tables.fetchone() is not None
+            if not has_public_rankings_table:
+                print("Migrating: Creating 'public_rankings' table")
+                conn.execute(text("""
+                    CREATE TABLE public_rankings (
+                        kind TEXT NOT NULL,
+                        rank INTEGER NOT NULL,
+                        itemId TEXT NOT NULL,
+                        score FLOAT DEFAULT 0,
+                        computedAt INTEGER,
+                        PRIMARY KEY (kind, rank)
+                    )
+                """))
+
+            # Deleted/transferred-away scripts for incremental library sync
+            result_tables = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='script_tombstones'"))
+            has_script_tombstones_table = result_tables.fetchone() is not None
+            if not has_script_tombstones_table:
+                print("Migrating: Creating 'script_tombstones' table")
+                conn.execute(text("""
+                    CREATE TABLE script_tombstones (
+                        scriptId TEXT NOT NULL,
+                        ownerId TEXT NOT NULL,
+                        type TEXT DEFAULT 'script',
+                        deletedAt INTEGER NOT NULL,
+                        PRIMARY KEY (scriptId, ownerId)
+                    )
+                """))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_script_tombstones_ownerId ON script_tombstones(ownerId)"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_script_tombstones_deletedAt ON script_tombstones(deletedAt)"))
+
+            # Background export jobs
+            result_tables = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='export_jobs'"))
+            has_export_jobs_table = result_tables.fetchone() is not None
+            if not has_export_jobs_table:
+                print("Migrating: Creating 'export_jobs' table")
+                conn.execute(text("""
+                    CREATE TABLE export_jobs (
+                        id TEXT PRIMARY KEY,
+                        ownerId TEXT NOT NULL,
+                        scope TEXT DEFAULT 'account',
+                        folder TEXT,
+                        seriesId TEXT,
+                        status TEXT DEFAULT 'queued',
+                        total INTEGER DEFAULT 0,
+                        processed INTEGER DEFAULT 0,
+                        filePath TEXT,
+                        sizeBytes INTEGER,
+                        error TEXT,
+                        createdAt INTEGER,
+                        updatedAt INTEGER,
+                        FOREIGN KEY(ownerId) REFERENCES users(id)
+                    )
+                """))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_export_jobs_ownerId ON export_jobs(ownerId)"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_export_jobs_status ON export_jobs(status)"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_export_jobs_createdAt ON export_jobs(createdAt)"))
+
             # Organization memberships table (user <-> org many-to-many)
             result_tables = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name='organization_memberships'"))
             has_org_memberships_table = result_tables.fetchone() is not None
@@ -349,3 +540,112 @@ def run_migrations():
             conn.commit()
     except Exception as e:
         print(f"Migration failed: {e}")
+
+
+def run_postgres_migrations():
+    try:
+        with engine.connect() as conn:
+            for table_name, column_name, ddl in POSTGRES_ADDED_COLUMNS:
+                conn.execute(text(f'ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS "{column_name}" {ddl}'))
+            for statement in POSTGRES_INDEXES:
+                conn.execute(text(statement))
+            backfill_content_stats(conn)
+            backfill_content_summaries(conn)
+            conn.execute(text('UPDATE scripts SET "changedAt" = "lastModified" WHERE "changedAt" IS NULL'))
+            conn.execute(text(
+                'UPDATE tags SET "usageCount" = (SELECT COUNT(*) FROM script_tags WHERE script_tags."tagId" = tags.id) '
+                'WHERE "usageCount" IS NULL'
+            ))
+            conn.commit()
+    except Exception as e:
+        print(f"Postgres migration failed: {e}")
+
+
+def backfill_content_stats(conn):
+    # Backfill stored content stats in batches so listings can stop reading content.
+    while True:
+        pending = conn.execute(text('SELECT id, content FROM scripts WHERE "contentHash" IS NULL LIMIT 500')).fetchall()
+        if not pending:
+            break
+        print(f"Migrating: Backfilling content stats for {len(pending)} scripts")
+        params = []
+        for row in pending:
+            length, digest = content_stats(decode_content(row.content))
+            params.append({"id": row.id, "contentLength": length, "contentHash": digest})
+        conn.execute(
+            text('UPDATE scripts SET "contentLength" = :contentLength, "contentHash" = :contentHash WHERE id = :id'),
+            params,
+        )
+
+
+def backfill_content_summaries(conn):
+    # Backfill listing excerpts/durations so public listings can stop reading content.
+    while True:
+        pending = conn.execute(text("SELECT id, content FROM scripts WHERE excerpt IS NULL LIMIT 500")).fetchall()
+        if not pending:
+            break
+        print(f"Migrating: Backfilling excerpts for {len(pending)} scripts")
+        params = []
+        for row in pending:
+            excerpt, duration = content_summary(decode_content(row.content))
+            params.append({"id": row.id, "excerpt": excerpt, "durationMinutes": duration})
+        conn.execute(
+            text('UPDATE scripts SET excerpt = :excerpt, "durationMinutes" = :durationMinutes WHERE id = :id'),
+            params,
+        )
+
+
+def normalize_json_list_columns():
+    # One-time rewrite of legacy JSON-text / double-encoded list columns into
+    # real JSON arrays, so JSONList reads never parse. Runs on any dialect and
+    # records a site_settings marker once done.
+    try:
+        with engine.connect() as conn:
+            fixed = normalize_json_list_rows(conn)
+            if fixed:
+                print(f"Migrating: Normalized JSON list columns on {fixed} rows")
+            conn.commit()
+    except Exception as e:
+        print(f"JSON column normalization failed: {e}")
+
+
+def normalize_json_list_rows(conn) -> int:
+    done = conn.execute(
+        text("SELECT 1 FROM site_settings WHERE key = :key"), {"key": JSON_LIST_MIGRATION_KEY}
+    ).fetchone()
+    if done:
+        return 0
+    is_sqlite = conn.dialect.name == "sqlite"
+    fixed = 0
+    for table_name, column_names in JSON_LIST_COLUMNS.items():
+        table = models.Base.metadata.tables[table_name]
+        cols = ", ".join(f'"{name}"' for name in column_names)
+        for row in conn.execute(text(f'SELECT id, {cols} FROM "{table_name}"')).fetchall():
+            changes = {}
+            for name in column_names:
+                # SQLite hands back the stored JSON text, Postgres the decoded value.
+                current = getattr(row, name)
+                if is_sqlite and isinstance(current, str):
+                    try:
+                        current = json.loads(current)
+                    except ValueError:
+                        pass
+                normalized = coerce_json_list(current)
+                if current != normalized:
+                    changes[name] = normalized
+            if changes:
+                conn.execute(table.update().where(table.c.id == row.id).values(**changes))
+                fixed += 1
+    conn.execute(
+        models.SiteSetting.__table__.insert().values(
+            key=JSON_LIST_MIGRATION_KEY, value="1", updatedAt=int(time.time() * 1000)
+        )
+    )
+    return fixed
+
+
+if __name__ == "__main__":
+    # For deployments that set DB_RUN_LEGACY_MIGRATIONS=0: run once from the
+    # migration job before starting the new version.
+    run_migrations()
+    normalize_json_list_columns()
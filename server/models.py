@@ -1,15 +1,25 @@
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, ForeignKey, JSON, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, ForeignKey, JSON, UniqueConstraint, Index, LargeBinary, event
 from sqlalchemy.orm import relationship
+from content_storage import CompressedText, EMPTY_CONTENT_HASH, content_stats, content_summary
 from database import Base
+from json_columns import JSONList
 import time
 
 class Script(Base):
     __tablename__ = "scripts"
+    __table_args__ = (
+        Index("ix_scripts_owner_folder_sort", "ownerId", "folder", "sortOrder"),
+        Index("ix_scripts_owner_changed", "ownerId", "changedAt"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     ownerId = Column(String, ForeignKey("users.id"), index=True)
     title = Column(String)
-    content = Column(String, default="")
+    content = Column(CompressedText, default="") # Optionally compressed at rest, see content_storage
+    contentLength = Column(Integer, default=0) # Maintained on write so listings never read content
+    contentHash = Column(String, default=EMPTY_CONTENT_HASH) # sha256 of the plain text
+    excerpt = Column(String, default="") # Opening body text for public listings
+    durationMinutes = Column(Float, default=0.0) # Estimated reading time
     customMetadata = Column(JSON, default=list)
     createdAt = Column(Integer, default=lambda: int(time.time() * 1000))
     lastModified = Column(Integer, default=lambda: int(time.time() * 1000))
@@ -22,6 +32,8 @@ class Script(Base):
     markerThemeId = Column(String, ForeignKey("marker_themes.id"), nullable=True)
     seriesId = Column(String, ForeignKey("series.id"), nullable=True, index=True)
     seriesOrder = Column(Integer, nullable=True)
+    revision = Column(Integer, default=0) # Bumped on every content change; base for patch autosave
+    changedAt = Column(Integer, default=lambda: int(time.time() * 1000)) # Any row change; drives library sync
     
     # Relationships
     tags = relationship("Tag", secondary="script_tags", back_populates="scripts")
@@ -29,6 +41,24 @@ class Script(Base):
     owner = relationship("User", backref="scripts", foreign_keys=[ownerId])
     series = relationship("Series", foreign_keys=[seriesId], lazy="joined")
 
+@event.listens_for(Script.content, "set")
+def _sync_script_content_stats(target, value, oldvalue, initiator):
+    target.contentLength, target.contentHash = content_stats(value)
+    target.excerpt, target.durationMinutes = content_summary(value)
+
+@event.listens_for(Script, "before_update")
+def _stamp_script_changed_at(mapper, connection, target):
+    # Bulk Query.update() paths bypass this and set changedAt themselves.
+    target.changedAt = int(time.time() * 1000)
+
+class ScriptTombstone(Base):
+    __tablename__ = "script_tombstones"
+
+    scriptId = Column(String, primary_key=True)
+    ownerId = Column(String, primary_key=True, index=True) # Owner whose library lost the script
+    type = Column(String, default="script")
+    deletedAt = Column(Integer, default=lambda: int(time.time() * 1000), index=True)
+
 class User(Base):
     __tablename__ = "users"
 
@@ -49,11 +79,15 @@ class Tag(Base):
     ownerId = Column(String)
     name = Column(String)
     color = Column(String)
+    usageCount = Column(Integer, default=0) # Scripts carrying this tag, maintained on write
 
     scripts = relationship("Script", secondary="script_tags", back_populates="tags")
 
 class ScriptTag(Base):
     __tablename__ = "script_tags"
+    __table_args__ = (
+        Index("ix_script_tags_tagId", "tagId"),
+    )
 
     scriptId = Column(String, ForeignKey("scripts.id", ondelete="CASCADE"), primary_key=True)
     tagId = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
@@ -83,7 +117,7 @@ class Organization(Base):
     website = Column(String, default="")
     logoUrl = Column(String, default="")
     bannerUrl = Column(String, default="")
-    tags = Column(JSON, default=list)
+    tags = Column(JSONList, default=list)
     ownerId = Column(String, ForeignKey("users.id"))
     createdAt = Column(Integer, default=lambda: int(time.time() * 1000))
     updatedAt = Column(Integer, default=lambda: int(time.time() * 1000))
@@ -146,6 +180,48 @@ class ScriptLike(Base):
     scriptId = Column(String, ForeignKey("scripts.id"), primary_key=True)
     createdAt = Column(Integer, default=lambda: int(time.time() * 1000))
 
+class ScriptDailyStat(Base):
+    __tablename__ = "script_daily_stats"
+
+    scriptId = Column(String, ForeignKey("scripts.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(String, primary_key=True, index=True) # UTC, YYYY-MM-DD
+    views = Column(Integer, default=0)
+    likes = Column(Integer, default=0) # Likes added that day
+    unlikes = Column(Integer, default=0) # Likes removed that day
+    updatedAt = Column(Integer, default=lambda: int(time.time() * 1000))
+
+class ScriptReaderSketch(Base):
+    __tablename__ = "script_reader_sketches"
+
+    scriptId = Column(String, ForeignKey("scripts.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(String, primary_key=True, index=True) # UTC, YYYY-MM-DD
+    registers = Column(LargeBinary, nullable=False) # zlib-compressed HyperLogLog registers
+    updatedAt = Column(Integer, default=lambda: int(time.time() * 1000))
+
+class PublicRanking(Base):
+    __tablename__ = "public_rankings"
+
+    kind = Column(String, primary_key=True) # trending | top_tags
+    rank = Column(Integer, primary_key=True) # 1-based
+    itemId = Column(String, nullable=False) # Script id or tag name
+    score = Column(Float, default=0.0)
+    computedAt = Column(Integer, default=lambda: int(time.time() * 1000))
+
+class ScriptRevision(Base):
+    __tablename__ = "script_revisions"
+    __table_args__ = (
+        UniqueConstraint("scriptId", "revision", name="uq_script_revisions_script_revision"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    scriptId = Column(String, ForeignKey("scripts.id", ondelete="CASCADE"), index=True, nullable=False)
+    revision = Column(Integer, nullable=False)
+    kind = Column(String, default="snapshot") # 'snapshot' (full text) or 'delta' (line ops vs previous revision)
+    payload = Column(LargeBinary) # zlib-compressed
+    contentLength = Column(Integer, default=0)
+    authorId = Column(String, nullable=True)
+    createdAt = Column(Integer, default=lambda: int(time.time() * 1000))
+
 class Series(Base):
     __tablename__ = "series"
 
@@ -184,13 +260,13 @@ class Persona(Base):
     bannerUrl = Column(String, default="")
     bio = Column(Text, default="")
     website = Column(String, default="")
-    links = Column(JSON, default=list)
-    organizationIds = Column(JSON, default=list)
-    tags = Column(JSON, default=list)
+    links = Column(JSONList, default=list)
+    organizationIds = Column(JSONList, default=list)
+    tags = Column(JSONList, default=list)
     defaultLicenseCommercial = Column(String, default="")
     defaultLicenseDerivative = Column(String, default="")
     defaultLicenseNotify = Column(String, default="")
-    defaultLicenseSpecialTerms = Column(JSON, default=list)
+    defaultLicenseSpecialTerms = Column(JSONList, default=list)
     createdAt = Column(Integer, default=lambda: int(time.time() * 1000))
     updatedAt = Column(Integer, default=lambda: int(time.time() * 1000))
     
@@ -242,3 +318,21 @@ class SiteSetting(Base):
     value = Column(Text, default="")
     updatedBy = Column(String, ForeignKey("users.id"), nullable=True)
     updatedAt = Column(Integer, default=lambda: int(time.time() * 1000), index=True)
+
+
+class ExportJob(Base):
+    __tablename__ = "export_jobs"
+
+    id = Column(String, primary_key=True, index=True)
+    ownerId = Column(String, ForeignKey("users.id"), nullable=False, index=True)
+    scope = Column(String, default="account") # account, folder, series
+    folder = Column(String, nullable=True)
+    seriesId = Column(String, nullable=True)
+    status = Column(String, default="queued", index=True) # queued, running, done, failed
+    total = Column(Integer, default=0)
+    processed = Column(Integer, default=0)
+    filePath = Column(String, nullable=True)
+    sizeBytes = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    createdAt = Column(Integer, default=lambda: int(time.time() * 1000), index=True)
+    updatedAt = Column(Integer, default=lambda: int(time.time() * 1000))
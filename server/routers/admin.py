@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Body, Depends, HTTPException, Request
 from typing import Any, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, orm
 import time
 import uuid
 import json
@@ -83,7 +83,7 @@ def _delete_organizations_owned_by(db: Session, owner_id: str):
         org_id = org.id
         db.query(models.OrganizationMembership).filter(models.OrganizationMembership.orgId == org_id).delete(synchronize_session=False)
         db.query(models.Script).filter(models.Script.organizationId == org_id).update(
-            {models.Script.organizationId: None},
+            {models.Script.organizationId: None, models.Script.changedAt: int(time.time() * 1000)},
             synchronize_session=False,
         )
         db.query(models.PersonaOrganizationMembership).filter(
@@ -91,7 +91,7 @@ def _delete_organizations_owned_by(db: Session, owner_id: str):
         ).delete(synchronize_session=False)
         personas = db.query(models.Persona).all()
         for persona in personas:
-            org_ids = crud._ensure_list(persona.organizationIds)
+            org_ids = persona.organizationIds
             if org_id in org_ids:
                 persona.organizationIds = [oid for oid in org_ids if oid != org_id]
         users = db.query(models.User).filter(models.User.organizationId == org_id).all()
@@ -123,6 +123,27 @@ def update_default_marker_configs(
     parsed = crud._parse_theme_configs(getattr(row, "configs", "[]"))
     return parsed if isinstance(parsed, list) else []
 
+@router.get("/view-buffer-stats")
+def get_view_buffer_stats(
+    db: Session = Depends(get_db),
+    ownerId: str = Depends(get_current_user_id),
+):
+    if not is_admin_user(db, ownerId):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return crud.get_view_buffer_stats()
+
+@router.post("/rankings/refresh")
+def refresh_public_rankings(
+    db: Session = Depends(get_db),
+    ownerId: str = Depends(get_current_user_id),
+):
+    if not is_admin_user(db, ownerId):
+        raise HTTPException(status_code=403, detail="Not authorized")
+    result = crud.refresh_public_rankings(db)
+    if result is None:
+        raise HTTPException(status_code=500, detail="Ranking refresh failed")
+    return result
+
 @router.get("/users", response_model=List[schemas.UserPublic])
 @limiter.limit("20/minute")
 def search_users(
@@ -422,11 +443,14 @@ def admin_delete_user(
         ).delete(synchronize_session=False)
         db.query(models.Script).filter(models.Script.personaId.in_(
             db.query(models.Persona.id).filter(models.Persona.ownerId == user_id)
-        )).update({models.Script.personaId: None}, synchronize_session=False)
+        )).update(
+            {models.Script.personaId: None, models.Script.changedAt: int(time.time() * 1000)},
+            synchronize_session=False,
+        )
         db.query(models.Persona).filter(models.Persona.ownerId == user_id).delete(synchronize_session=False)
 
         db.query(models.Script).filter(models.Script.ownerId == user_id).update(
-            {models.Script.seriesId: None, models.Script.seriesOrder: None},
+            {models.Script.seriesId: None, models.Script.seriesOrder: None, models.Script.changedAt: int(time.time() * 1000)},
             synchronize_session=False,
         )
         db.query(models.Series).filter(models.Series.ownerId == user_id).delete(synchronize_session=False)
@@ -484,14 +508,7 @@ def list_all_organizations(
             | models.Organization.id.like(like_q)
             | func.lower(models.Organization.ownerId).like(like_q)
         )
-    rows = query.order_by(models.Organization.updatedAt.desc()).offset(safe_offset).limit(safe_limit).all()
-    for org in rows:
-        if isinstance(org.tags, str):
-            try:
-                org.tags = json.loads(org.tags)
-            except Exception:
-                org.tags = []
-    return rows
+    return query.order_by(models.Organization.updatedAt.desc()).offset(safe_offset).limit(safe_limit).all()
 
 
 @router.get("/all-personas", response_model=List[schemas.Persona])
@@ -515,13 +532,7 @@ def list_all_personas(
             | models.Persona.id.like(like_q)
             | func.lower(models.Persona.ownerId).like(like_q)
         )
-    rows = query.order_by(models.Persona.updatedAt.desc()).offset(safe_offset).limit(safe_limit).all()
-    for p in rows:
-        p.tags = crud._ensure_list(p.tags)
-        p.links = crud._ensure_list(p.links)
-        p.organizationIds = crud._ensure_list(p.organizationIds)
-        p.defaultLicenseSpecialTerms = crud._ensure_list(p.defaultLicenseSpecialTerms)
-    return rows
+    return query.order_by(models.Persona.updatedAt.desc()).offset(safe_offset).limit(safe_limit).all()
 
 
 @router.get("/all-scripts", response_model=List[schemas.ScriptSummary])
@@ -536,7 +547,7 @@ def list_all_scripts(
         raise HTTPException(status_code=403, detail="Not authorized")
     safe_limit = max(1, min(limit, 1000))
     safe_offset = max(offset, 0)
-    query = db.query(models.Script)
+    query = db.query(models.Script).options(orm.defer(models.Script.content))
     normalized_q = (q or "").strip().lower()
     if normalized_q:
         like_q = f"%{normalized_q}%"
@@ -547,7 +558,6 @@ def list_all_scripts(
         )
     rows = query.order_by(models.Script.lastModified.desc()).offset(safe_offset).limit(safe_limit).all()
     for s in rows:
-        setattr(s, "contentLength", len(s.content or ""))
         s.tags = s.tags or []
     return rows
 
@@ -586,11 +596,13 @@ def update_script_metadata_admin(
             )
         else:
             tags = []
+        affected_tags = {tag.id for tag in updated.tags or []} | {tag.id for tag in tags}
         updated.tags = tags
+        db.flush()
+        crud.refresh_tag_usage(db, affected_tags)
         db.commit()
         db.refresh(updated)
 
-    setattr(updated, "contentLength", len(updated.content or ""))
     updated.tags = updated.tags or []
     return updated
 
@@ -606,7 +618,6 @@ def get_script_metadata_admin(
     script = db.query(models.Script).filter(models.Script.id == script_id).first()
     if not script:
         raise HTTPException(status_code=404, detail="Script not found")
-    setattr(script, "contentLength", len(script.content or ""))
     script.tags = script.tags or []
     return script
 
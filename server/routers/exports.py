@@ -0,0 +1,86 @@
+import os
+from typing import List
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+
+import crud_ops as crud
+import schemas
+from dependencies import get_current_user_id, get_db
+from rate_limit import limiter
+from services import export_jobs
+
+router = APIRouter(prefix="/api/export/jobs", tags=["export"])
+
+
+@router.post("", response_model=schemas.ExportJob, status_code=202)
+@limiter.limit("10/minute")
+def create_export_job(
+    request: Request,
+    payload: schemas.ExportJobCreate,
+    db: Session = Depends(get_db),
+    ownerId: str = Depends(get_current_user_id),
+):
+    export_jobs.purge_expired_export_jobs(db)
+    job = crud.create_export_job(db, ownerId, payload.scope, folder=payload.folder, seriesId=payload.seriesId)
+    if not job:
+        raise HTTPException(status_code=400, detail="Invalid export scope")
+    if job.status == "queued":
+        # Also re-kicks a queued job whose worker went away; the worker claims it once.
+        export_jobs.submit_export_job(job.id)
+    return job
+
+
+@router.get("", response_model=List[schemas.ExportJob])
+def list_export_jobs(db: Session = Depends(get_db), ownerId: str = Depends(get_current_user_id)):
+    return crud.list_export_jobs(db, ownerId)
+
+
+@router.get("/{job_id}", response_model=schemas.ExportJob)
+def get_export_job(job_id: str, db: Session = Depends(get_db), ownerId: str = Depends(get_current_user_id)):
+    job = crud.get_export_job(db, job_id, ownerId)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return job
+
+
+@router.get("/{job_id}/download")
+def download_export_job(
+    job_id: str,
+    range_header: str = Header(None, alias="Range"),
+    if_range: str = Header(None, alias="If-Range"),
+    db: Session = Depends(get_db),
+    ownerId: str = Depends(get_current_user_id),
+):
+    job = crud.get_export_job(db, job_id, ownerId)
+    if not job:
+        raise HTTPException(status_code=404, detail="Export job not found")
+    if job.status != "done" or not job.filePath or not os.path.exists(job.filePath):
+        raise HTTPException(status_code=409, detail="Export is not ready")
+
+    size = os.path.getsize(job.filePath)
+    etag = f'"{job.id}-{size}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": f"attachment; filename=scripts_export_{job.id[:8]}.zip",
+    }
+    # A stale validator means the client's partial file is from another archive.
+    if if_range and if_range != etag:
+        range_header = None
+    try:
+        byte_range = export_jobs.parse_byte_range(range_header, size)
+    except ValueError:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+
+    start, end = byte_range if byte_range else (0, size - 1)
+    headers["Content-Length"] = str(end - start + 1 if size else 0)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(
+        export_jobs.iter_file_range(job.filePath, start, end),
+        status_code=206 if byte_range else 200,
+        media_type="application/zip",
+        headers=headers,
+    )
@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, File, Form, HTTPException, UploadFile
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from dependencies import get_current_user_id, get_db, is_admin_user
+from services import metrics
 
 router = APIRouter(prefix="/api/media", tags=["media"])
 
@@ -146,6 +147,8 @@ async def upload_media(
             os.remove(full_path)
         raise HTTPException(status_code=400, detail="Empty upload")
 
+    metrics.media_uploads.inc(content_type=content_type)
+    metrics.media_upload_bytes.inc(total_size, content_type=content_type)
     public_path = f"/media/{safe_owner}/{safe_purpose}/{filename}"
     return {
         "url": public_path,
@@ -1,7 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import List, Optional
 from sqlalchemy.orm import Session
-import json
 import crud_ops as crud
 import schemas
 import models
@@ -13,11 +12,9 @@ router = APIRouter(prefix="/api/organizations", tags=["organizations"])
 def _has_org_access(db: Session, user_id: str, org_id: str) -> bool:
     if crud.is_user_org_member(db, user_id, org_id):
         return True
-    personas = db.query(models.Persona).filter(models.Persona.ownerId == user_id).all()
-    for p in personas:
-        if org_id in crud.get_persona_org_ids(db, p):
-            return True
-    return False
+    persona_ids = [row[0] for row in db.query(models.Persona.id).filter(models.Persona.ownerId == user_id).all()]
+    org_ids = crud.get_loaders(db).persona_org_ids.load_many(persona_ids)
+    return any(org_id in ids for ids in org_ids.values())
 
 
 @router.post("", response_model=schemas.Organization)
@@ -45,11 +42,6 @@ def read_organization(org_id: str, db: Session = Depends(get_db), ownerId: str =
     if not (org.ownerId == ownerId or is_admin_user(db, ownerId)):
         if not _has_org_access(db, ownerId, org_id):
             raise HTTPException(status_code=403, detail="Not authorized")
-    if isinstance(org.tags, str):
-        try:
-            org.tags = json.loads(org.tags)
-        except Exception:
-            org.tags = []
     return org
 
 @router.put("/{org_id}", response_model=schemas.Organization)
@@ -77,6 +69,16 @@ def get_organization_members(org_id: str, db: Session = Depends(get_db), ownerId
     users, personas = crud.get_organization_members(db, org_id)
     return {"users": users, "personas": personas}
 
+@router.get("/{org_id}/readers", response_model=schemas.UniqueReaders)
+def get_organization_readers(org_id: str, days: int = 30, db: Session = Depends(get_db), ownerId: str = Depends(get_current_user_id)):
+    org = db.query(models.Organization).filter(models.Organization.id == org_id).first()
+    if not org:
+        raise HTTPException(status_code=404, detail="Organization not found")
+    if not (org.ownerId == ownerId or is_admin_user(db, ownerId)):
+        if not _has_org_access(db, ownerId, org_id):
+            raise HTTPException(status_code=403, detail="Not authorized")
+    return crud.get_organization_readers(db, org_id, days=days)
+
 @router.post("/{org_id}/transfer")
 def transfer_organization(org_id: str, payload: schemas.OrganizationTransferRequest, db: Session = Depends(get_db), ownerId: str = Depends(get_current_user_id)):
     if is_admin_user(db, ownerId):
@@ -171,12 +173,13 @@ def list_org_invites(org_id: str, db: Session = Depends(get_db), ownerId: str =
     if not (crud.is_user_org_manager(db, ownerId, org_id) or is_admin_user(db, ownerId)):
         raise HTTPException(status_code=403, detail="Not authorized")
     invites = crud.list_org_invites(db, org_id)
+    users = crud.get_loaders(db).users.load_many(
+        [inv.invitedUserId for inv in invites] + [inv.inviterUserId for inv in invites]
+    )
     enriched = []
     for inv in invites:
-        invited = db.query(models.User).filter(models.User.id == inv.invitedUserId).first()
-        inviter = db.query(models.User).filter(models.User.id == inv.inviterUserId).first()
-        inv.invitedUser = invited
-        inv.inviterUser = inviter
+        inv.invitedUser = users.get(inv.invitedUserId)
+        inv.inviterUser = users.get(inv.inviterUserId)
         enriched.append(inv)
     return {"invites": enriched}
 
@@ -185,10 +188,10 @@ def list_org_requests(org_id: str, db: Session = Depends(get_db), ownerId: str =
     if not (crud.is_user_org_manager(db, ownerId, org_id) or is_admin_user(db, ownerId)):
         raise HTTPException(status_code=403, detail="Not authorized")
     reqs = crud.list_org_requests(db, org_id)
+    users = crud.get_loaders(db).users.load_many(req.requesterUserId for req in reqs)
     enriched = []
     for req in reqs:
-        requester = db.query(models.User).filter(models.User.id == req.requesterUserId).first()
-        req.requester = requester
+        req.requester = users.get(req.requesterUserId)
         enriched.append(req)
     return {"requests": enriched}
 
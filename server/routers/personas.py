@@ -40,6 +40,13 @@ def delete_persona(persona_id: str, db: Session = Depends(get_db), current_user:
     crud.delete_persona(db, persona_id)
     return {"success": True}
 
+@router.get("/{persona_id}/readers", response_model=schemas.UniqueReaders)
+def get_persona_readers(persona_id: str, days: int = 30, db: Session = Depends(get_db), current_user: str = Depends(get_current_user_id)):
+    readers = crud.get_persona_readers(db, persona_id, current_user, days=days)
+    if readers is None:
+        raise HTTPException(status_code=404, detail="Persona not found")
+    return readers
+
 @router.post("/{persona_id}/transfer")
 def transfer_persona(persona_id: str, payload: schemas.ScriptTransferRequest, db: Session = Depends(get_db), ownerId: str = Depends(get_current_user_id)):
     # Reusing ScriptTransferRequest because it has 'newOwnerId'. Ideally make a GenericTransferRequest.
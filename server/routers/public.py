@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request
 from typing import List, Optional
 from sqlalchemy import orm
 from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
 import json
 import os
 import time
@@ -10,6 +11,7 @@ import crud_ops as crud
 import schemas
 import models
 from dependencies import get_db
+from services.fast_json import cached_json_response, project, project_many
 
 router = APIRouter(prefix="/api", tags=["public"])
 HOMEPAGE_BANNER_SETTING_KEY = "homepage_banner"
@@ -153,41 +155,30 @@ def _is_publicly_visible_script(db: Session, script: models.Script) -> bool:
 
 
 def _has_public_script_for_persona(db: Session, persona_id: str) -> bool:
-    scripts = db.query(models.Script).filter(models.Script.personaId == persona_id).all()
-    return any(_is_publicly_visible_script(db, script) for script in scripts)
+    return crud.get_loaders(db).persona_has_public_script.load(persona_id)
 
 
 def _has_public_script_for_user_fallback(db: Session, user_id: str) -> bool:
-    scripts = db.query(models.Script).filter(
-        models.Script.ownerId == user_id,
-        models.Script.personaId.is_(None),
-    ).all()
-    return any(_is_publicly_visible_script(db, script) for script in scripts)
+    return crud.get_loaders(db).user_has_public_script.load(user_id)
 
 
 def _has_public_script_for_organization(db: Session, org_id: str) -> bool:
-    scripts = db.query(models.Script).filter(models.Script.organizationId == org_id).all()
-    return any(_is_publicly_visible_script(db, script) for script in scripts)
+    return crud.get_loaders(db).org_has_public_script.load(org_id)
 
 
 def _get_public_org_map(db: Session, org_ids: list[str]) -> dict[str, models.Organization]:
-    if not org_ids:
-        return {}
-    uniq_ids = [oid for oid in dict.fromkeys(org_ids) if oid]
-    if not uniq_ids:
-        return {}
-    orgs = db.query(models.Organization).filter(models.Organization.id.in_(uniq_ids)).all()
-    out = {}
-    for org in orgs:
-        if not _has_public_script_for_organization(db, org.id):
-            continue
-        if isinstance(org.tags, str):
-            try:
-                org.tags = json.loads(org.tags)
-            except Exception:
-                org.tags = []
-        out[org.id] = org
-    return out
+    # Public status and org rows each come from one batched query per request.
+    loaders = crud.get_loaders(db)
+    public = [oid for oid, ok in loaders.org_has_public_script.load_many(org_ids or []).items() if ok]
+    return {oid: org for oid, org in loaders.organizations.load_many(public).items() if org}
+
+
+def public_script_payload(script) -> dict:
+    # Listing card as plain JSON types; the account email never leaves the server.
+    data = project(schemas.PublicScriptSummary, script)
+    if data.get("owner"):
+        data["owner"]["email"] = None
+    return data
 
 
 def sanitize_public_script(script: models.Script):
@@ -313,6 +304,9 @@ def create_public_terms_acceptance(
         },
     )
     db.add(acceptance)
+    if script_id and acceptance.visitorId:
+        # The reader's stable visitor id feeds the script's unique-reader sketch.
+        crud.record_script_readers(db, script_id, [acceptance.visitorId])
     db.commit()
 
     return schemas.PublicTermsAcceptanceResponse(
@@ -321,7 +315,7 @@ def create_public_terms_acceptance(
         acceptedAt=now_ms,
     )
 
-@router.get("/public-scripts", response_model=List[schemas.Script])
+@router.get("/public-scripts", response_model=List[schemas.PublicScriptSummary])
 def read_public_scripts(
     ownerId: Optional[str] = None,
     folder: Optional[str] = None,
@@ -329,14 +323,27 @@ def read_public_scripts(
     organizationId: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
-    scripts = crud.get_public_scripts(
-        db,
-        ownerId=ownerId,
-        folder=folder,
-        personaId=personaId,
-        organizationId=organizationId
-    )
-    return [sanitize_public_script(s) for s in scripts]
+    def build():
+        scripts = crud.get_public_scripts(
+            db,
+            ownerId=ownerId,
+            folder=folder,
+            personaId=personaId,
+            organizationId=organizationId
+        )
+        return [public_script_payload(s) for s in scripts]
+
+    # Rendered straight to bytes (no response_model revalidation) and cached briefly.
+    return cached_json_response(("public-scripts", ownerId, folder, personaId, organizationId), build)
+
+@router.get("/public-trending", response_model=List[schemas.PublicScriptSummary])
+def read_trending_scripts(limit: int = 20, db: Session = Depends(get_db)):
+    limit = max(1, min(limit, 100))
+
+    def build():
+        return [public_script_payload(s) for s in crud.get_trending_public_scripts(db, limit=limit)]
+
+    return cached_json_response(("public-trending", limit), build)
 
 @router.get("/public-scripts/{script_id}", response_model=schemas.Script)
 def read_public_script(script_id: str, db: Session = Depends(get_db)):
@@ -355,51 +362,7 @@ def read_public_script(script_id: str, db: Session = Depends(get_db)):
             raise HTTPException(status_code=404, detail="Script is private")
         if script.folder != "/" and not _has_public_parent_folder(db, script):
             raise HTTPException(status_code=404, detail="Script is private")
-         
 
-    # Normalize nested JSON fields because this route reads ORM objects directly.
-    # Keep parsing inline here to avoid coupling this router to private helper functions.
-    
-    if script.persona:
-        if isinstance(script.persona.tags, str):
-            try:
-                script.persona.tags = json.loads(script.persona.tags)
-            except:
-                script.persona.tags = []
-        # Double encoded check
-        if isinstance(script.persona.tags, str):
-             try: script.persona.tags = json.loads(script.persona.tags)
-             except: pass
-             
-        if isinstance(script.persona.links, str):
-            try:
-                script.persona.links = json.loads(script.persona.links)
-            except:
-                script.persona.links = []
-
-        if isinstance(script.persona.organizationIds, str):
-            try:
-                script.persona.organizationIds = json.loads(script.persona.organizationIds)
-            except:
-                script.persona.organizationIds = []
-
-        if isinstance(script.persona.defaultLicenseSpecialTerms, str):
-             try:
-                 script.persona.defaultLicenseSpecialTerms = json.loads(script.persona.defaultLicenseSpecialTerms)
-             except:
-                 script.persona.defaultLicenseSpecialTerms = []
-             # Double check
-             if isinstance(script.persona.defaultLicenseSpecialTerms, str):
-                  try: script.persona.defaultLicenseSpecialTerms = json.loads(script.persona.defaultLicenseSpecialTerms)
-                  except: pass
-             
-    if script.organization:
-        if isinstance(script.organization.tags, str):
-            try:
-                script.organization.tags = json.loads(script.organization.tags)
-            except:
-                script.organization.tags = []
-    
     return sanitize_public_script(script)
 
 @router.get("/public-scripts/{script_id}/raw")
@@ -429,15 +392,10 @@ def get_public_persona(persona_id: str, db: Session = Depends(get_db)):
     if persona:
         if not _has_public_script_for_persona(db, persona.id):
             raise HTTPException(status_code=404, detail="Author not found")
-        persona.organizationIds = crud.get_persona_org_ids(db, persona)
-        persona.tags = crud._ensure_list(persona.tags)
-        persona.links = crud._ensure_list(persona.links)
-        persona.defaultLicenseSpecialTerms = crud._ensure_list(persona.defaultLicenseSpecialTerms)
-        orgs = []
-        if persona.organizationIds:
-            org_map = _get_public_org_map(db, persona.organizationIds)
-            orgs = [org_map[oid] for oid in persona.organizationIds if oid in org_map]
-            persona.organizationIds = [oid for oid in persona.organizationIds if oid in org_map]
+        org_ids = crud.get_loaders(db).persona_org_ids.load(persona.id)
+        org_map = _get_public_org_map(db, org_ids)
+        orgs = [org_map[oid] for oid in org_ids if oid in org_map]
+        set_committed_value(persona, "organizationIds", [oid for oid in org_ids if oid in org_map])
         result = schemas.PersonaPublic.model_validate(persona)
         result.organizations = orgs
         return result
@@ -452,13 +410,16 @@ def get_public_persona(persona_id: str, db: Session = Depends(get_db)):
     raise HTTPException(status_code=404, detail="Author not found")
 
 @router.get("/public-personas", response_model=List[schemas.PersonaPublic])
-def list_public_personas(db: Session = Depends(get_db)):
+def read_public_personas(db: Session = Depends(get_db)):
+    return cached_json_response(("public-personas",), lambda: list_public_personas(db))
+
+def list_public_personas(db: Session):
     # Return personas that have at least one publicly visible script
-    persona_ids = []
-    for row in db.query(models.Script.personaId).filter(models.Script.personaId.isnot(None)).distinct().all():
-        persona_id = row[0]
-        if persona_id and _has_public_script_for_persona(db, persona_id):
-            persona_ids.append(persona_id)
+    loaders = crud.get_loaders(db)
+    candidate_ids = [
+        row[0] for row in db.query(models.Script.personaId).filter(models.Script.personaId.isnot(None)).distinct().all()
+    ]
+    persona_ids = [pid for pid, ok in loaders.persona_has_public_script.load_many(candidate_ids).items() if ok]
 
     if not persona_ids:
         return []
@@ -466,24 +427,14 @@ def list_public_personas(db: Session = Depends(get_db)):
     personas = db.query(models.Persona).filter(models.Persona.id.in_(persona_ids)).all()
     results = []
 
-    all_org_ids = set()
-    persona_org_map = {}
-    for p in personas:
-        p.organizationIds = crud.get_persona_org_ids(db, p)
-        p.tags = crud._ensure_list(p.tags)
-        p.links = crud._ensure_list(p.links)
-        p.defaultLicenseSpecialTerms = crud._ensure_list(p.defaultLicenseSpecialTerms)
-        org_ids = p.organizationIds or []
-        persona_org_map[p.id] = org_ids
-        all_org_ids.update(org_ids)
-
-    org_map = _get_public_org_map(db, list(all_org_ids))
+    persona_org_map = loaders.persona_org_ids.load_many(p.id for p in personas)
+    org_map = _get_public_org_map(db, [oid for org_ids in persona_org_map.values() for oid in org_ids])
 
     for p in personas:
         visible_org_ids = [oid for oid in persona_org_map.get(p.id, []) if oid in org_map]
-        p.organizationIds = visible_org_ids
-        result = schemas.PersonaPublic.model_validate(p)
-        result.organizations = [org_map[oid] for oid in visible_org_ids]
+        set_committed_value(p, "organizationIds", visible_org_ids)
+        result = project(schemas.PersonaPublic, p)
+        result["organizations"] = project_many(schemas.Organization, [org_map[oid] for oid in visible_org_ids])
         results.append(result)
     return results
 
@@ -494,42 +445,19 @@ def get_public_organization(org_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Organization not found")
     if not _has_public_script_for_organization(db, org_id):
         raise HTTPException(status_code=404, detail="Organization not found")
-    if isinstance(org.tags, str):
-        try:
-            org.tags = json.loads(org.tags)
-        except Exception:
-            org.tags = []
     all_personas = db.query(models.Persona).all()
     persona_memberships = db.query(models.PersonaOrganizationMembership).filter(
         models.PersonaOrganizationMembership.orgId == org_id
     ).all()
     persona_ids_via_membership = {row.personaId for row in persona_memberships}
-    members = []
-    for p in all_personas:
-        org_ids = crud.get_persona_org_ids(db, p)
-        if isinstance(p.tags, str):
-            try:
-                p.tags = json.loads(p.tags)
-            except Exception:
-                p.tags = []
-        if isinstance(p.organizationIds, str):
-            try:
-                p.organizationIds = json.loads(p.organizationIds)
-            except Exception:
-                p.organizationIds = []
-        if isinstance(p.links, str):
-            try:
-                p.links = json.loads(p.links)
-            except Exception:
-                p.links = []
-        if isinstance(p.defaultLicenseSpecialTerms, str):
-            try:
-                p.defaultLicenseSpecialTerms = json.loads(p.defaultLicenseSpecialTerms)
-            except Exception:
-                p.defaultLicenseSpecialTerms = []
-        if p.id in persona_ids_via_membership or (org_ids and org_id in org_ids):
-            if _has_public_script_for_persona(db, p.id):
-                members.append(p)
+    loaders = crud.get_loaders(db)
+    persona_org_map = loaders.persona_org_ids.load_many(p.id for p in all_personas)
+    linked = [
+        p for p in all_personas
+        if p.id in persona_ids_via_membership or org_id in persona_org_map.get(p.id, [])
+    ]
+    public = loaders.persona_has_public_script.load_many(p.id for p in linked)
+    members = [p for p in linked if public.get(p.id)]
     # Avoid validating org.members (User objects) against Persona schema
     try:
         org.members = []
@@ -540,7 +468,10 @@ def get_public_organization(org_id: str, db: Session = Depends(get_db)):
     return result
 
 @router.get("/public-organizations", response_model=List[schemas.OrganizationPublic])
-def list_public_organizations(db: Session = Depends(get_db)):
+def read_public_organizations(db: Session = Depends(get_db)):
+    return cached_json_response(("public-organizations",), lambda: list_public_organizations(db))
+
+def list_public_organizations(db: Session):
     # Return organizations that have at least one publicly visible script.
     org_ids = {
         row[0]
@@ -549,24 +480,13 @@ def list_public_organizations(db: Session = Depends(get_db)):
         .all()
         if row and row[0]
     }
-    orgs = [
-        org
-        for org in db.query(models.Organization).filter(models.Organization.id.in_(list(org_ids))).all()
-        if _has_public_script_for_organization(db, org.id)
-    ]
+    org_map = _get_public_org_map(db, sorted(org_ids))
+    orgs = list(org_map.values())
     results = []
     for org in orgs:
-        if isinstance(org.tags, str):
-            try:
-                org.tags = json.loads(org.tags)
-            except Exception:
-                org.tags = []
-        try:
-            org.members = []
-        except Exception:
-            pass
-        result = schemas.OrganizationPublic.model_validate(org)
-        result.members = []
+        # Members are not listed here; projecting them would lazy-load each org's users.
+        result = project(schemas.Organization, org)
+        result["members"] = []
         results.append(result)
     return results
 
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 import crud_ops as crud
-import schemas
 from dependencies import get_db
 from routers import public as public_router
+from services.fast_json import cached_json_response
 
 router = APIRouter(prefix="/api", tags=["public"])
 
@@ -13,7 +13,6 @@ def _serialize_bundle_script(script):
         "id",
         "ownerId",
         "title",
-        "content",
         "createdAt",
         "lastModified",
         "isPublic",
@@ -22,25 +21,15 @@ def _serialize_bundle_script(script):
         "sortOrder",
     )
     if not all(hasattr(script, key) for key in required):
-        # Keep lightweight stubs used in tests for topTags calculation.
-        return script
+        # Lightweight stubs (tests for the topTags fallback) still count towards
+        # tags but are not serialized.
+        return None
 
-    data = schemas.Script.model_validate(script).model_dump()
-    owner = data.get("owner") or {}
-    if owner:
-        owner["email"] = None
-        data["owner"] = owner
-    return data
+    return public_router.public_script_payload(script)
 
 
-@router.get("/public-bundle")
-def public_bundle(db: Session = Depends(get_db)):
-    # Reuse existing public endpoints for consistency
-    scripts = [public_router.sanitize_public_script(s) for s in crud.get_public_scripts(db)]
-    serialized_scripts = [_serialize_bundle_script(s) for s in scripts]
-    personas = public_router.list_public_personas(db)
-    orgs = public_router.list_public_organizations(db)
-    # Compute top tags by total views (descending), fallback to count if views missing.
+def _top_tags_from_scripts(scripts):
+    # Score by total views (descending), fallback to count if views missing.
     tag_scores = {}
     for script in scripts or []:
         views = getattr(script, "views", 0) or 0
@@ -50,10 +39,29 @@ def public_bundle(db: Session = Depends(get_db)):
             if not name:
                 continue
             tag_scores[name] = tag_scores.get(name, 0) + (views if views > 0 else 1)
-    top_tags = [name for name, _ in sorted(tag_scores.items(), key=lambda kv: kv[1], reverse=True)[:5]]
+    return [name for name, _ in sorted(tag_scores.items(), key=lambda kv: kv[1], reverse=True)[:5]]
+
+
+@router.get("/public-bundle")
+def public_bundle(db: Session = Depends(get_db)):
+    return cached_json_response(("public-bundle",), lambda: _build_public_bundle(db))
+
+
+def _build_public_bundle(db: Session):
+    # Reuse existing public endpoints for consistency
+    scripts = crud.get_public_scripts(db)
+    serialized_scripts = [p for p in (_serialize_bundle_script(s) for s in scripts) if p is not None]
+    personas = public_router.list_public_personas(db)
+    orgs = public_router.list_public_organizations(db)
+    # Top tags come from the precomputed ranking over the whole public catalogue.
+    # Before the first refresh, fall back to scoring the scripts in this bundle.
+    top_tags = crud.get_top_tag_names(db, limit=5)
+    if not top_tags:
+        top_tags = _top_tags_from_scripts(scripts)
     return {
         "scripts": serialized_scripts,
         "personas": personas,
         "organizations": orgs,
         "topTags": top_tags,
+        "trendingScriptIds": crud.get_trending_script_ids(db, limit=10),
     }
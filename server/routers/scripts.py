@@ -1,17 +1,20 @@
-from fastapi import APIRouter, Depends, Header, HTTPException, Response, Request
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Response, Request, UploadFile
 from typing import List, Optional
+import hashlib
 from sqlalchemy.orm import Session
 from fastapi.responses import StreamingResponse
-import io
-import zipfile
 import crud_ops as crud
 import schemas
 import models
-from dependencies import get_db, get_current_user_id, is_admin_user
-from rate_limit import limiter
+from dependencies import get_db, get_current_user_id, get_session_factory, is_admin_user
+from rate_limit import get_client_ip, limiter
+from services.export_archive import iter_export_entries, stream_zip
+from services.import_archive import ArchiveError, read_archive
 
 router = APIRouter(prefix="/api/scripts", tags=["scripts"])
 
+LIKED_STATUS_MAX_IDS = 200
+
 @router.get("", response_model=List[schemas.ScriptSummary])
 def read_scripts(
     ownerId: str = Depends(get_current_user_id),
@@ -21,6 +24,55 @@ def read_scripts(
     effective_owner_id = ownerIdQuery if ownerIdQuery and is_admin_user(db, ownerId) else ownerId
     return crud.get_scripts(db, ownerId=effective_owner_id)
 
+@router.get("/sync", response_model=schemas.ScriptSyncResponse)
+def sync_scripts(
+    since: Optional[int] = None,
+    ownerId: str = Depends(get_current_user_id),
+    ownerIdQuery: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    effective_owner_id = ownerIdQuery if ownerIdQuery and is_admin_user(db, ownerId) else ownerId
+    return crud.get_library_changes(db, effective_owner_id, since=since)
+
+@router.get("/engagement", response_model=schemas.OwnerEngagement)
+def read_owner_engagement(
+    days: int = 30,
+    ownerId: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    return crud.get_owner_engagement(db, ownerId, days=days)
+
+@router.get("/liked-status", response_model=schemas.ScriptLikedStatus)
+def read_liked_status(
+    ids: str = "",
+    ownerId: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    script_ids = [i for i in (part.strip() for part in ids.split(",")) if i]
+    if len(script_ids) > LIKED_STATUS_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {LIKED_STATUS_MAX_IDS} ids per request")
+    liked = crud.get_liked_script_ids(db, ownerId, script_ids)
+    return {"liked": {script_id: script_id in liked for script_id in script_ids}}
+
+@router.post("/import", response_model=schemas.ScriptImportResponse)
+@limiter.limit("5/minute")
+def import_scripts(
+    request: Request,
+    file: UploadFile = File(...),
+    folder: str = Form("/"),
+    ownerId: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    try:
+        files, skipped = read_archive(file.file, base_folder=folder)
+    except ArchiveError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    imported = crud.import_scripts(db, ownerId, files)
+    if imported is None:
+        raise HTTPException(status_code=500, detail="Import failed")
+    return {"imported": len(imported), "skipped": len(skipped), "results": imported + skipped}
+
 @router.post("", response_model=schemas.Script)
 def create_script(script: schemas.ScriptCreate, db: Session = Depends(get_db), ownerId: str = Depends(get_current_user_id)):
     return crud.create_script(db=db, script=script, ownerId=ownerId)
@@ -33,6 +85,17 @@ def reorder_scripts(payload: schemas.ScriptReorderRequest, db: Session = Depends
         raise HTTPException(status_code=500, detail="Failed to reorder scripts")
     return {"success": True}
 
+@router.put("/{script_id}/move")
+def move_script(script_id: str, payload: schemas.ScriptMoveRequest, db: Session = Depends(get_db), ownerId: str = Depends(get_current_user_id)):
+    status, moved = crud.move_script(db, script_id, ownerId, beforeId=payload.beforeId, afterId=payload.afterId)
+    if status == "not_found":
+        raise HTTPException(status_code=404, detail="Script not found")
+    if status == "neighbour_not_found":
+        raise HTTPException(status_code=404, detail="Neighbour script not found")
+    if status == "invalid":
+        raise HTTPException(status_code=400, detail="Neighbours must be other scripts in the same folder")
+    return {"success": True, "id": moved.id, "sortOrder": moved.sortOrder}
+
 @router.get("/{script_id}", response_model=schemas.Script)
 def read_script(script_id: str, ownerId: str = Depends(get_current_user_id), db: Session = Depends(get_db)):
     db_script = crud.get_script(db, script_id=script_id, ownerId=ownerId)
@@ -42,10 +105,57 @@ def read_script(script_id: str, ownerId: str = Depends(get_current_user_id), db:
 
 @router.put("/{script_id}")
 def update_script(script_id: str, script: schemas.ScriptUpdate, db: Session = Depends(get_db), ownerId: str = Depends(get_current_user_id)):
-    updated = crud.update_script(db, script_id, script, ownerId)
+    try:
+        updated = crud.update_script(db, script_id, script, ownerId)
+    except crud.RevisionConflict as e:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Revision conflict", "revision": e.revision},
+        )
     if not updated:
         raise HTTPException(status_code=404, detail="Script not found")
-    return {"success": True, "lastModified": updated.lastModified}
+    return {"success": True, "lastModified": updated.lastModified, "revision": updated.revision or 0}
+
+@router.patch("/{script_id}/content")
+def patch_script_content(script_id: str, patch: schemas.ScriptContentPatch, db: Session = Depends(get_db), ownerId: str = Depends(get_current_user_id)):
+    status, script = crud.patch_script_content(db, script_id, patch, ownerId)
+    if status == "not_found":
+        raise HTTPException(status_code=404, detail="Script not found")
+    if status == "conflict":
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Revision conflict", "revision": script.revision or 0},
+        )
+    if status == "invalid":
+        raise HTTPException(status_code=422, detail="Edits do not apply to base revision")
+    return {"success": True, "revision": script.revision or 0, "lastModified": script.lastModified}
+
+@router.get("/{script_id}/revisions", response_model=List[schemas.ScriptRevisionSummary])
+def list_script_revisions(script_id: str, db: Session = Depends(get_db), ownerId: str = Depends(get_current_user_id)):
+    revisions = crud.list_script_revisions(db, script_id, ownerId)
+    if revisions is None:
+        raise HTTPException(status_code=404, detail="Script not found")
+    return revisions
+
+@router.get("/{script_id}/revisions/diff", response_model=schemas.ScriptRevisionDiff)
+def diff_script_revisions(
+    script_id: str,
+    fromRevision: int,
+    toRevision: int,
+    db: Session = Depends(get_db),
+    ownerId: str = Depends(get_current_user_id),
+):
+    diff = crud.diff_script_revisions(db, script_id, fromRevision, toRevision, ownerId)
+    if diff is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return diff
+
+@router.get("/{script_id}/revisions/{revision}", response_model=schemas.ScriptRevisionContent)
+def read_script_revision(script_id: str, revision: int, db: Session = Depends(get_db), ownerId: str = Depends(get_current_user_id)):
+    found = crud.get_script_revision(db, script_id, revision, ownerId)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Revision not found")
+    return found
 
 @router.delete("/{script_id}")
 def delete_script(script_id: str, db: Session = Depends(get_db), ownerId: str = Depends(get_current_user_id)):
@@ -66,9 +176,43 @@ def transfer_script(script_id: str, payload: schemas.ScriptTransferRequest, db:
 
 # Engagement
 @router.post("/{script_id}/view")
-def increment_view(script_id: str, db: Session = Depends(get_db)):
-    crud.increment_script_view(db, script_id)
-    return {"success": True}
+def increment_view(
+    script_id: str,
+    request: Request,
+    payload: Optional[schemas.ScriptViewEvent] = None,
+    db: Session = Depends(get_db)
+):
+    visitor_id = ((payload.visitorId if payload else None) or "").strip()[:128]
+    if not visitor_id:
+        # Anonymous callers without a visitor id are deduplicated per client IP + UA.
+        ua = request.headers.get("user-agent") or ""
+        visitor_id = "anon:" + hashlib.sha1(f"{get_client_ip(request)}|{ua}".encode("utf-8")).hexdigest()
+    counted = crud.increment_script_view(db, script_id, visitor_id)
+    return {"success": True, "counted": counted}
+
+@router.get("/{script_id}/engagement", response_model=schemas.ScriptEngagement)
+def read_script_engagement(
+    script_id: str,
+    days: int = 30,
+    ownerId: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    stats = crud.get_script_engagement(db, script_id, ownerId, days=days)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Script not found")
+    return stats
+
+@router.get("/{script_id}/readers", response_model=schemas.UniqueReaders)
+def read_script_readers(
+    script_id: str,
+    days: int = 30,
+    ownerId: str = Depends(get_current_user_id),
+    db: Session = Depends(get_db)
+):
+    readers = crud.get_script_readers(db, script_id, ownerId, days=days)
+    if readers is None:
+        raise HTTPException(status_code=404, detail="Script not found")
+    return readers
 
 @router.post("/{script_id}/like")
 def toggle_like(script_id: str, db: Session = Depends(get_db), ownerId: str = Depends(get_current_user_id)):
@@ -91,32 +235,18 @@ export_router = APIRouter(tags=["export"])
 def export_all_scripts(
     request: Request,
     ownerId: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    session_factory=Depends(get_session_factory),
 ):
-    scripts = crud.get_scripts(db, ownerId)
-    
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED, False) as zip_file:
-        for s in scripts:
-            if s.type == 'script':
-                # Sanitization
-                safe_title = "".join(c for c in s.title if c.isalnum() or c in (' ', '-', '_')).strip()
-                filename = f"{safe_title}.fountain"
-                
-                # Folder path
-                folder = s.folder.strip('/')
-                if folder:
-                    safe_folder = "/".join(["".join(c for c in part if c.isalnum() or c in (' ', '-', '_')).strip() for part in folder.split('/')])
-                    full_path = f"{safe_folder}/{filename}"
-                else:
-                    full_path = filename
-                
-                zip_file.writestr(full_path, s.content or "")
-    
-    zip_buffer.seek(0)
+    def archive():
+        db = session_factory()
+        try:
+            yield from stream_zip(iter_export_entries(db, ownerId))
+        finally:
+            db.close()
+
     return StreamingResponse(
-        zip_buffer, 
-        media_type="application/zip", 
+        archive(),
+        media_type="application/zip",
         headers={"Content-Disposition": "attachment; filename=scripts_backup.zip"}
     )
 
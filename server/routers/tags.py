@@ -8,6 +8,8 @@ from dependencies import get_db, get_current_user_id, is_admin_user
 
 router = APIRouter(prefix="/api", tags=["tags"])
 
+BULK_TAG_MAX_SCRIPTS = 1000
+
 @router.get("/tags", response_model=List[schemas.Tag])
 def read_tags(
     ownerIdQuery: str | None = None,
@@ -35,6 +37,27 @@ def delete_tag(tag_id: int, db: Session = Depends(get_db), ownerId: str = Depend
     crud.delete_tag(db, tag_id, ownerId)
     return {"success": True}
 
+@router.post("/scripts/tags/bulk", response_model=schemas.ScriptTagsBulkResult)
+def bulk_update_tags(
+    payload: schemas.ScriptTagsBulkUpdate,
+    ownerIdQuery: str | None = None,
+    db: Session = Depends(get_db),
+    ownerId: str = Depends(get_current_user_id),
+):
+    if len(payload.scriptIds) > BULK_TAG_MAX_SCRIPTS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_TAG_MAX_SCRIPTS} scripts per request")
+    effective_owner = ownerIdQuery if ownerIdQuery and is_admin_user(db, ownerId) else ownerId
+    result = crud.bulk_update_script_tags(
+        db,
+        effective_owner,
+        payload.scriptIds,
+        add_tag_ids=payload.addTagIds,
+        remove_tag_ids=payload.removeTagIds,
+    )
+    if result is None:
+        raise HTTPException(status_code=404, detail="Script or tag not found")
+    return result
+
 @router.post("/scripts/{script_id}/tags")
 def attach_tag(script_id: str, payload: dict, db: Session = Depends(get_db), ownerId: str = Depends(get_current_user_id)):
     tag_id = payload.get("tagId")
@@ -10,9 +10,20 @@ class TagBase(BaseModel):
 class TagCreate(TagBase):
     pass
 
+class ScriptTagsBulkUpdate(BaseModel):
+    scriptIds: List[str]
+    addTagIds: List[int] = []
+    removeTagIds: List[int] = []
+
+class ScriptTagsBulkResult(BaseModel):
+    added: int = 0 # Links created
+    removed: int = 0 # Links deleted
+    scripts: int = 0 # Scripts whose tags changed
+
 class Tag(TagBase):
     id: int
     ownerId: str
+    usageCount: int = 0
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -259,6 +270,33 @@ class ScriptUpdate(BaseModel):
     licenseNotify: Optional[str] = None
     customMetadata: Optional[List[Dict[str, Any]]] = None
 
+class ScriptTextEdit(BaseModel):
+    start: int # UTF-16 code unit offset in the base content (JS string index)
+    end: int # Exclusive; start == end inserts
+    text: str = ""
+
+class ScriptContentPatch(BaseModel):
+    baseRevision: int
+    edits: List[ScriptTextEdit] = []
+
+class ScriptRevisionSummary(BaseModel):
+    revision: int
+    kind: str
+    contentLength: int = 0
+    storedBytes: int = 0
+    authorId: Optional[str] = None
+    createdAt: int
+
+class ScriptRevisionContent(BaseModel):
+    revision: int
+    content: str
+    createdAt: int
+
+class ScriptRevisionDiff(BaseModel):
+    fromRevision: int
+    toRevision: int
+    diff: str
+
 class ScriptReorderItem(BaseModel):
     id: str
     sortOrder: float
@@ -266,11 +304,17 @@ class ScriptReorderItem(BaseModel):
 class ScriptReorderRequest(BaseModel):
     items: List[ScriptReorderItem]
 
+class ScriptMoveRequest(BaseModel):
+    beforeId: Optional[str] = None # Sibling that should end up directly above the moved item
+    afterId: Optional[str] = None # Sibling that should end up directly below the moved item
+
 class Script(BaseModel):
     id: str
     ownerId: str
     title: str
     content: str
+    contentLength: Optional[int] = 0
+    contentHash: Optional[str] = None
     customMetadata: List[Dict[str, Any]] = []
     createdAt: int
     lastModified: int
@@ -299,6 +343,7 @@ class Script(BaseModel):
     seriesId: Optional[str] = None
     seriesOrder: Optional[int] = None
     series: Optional[Series] = None
+    revision: Optional[int] = 0
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -307,6 +352,7 @@ class ScriptSummary(BaseModel):
     ownerId: str
     title: str
     contentLength: Optional[int] = 0
+    contentHash: Optional[str] = None
     customMetadata: List[Dict[str, Any]] = []
     # content excluded
     createdAt: int
@@ -330,6 +376,128 @@ class ScriptSummary(BaseModel):
     seriesId: Optional[str] = None
     seriesOrder: Optional[int] = None
     series: Optional[Series] = None
+    revision: Optional[int] = 0
+    changedAt: Optional[int] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class PublicScriptSummary(BaseModel):
+    # Public listing card: no content, the stored excerpt/length/duration instead.
+    id: str
+    ownerId: str
+    title: str
+    excerpt: Optional[str] = ""
+    contentLength: Optional[int] = 0
+    durationMinutes: Optional[float] = 0.0
+    customMetadata: List[Dict[str, Any]] = []
+    createdAt: int
+    lastModified: int
+    author: Optional[str] = None
+    draftDate: Optional[str] = None
+    isPublic: int
+    status: Optional[str] = "Private"
+    coverUrl: Optional[str] = None
+    views: int = 0
+    likes: int = 0
+    type: str
+    folder: str
+    sortOrder: float
+    markerThemeId: Optional[str] = None
+    tags: List[Tag] = []
+    organizationId: Optional[str] = None
+    organization: Optional[Organization] = None
+    personaId: Optional[str] = None
+    persona: Optional[Persona] = None
+    owner: Optional[UserPublic] = None
+    disableCopy: bool = False
+    licenseCommercial: Optional[str] = ""
+    licenseDerivative: Optional[str] = ""
+    licenseNotify: Optional[str] = ""
+    seriesId: Optional[str] = None
+    seriesOrder: Optional[int] = None
+    series: Optional[Series] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ScriptSyncResponse(BaseModel):
+    cursor: int # Pass back as `since` on the next sync
+    full: bool = False # True when the client must replace its whole library
+    upserts: List[ScriptSummary] = []
+    deletes: List[str] = []
+
+class EngagementPoint(BaseModel):
+    day: str # UTC, YYYY-MM-DD
+    views: int = 0
+    likes: int = 0
+    unlikes: int = 0
+
+class EngagementTotals(BaseModel):
+    views: int = 0
+    likes: int = 0
+    unlikes: int = 0
+
+class ScriptEngagement(BaseModel):
+    scriptId: str
+    days: List[EngagementPoint]
+    totals: EngagementTotals
+
+class EngagementTopScript(BaseModel):
+    id: str
+    title: Optional[str] = None
+    views: int = 0
+    likes: int = 0
+
+class OwnerEngagement(BaseModel):
+    days: List[EngagementPoint]
+    totals: EngagementTotals
+    topScripts: List[EngagementTopScript] = []
+
+class UniqueReadersPoint(BaseModel):
+    day: str # UTC, YYYY-MM-DD
+    uniqueReaders: int = 0
+
+class UniqueReaders(BaseModel):
+    scope: str # script, persona, organization
+    id: str
+    uniqueReaders: int = 0 # Distinct visitors over the whole window (HyperLogLog estimate)
+    days: List[UniqueReadersPoint]
+
+class ScriptLikedStatus(BaseModel):
+    liked: Dict[str, bool] # Script id -> liked by the current user
+
+class ScriptViewEvent(BaseModel):
+    visitorId: Optional[str] = None
+
+class ScriptImportResult(BaseModel):
+    path: str
+    status: str # imported, skipped
+    id: Optional[str] = None
+    title: Optional[str] = None
+    folder: Optional[str] = None
+    reason: Optional[str] = None
+
+class ScriptImportResponse(BaseModel):
+    imported: int
+    skipped: int
+    results: List[ScriptImportResult]
+
+class ExportJobCreate(BaseModel):
+    scope: Literal["account", "folder", "series"] = "account"
+    folder: Optional[str] = None
+    seriesId: Optional[str] = None
+
+class ExportJob(BaseModel):
+    id: str
+    scope: str
+    folder: Optional[str] = None
+    seriesId: Optional[str] = None
+    status: str # queued, running, done, failed
+    total: int = 0
+    processed: int = 0
+    sizeBytes: Optional[int] = None
+    error: Optional[str] = None
+    createdAt: Optional[int] = None
+    updatedAt: Optional[int] = None
 
     model_config = ConfigDict(from_attributes=True)
 
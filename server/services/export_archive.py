@@ -0,0 +1,105 @@
+import io
+import os
+import time
+import zipfile
+from typing import Iterable, Iterator, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+import models
+from crud_ops.scripts_command import _folder_descendants_filter
+
+# Scripts are read in keyset-paginated batches so only one batch of content is
+# ever held in memory, regardless of how large the account is.
+EXPORT_BATCH_SIZE = max(1, int(os.getenv("EXPORT_BATCH_SIZE", "200")))
+
+
+def sanitize_path_part(text: str) -> str:
+    return "".join(c for c in (text or "") if c.isalnum() or c in (" ", "-", "_")).strip()
+
+
+def script_archive_path(title: str, folder: Optional[str]) -> str:
+    filename = f"{sanitize_path_part(title)}.fountain"
+    folder = (folder or "").strip("/")
+    if not folder:
+        return filename
+    safe_folder = "/".join(sanitize_path_part(part) for part in folder.split("/"))
+    return f"{safe_folder}/{filename}"
+
+
+def _export_query(db: Session, columns, owner_id: str, folder: Optional[str], series_id: Optional[str]):
+    query = db.query(*columns).filter(models.Script.ownerId == owner_id, models.Script.type == "script")
+    if folder:
+        folder = "/" + folder.strip("/")
+        if folder != "/":
+            query = query.filter(_folder_descendants_filter(folder))
+    if series_id:
+        query = query.filter(models.Script.seriesId == series_id)
+    return query
+
+
+def iter_export_entries(
+    db: Session,
+    owner_id: str,
+    folder: Optional[str] = None,
+    series_id: Optional[str] = None,
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> Iterator[Tuple[str, str]]:
+    columns = (models.Script.id, models.Script.title, models.Script.folder, models.Script.content)
+    query = _export_query(db, columns, owner_id, folder, series_id)
+    last_id = None
+    while True:
+        page = query
+        if last_id is not None:
+            page = page.filter(models.Script.id > last_id)
+        rows = page.order_by(models.Script.id.asc()).limit(batch_size).all()
+        if not rows:
+            return
+        for row in rows:
+            yield script_archive_path(row.title, row.folder), row.content or ""
+        last_id = rows[-1].id
+        if len(rows) < batch_size:
+            return
+
+
+def count_export_entries(db: Session, owner_id: str, folder: Optional[str] = None, series_id: Optional[str] = None) -> int:
+    return _export_query(db, (models.Script.id,), owner_id, folder, series_id).count()
+
+
+class _ChunkSink(io.RawIOBase):
+    # Write-only, non-seekable target: zipfile falls back to data descriptors and
+    # we hand every flushed chunk straight to the response.
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries: Iterable[Tuple[str, str]]) -> Iterator[bytes]:
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as archive:
+        for path, content in entries:
+            info = zipfile.ZipInfo(path, date_time=time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, content)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    tail = sink.drain()
+    if tail:
+        yield tail
@@ -0,0 +1,167 @@
+import logging
+import multiprocessing
+import os
+import re
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+import crud_ops as crud
+import database
+import models
+from services.export_archive import EXPORT_BATCH_SIZE, count_export_entries, iter_export_entries, stream_zip
+
+EXPORT_JOB_WORKERS = max(1, int(os.getenv("EXPORT_JOB_WORKERS", "1")))
+EXPORT_JOB_TTL_MS = int(os.getenv("EXPORT_JOB_TTL_HOURS", "24")) * 60 * 60 * 1000
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+EXPORT_FAILED_ERROR = "Export failed"
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def export_storage_root() -> str:
+    root = os.getenv("EXPORT_STORAGE_ROOT", "/data/exports")
+    try:
+        os.makedirs(root, exist_ok=True)
+        return root
+    except (PermissionError, OSError):
+        fallback = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "data", "exports"))
+        os.makedirs(fallback, exist_ok=True)
+        return fallback
+
+
+def _init_worker():
+    # Never reuse connections inherited from the parent process.
+    database.engine.dispose(close=False)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=EXPORT_JOB_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+        return _executor
+
+
+def submit_export_job(job_id: str):
+    _get_executor().submit(run_export_job, job_id)
+
+
+def run_export_job(job_id: str, db: Optional[Session] = None):
+    own_session = db is None
+    if own_session:
+        db = database.SessionLocal()
+    tmp_path = None
+    try:
+        # Claim the job atomically so a re-submitted job is only ever built once.
+        claimed = db.query(models.ExportJob).filter(
+            models.ExportJob.id == job_id,
+            models.ExportJob.status == "queued",
+        ).update(
+            {models.ExportJob.status: "running", models.ExportJob.updatedAt: int(time.time() * 1000)},
+            synchronize_session=False,
+        )
+        db.commit()
+        if not claimed:
+            return
+        job = db.query(models.ExportJob).filter(models.ExportJob.id == job_id).first()
+        owner_id, folder, series_id = job.ownerId, job.folder, job.seriesId
+        total = count_export_entries(db, owner_id, folder=folder, series_id=series_id)
+        crud.update_export_job(db, job_id, total=total, processed=0)
+
+        final_path = os.path.join(export_storage_root(), f"{job_id}.zip")
+        tmp_path = final_path + ".part"
+        processed = 0
+
+        def tracked_entries():
+            nonlocal processed
+            for entry in iter_export_entries(db, owner_id, folder=folder, series_id=series_id):
+                yield entry
+                processed += 1
+                if processed % EXPORT_BATCH_SIZE == 0:
+                    crud.update_export_job(db, job_id, processed=processed)
+
+        with open(tmp_path, "wb") as fh:
+            for chunk in stream_zip(tracked_entries()):
+                fh.write(chunk)
+        os.replace(tmp_path, final_path)
+        tmp_path = None
+        crud.update_export_job(
+            db,
+            job_id,
+            status="done",
+            processed=processed,
+            total=max(total, processed),
+            filePath=final_path,
+            sizeBytes=os.path.getsize(final_path),
+        )
+    except Exception:
+        # The exception text can carry paths or SQL; keep it in the log only.
+        logger.exception("Export job %s failed", job_id)
+        try:
+            db.rollback()
+            crud.update_export_job(db, job_id, status="failed", error=EXPORT_FAILED_ERROR)
+        except Exception:
+            # Left as running; the stale-job sweep fails it later.
+            logger.exception("Could not mark export job %s as failed", job_id)
+    finally:
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if own_session:
+            db.close()
+
+
+def purge_expired_export_jobs(db: Session):
+    for path in crud.expire_export_jobs(db, int(time.time() * 1000) - EXPORT_JOB_TTL_MS):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_byte_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    # Single `bytes=` ranges only, as inclusive offsets. None means "send the whole
+    # file" (no/unsupported header); ValueError means 416.
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError("range not satisfiable")
+    return start, min(end, size - 1)
+
+
+def iter_file_range(path: str, start: int, end: int) -> Iterator[bytes]:
+    remaining = end - start + 1
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        while remaining > 0:
+            chunk = fh.read(min(DOWNLOAD_CHUNK_BYTES, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+import time
+import types
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Union, get_args, get_origin
+
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+from services import metrics, tracing
+
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+# Rendered public payloads are reused for this long per worker; 0 disables caching.
+PUBLIC_JSON_CACHE_SECONDS = float(os.getenv("PUBLIC_JSON_CACHE_SECONDS", "10"))
+PUBLIC_JSON_CACHE_MAX_ENTRIES = int(os.getenv("PUBLIC_JSON_CACHE_MAX_ENTRIES", "256"))
+
+_MISSING = object()
+
+
+def _default(value):
+    # Only explicit models are dumped. Anything else (an ORM row reaching a loosely
+    # typed field, say) fails loudly instead of leaking every loaded column.
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(payload) -> bytes:
+    # orjson when installed (several times faster), stdlib json otherwise.
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        if isinstance(content, (bytes, bytearray)):
+            return bytes(content)
+        return dumps(content)
+
+
+def _unwrap(annotation):
+    # -> (kind, inner): "model" / "models" for nested schemas, "bool", or "plain".
+    origin = get_origin(annotation)
+    if origin in (Union, types.UnionType):
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        if len(args) == 1:
+            return _unwrap(args[0])
+        return "plain", None
+    if origin in (list, List):
+        args = get_args(annotation)
+        if args and isinstance(args[0], type) and issubclass(args[0], BaseModel):
+            return "models", args[0]
+        return "plain", None
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return "model", annotation
+    if annotation is bool:
+        return "bool", None
+    return "plain", None
+
+
+@lru_cache(maxsize=None)
+def _field_specs(schema):
+    specs = []
+    for name, field in schema.model_fields.items():
+        kind, inner = _unwrap(field.annotation)
+        nullable = get_origin(field.annotation) in (Union, types.UnionType) and type(None) in get_args(field.annotation)
+        if field.default_factory is not None:
+            default = field.default_factory
+        elif field.default is PydanticUndefined:
+            default = None
+        else:
+            default = field.default
+        specs.append((name, kind, inner, default, nullable))
+    return tuple(specs)
+
+
+def project(schema, obj) -> Optional[Dict[str, Any]]:
+    # Reads the schema's fields straight off an ORM row (or dict) into plain JSON
+    # types without running validation. The schema only decides the shape.
+    if obj is None:
+        return None
+    getter = obj.get if isinstance(obj, dict) else (lambda key, default: getattr(obj, key, default))
+    out = {}
+    for name, kind, inner, default, nullable in _field_specs(schema):
+        value = getter(name, _MISSING)
+        # Stored NULLs are kept where the schema allows them, like validation would.
+        if value is _MISSING or (value is None and not nullable):
+            value = default() if callable(default) else default
+            if isinstance(value, (list, dict)):
+                value = type(value)(value)
+        if kind == "model":
+            value = project(inner, value)
+        elif kind == "models":
+            value = [project(inner, item) for item in (value or [])]
+        elif kind == "bool" and value is not None:
+            value = bool(value)
+        out[name] = value
+    return out
+
+
+def project_many(schema, rows) -> List[Dict[str, Any]]:
+    return [project(schema, row) for row in rows]
+
+
+class PayloadCache:
+    # Rendered response bodies keyed by endpoint + query, shared by all requests
+    # in the worker for PUBLIC_JSON_CACHE_SECONDS.
+    def __init__(self, max_entries: int = PUBLIC_JSON_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    def get(self, key, now: Optional[float] = None) -> Optional[bytes]:
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, body = entry
+            if expires_at <= now:
+                self._entries.pop(key, None)
+                return None
+            return body
+
+    def put(self, key, body: bytes, ttl: float, now: Optional[float] = None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._entries[key] = (now + ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+payload_cache = PayloadCache()
+metrics.watch_cache("public_json", lambda: len(payload_cache))
+
+
+def cached_json_response(key, build: Callable[[], Any]) -> FastJSONResponse:
+    ttl = PUBLIC_JSON_CACHE_SECONDS
+    body = payload_cache.get(key) if ttl > 0 else None
+    if ttl > 0:
+        metrics.cache_requests.inc(cache="public_json", result="miss" if body is None else "hit")
+    if body is None:
+        payload = build()
+        with tracing.span("fast_json.dumps"):
+            body = dumps(payload)
+        if ttl > 0:
+            payload_cache.put(key, body, ttl)
+    return FastJSONResponse(body)
@@ -0,0 +1,97 @@
+import os
+import posixpath
+import tarfile
+import zipfile
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+IMPORT_EXTENSIONS = (".fountain", ".spmd", ".md", ".markdown", ".txt")
+IMPORT_MAX_FILES = int(os.getenv("IMPORT_MAX_FILES", "5000"))
+IMPORT_MAX_FILE_BYTES = int(os.getenv("IMPORT_MAX_FILE_BYTES", str(5 * 1024 * 1024)))
+# Uncompressed total, so a small archive cannot expand without bound.
+IMPORT_MAX_TOTAL_BYTES = int(os.getenv("IMPORT_MAX_TOTAL_BYTES", str(200 * 1024 * 1024)))
+
+
+class ArchiveError(ValueError):
+    pass
+
+
+def normalize_folder(folder: Optional[str]) -> str:
+    parts = [p.strip() for p in (folder or "").replace("\\", "/").split("/")]
+    parts = [p for p in parts if p and p not in (".", "..")]
+    return "/" + "/".join(parts)
+
+
+def split_archive_path(name: str, base_folder: str = "/") -> Optional[Tuple[str, str]]:
+    # "Act 1/Scene.fountain" -> ("/<base>/Act 1", "Scene"); None for paths we ignore.
+    parts = [p.strip() for p in name.replace("\\", "/").split("/")]
+    parts = [p for p in parts if p and p not in (".", "..")]
+    if not parts or any(p.startswith(".") or p == "__MACOSX" for p in parts):
+        return None
+    title, _ = posixpath.splitext(parts[-1])
+    folder = normalize_folder("/".join([base_folder] + parts[:-1]))
+    return folder, title.strip() or "Untitled"
+
+
+def _decode(data: bytes) -> Optional[str]:
+    try:
+        return data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return None
+
+
+def _iter_members(fileobj: BinaryIO):
+    # Yields (name, size, read) for every regular file in a ZIP or (optionally
+    # compressed) tar archive.
+    if zipfile.is_zipfile(fileobj):
+        fileobj.seek(0)
+        archive = zipfile.ZipFile(fileobj)
+        for info in archive.infolist():
+            if not info.is_dir():
+                yield info.filename, info.file_size, lambda info=info: archive.read(info)
+        return
+    fileobj.seek(0)
+    try:
+        archive = tarfile.open(fileobj=fileobj, mode="r:*")
+    except tarfile.TarError:
+        raise ArchiveError("Unsupported archive format; upload a .zip or .tar(.gz) file")
+    for member in archive:
+        if member.isfile():
+            yield member.name, member.size, lambda member=member: archive.extractfile(member).read()
+
+
+def _read_archive(fileobj: BinaryIO, base_folder: str) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    base_folder = normalize_folder(base_folder)
+    files: List[Dict[str, str]] = []
+    skipped: List[Dict[str, str]] = []
+    total_bytes = 0
+    for name, size, read in _iter_members(fileobj):
+        target = split_archive_path(name, base_folder)
+        if target is None:
+            continue
+        if not name.lower().endswith(IMPORT_EXTENSIONS):
+            skipped.append({"path": name, "status": "skipped", "reason": "unsupported file type"})
+            continue
+        if size > IMPORT_MAX_FILE_BYTES:
+            skipped.append({"path": name, "status": "skipped", "reason": "file too large"})
+            continue
+        if len(files) >= IMPORT_MAX_FILES:
+            raise ArchiveError(f"Archive contains more than {IMPORT_MAX_FILES} importable files")
+        total_bytes += size
+        if total_bytes > IMPORT_MAX_TOTAL_BYTES:
+            raise ArchiveError("Archive is too large")
+        content = _decode(read())
+        if content is None:
+            skipped.append({"path": name, "status": "skipped", "reason": "not UTF-8 text"})
+            continue
+        folder, title = target
+        files.append({"path": name, "folder": folder, "title": title, "content": content})
+    return files, skipped
+
+
+def read_archive(fileobj: BinaryIO, base_folder: str = "/") -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    # Returns (files to import, skipped results). Raises ArchiveError when the
+    # upload is not a readable archive or exceeds the limits as a whole.
+    try:
+        return _read_archive(fileobj, base_folder)
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError):
+        raise ArchiveError("Archive is corrupt")
@@ -0,0 +1,283 @@
+import glob
+import hmac
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Each worker writes its metrics here and /metrics merges every file, so any
+# worker can answer a scrape for the whole process group. Unset = this
+# worker's numbers only. Clear the directory when the service (re)starts.
+METRICS_MULTIPROC_DIR = (os.getenv("METRICS_MULTIPROC_DIR") or "").strip()
+# How often each worker's background thread rewrites its file; scrapes always
+# rewrite it first.
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+# Scrapes must send "Authorization: Bearer <token>" or come from an admin
+# login. METRICS_PUBLIC=1 drops the check for deployments that restrict
+# /metrics at the proxy or network layer instead.
+METRICS_TOKEN = (os.getenv("METRICS_TOKEN") or "").strip()
+METRICS_PUBLIC = os.getenv("METRICS_PUBLIC", "0").strip().lower() in {"1", "true", "yes", "on"}
+# Gauges from files older than this belong to workers that stopped and are dropped.
+METRICS_STALE_SECONDS = float(os.getenv("METRICS_STALE_SECONDS", "60"))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[list]:
+        with self._lock:
+            return [[list(key), value if not isinstance(value, list) else list(value)] for key, value in self._values.items()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        # Stored as per-bucket (non-cumulative) counts + [sum, count].
+        key = self._key(labels)
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            row[index] += 1
+            row[-2] += value
+            row[-1] += 1
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+        self._flusher_lock = threading.Lock()
+        self._flusher_thread: Optional[threading.Thread] = None
+        self._file_name = f"{os.getpid()}-{int(time.time() * 1000)}.json"
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def add_collector(self, fn: Callable[[], None]):
+        # Called before every snapshot to refresh gauges that are read, not counted.
+        self._collectors.append(fn)
+
+    def snapshot(self) -> Dict:
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception:
+                pass
+        metrics = {}
+        for metric in self._metrics.values():
+            metrics[metric.name] = {
+                "kind": metric.kind,
+                "help": metric.help,
+                "labelnames": list(metric.labelnames),
+                "buckets": list(getattr(metric, "buckets", ())),
+                "samples": metric.samples(),
+            }
+        return {"pid": os.getpid(), "updatedAt": time.time(), "metrics": metrics}
+
+    def flush(self, directory: str = None, snapshot: Dict = None):
+        directory = directory if directory is not None else METRICS_MULTIPROC_DIR
+        if not directory:
+            return
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self._file_name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot or self.snapshot(), f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(METRICS_FLUSH_SECONDS)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Metrics flusher error: {e}")
+
+    def ensure_flusher(self):
+        # Started lazily from the first request so each forked worker gets its
+        # own thread, and the file write never runs on the event loop.
+        if not METRICS_MULTIPROC_DIR or self._flusher_thread is not None:
+            return
+        with self._flusher_lock:
+            if self._flusher_thread is None:
+                self._flusher_thread = threading.Thread(target=self._flush_loop, name="metrics-flusher", daemon=True)
+                self._flusher_thread.start()
+
+    def render(self, directory: str = None) -> str:
+        directory = directory if directory is not None else METRICS_MULTIPROC_DIR
+        own = self.snapshot()
+        if not directory:
+            return render_snapshots([own])
+        self.flush(directory, own)
+        return render_snapshots(read_snapshots(directory))
+
+
+def read_snapshots(directory: str) -> List[Dict]:
+    snapshots = []
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        try:
+            with open(path, encoding="utf-8") as f:
+                snapshots.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def merge_snapshots(snapshots: List[Dict], now: Optional[float] = None) -> Dict[str, Dict]:
+    # Counters and histograms are summed over every file, so totals survive
+    # worker restarts; gauges only over workers that reported recently.
+    now = time.time() if now is None else now
+    merged: Dict[str, Dict] = {}
+    for snapshot in snapshots:
+        fresh = now - snapshot.get("updatedAt", 0) <= METRICS_STALE_SECONDS
+        for name, metric in snapshot.get("metrics", {}).items():
+            if metric["kind"] == "gauge" and not fresh:
+                continue
+            target = merged.setdefault(name, {**metric, "values": {}})
+            for labels, value in metric["samples"]:
+                key = tuple(labels)
+                if metric["kind"] == "histogram":
+                    current = target["values"].get(key)
+                    target["values"][key] = value if current is None else [a + b for a, b in zip(current, value)]
+                else:
+                    target["values"][key] = target["values"].get(key, 0.0) + value
+    return merged
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: Tuple[str, str] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def render_snapshots(snapshots: List[Dict], now: Optional[float] = None) -> str:
+    lines = []
+    for name, metric in sorted(merge_snapshots(snapshots, now).items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['kind']}")
+        names = metric["labelnames"]
+        for key, value in sorted(metric["values"].items()):
+            if metric["kind"] != "histogram":
+                lines.append(f"{name}{_labels(names, key)} {_number(value)}")
+                continue
+            cumulative = 0
+            bounds = [_number(float(b)) for b in metric["buckets"]] + ["+Inf"]
+            for bound, count in zip(bounds, value[:-2]):
+                cumulative += count
+                lines.append(f"{name}_bucket{_labels(names, key, ('le', bound))} {cumulative}")
+            lines.append(f"{name}_sum{_labels(names, key)} {_number(value[-2])}")
+            lines.append(f"{name}_count{_labels(names, key)} {value[-1]}")
+    return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route template, method and status.", ("method", "route", "status")
+)
+http_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template and method.", ("method", "route")
+)
+http_in_progress = registry.gauge("http_requests_in_progress", "HTTP requests currently being handled.")
+rate_limited = registry.counter("rate_limit_rejections_total", "Requests rejected by the rate limiter.", ("route",))
+media_upload_bytes = registry.counter("media_upload_bytes_total", "Bytes stored by media uploads.", ("content_type",))
+media_uploads = registry.counter("media_uploads_total", "Completed media uploads.", ("content_type",))
+db_pool = registry.gauge("db_pool_connections", "SQLAlchemy pool connections by state.", ("state",))
+cache_requests = registry.counter("cache_requests_total", "Cache lookups by cache and result.", ("cache", "result"))
+cache_entries = registry.gauge("cache_entries", "Entries currently held by each cache.", ("cache",))
+
+
+def token_allows_scrape(authorization: Optional[str]) -> bool:
+    if METRICS_PUBLIC:
+        return True
+    if not METRICS_TOKEN:
+        return False
+    return hmac.compare_digest((authorization or "").encode(), f"Bearer {METRICS_TOKEN}".encode())
+
+
+def route_label(request) -> str:
+    # Route templates keep label cardinality bounded; unmatched paths share one.
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def watch_engine_pool(engine):
+    def collect():
+        pool = engine.pool
+        for state, attr in (("size", "size"), ("checked_out", "checkedout"), ("checked_in", "checkedin"), ("overflow", "overflow")):
+            reader = getattr(pool, attr, None)
+            if callable(reader):
+                db_pool.set(reader(), state=state)
+
+    registry.add_collector(collect)
+
+
+def watch_cache(name: str, size: Callable[[], int]):
+    registry.add_collector(lambda: cache_entries.set(size(), cache=name))
@@ -0,0 +1,140 @@
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+# Admins can profile a single request with ?__profile=1 or `X-Profile: 1`;
+# `collapsed` instead of `1` returns the profile as the response body.
+REQUEST_PROFILING_ENABLED = os.getenv("REQUEST_PROFILING_ENABLED", "1").strip().lower() in {"1", "true", "yes", "on"}
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "1"))
+# Sampling stops after this long even if the request is still running.
+PROFILE_MAX_SECONDS = float(os.getenv("PROFILE_MAX_SECONDS", "30"))
+PROFILE_DIR = os.getenv("PROFILE_DIR") or os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "profiles")
+# Oldest stored profiles are deleted once PROFILE_DIR holds more than this many.
+PROFILE_RETENTION = int(os.getenv("PROFILE_RETENTION", "200"))
+PROFILE_QUERY_PARAM = "__profile"
+PROFILE_HEADER = "x-profile"
+PROFILE_MODES = {"1": "store", "true": "store", "collapsed": "collapsed"}
+
+# A thread whose innermost frame is in one of these modules is waiting, not working.
+_IDLE_MODULES = ("threading.py", "queue.py", "selectors.py", "socket.py")
+_active = threading.Lock()
+
+
+def requested_mode(query_params, headers) -> Optional[str]:
+    if not REQUEST_PROFILING_ENABLED:
+        return None
+    raw = query_params.get(PROFILE_QUERY_PARAM) or headers.get(PROFILE_HEADER) or ""
+    return PROFILE_MODES.get(raw.strip().lower())
+
+
+def _frame_label(code) -> str:
+    # One label per function (not per line) so samples of the same call merge.
+    filename = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ":")
+
+
+def collapse_stack(frame, thread_name: str) -> Optional[str]:
+    if os.path.basename(frame.f_code.co_filename) in _IDLE_MODULES:
+        return None
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.append(thread_name.replace(";", ":"))
+    return ";".join(reversed(labels))
+
+
+class StackSampler:
+    # Samples every busy thread in the worker, which covers both the event
+    # loop and the threadpool running sync endpoints. Requests running
+    # concurrently on the same worker show up too; each stack is rooted at its
+    # thread name so they can be told apart.
+    def __init__(self, interval_ms: float = PROFILE_SAMPLE_INTERVAL_MS, max_seconds: float = PROFILE_MAX_SECONDS):
+        self.interval = max(interval_ms, 0.1) / 1000
+        self.max_seconds = max_seconds
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self.started_at = 0.0
+        self.elapsed = 0.0
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started_at
+        return self.samples
+
+    def _run(self):
+        own = threading.get_ident()
+        deadline = self.started_at + self.max_seconds
+        while not self._stop.is_set() and time.perf_counter() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = collapse_stack(frame, names.get(ident, f"thread-{ident}"))
+                if stack:
+                    self.samples[stack] += 1
+            self.sample_count += 1
+            self._stop.wait(self.interval)
+
+
+def render_collapsed(samples: Dict[str, int]) -> str:
+    # Brendan Gregg's folded format: `root;child;leaf count` per line, ready for
+    # flamegraph.pl, speedscope or inferno.
+    return "".join(f"{stack} {count}\n" for stack, count in sorted(samples.items()))
+
+
+def try_begin() -> Optional[StackSampler]:
+    # One profile per worker at a time; a second request runs unprofiled.
+    if not _active.acquire(blocking=False):
+        return None
+    try:
+        return StackSampler().start()
+    except Exception:
+        _active.release()
+        raise
+
+
+def finish(sampler: StackSampler) -> Counter:
+    try:
+        return sampler.stop()
+    finally:
+        _active.release()
+
+
+def store(samples: Dict[str, int], method: str, route: str, directory: str = None) -> str:
+    directory = directory or PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9]+", "-", route).strip("-") or "root"
+    profile_id = f"{time.strftime('%Y%m%dT%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{method.lower()}-{slug}"
+    with open(os.path.join(directory, f"{profile_id}.collapsed"), "w", encoding="utf-8") as f:
+        f.write(render_collapsed(samples))
+    prune(directory)
+    return profile_id
+
+
+def prune(directory: str = None, keep: int = None) -> int:
+    directory = directory or PROFILE_DIR
+    keep = PROFILE_RETENTION if keep is None else keep
+    # Ids start with a timestamp, so name order is age order.
+    names = sorted(name for name in os.listdir(directory) if name.endswith(".collapsed"))
+    removed = 0
+    for name in names[:max(len(names) - keep, 0)]:
+        try:
+            os.remove(os.path.join(directory, name))
+            removed += 1
+        except FileNotFoundError:
+            # Another worker pruned it first.
+            pass
+    return removed
@@ -0,0 +1,112 @@
+import contextvars
+import json
+import logging
+import os
+import time
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from services import tracing
+
+logger = logging.getLogger(__name__)
+
+# Statements slower than this (ms) are written to the slow-query log; 0 logs all.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+# Requests running more statements than this are logged with their slowest ones.
+REQUEST_QUERY_WARN_COUNT = int(os.getenv("REQUEST_QUERY_WARN_COUNT", "50"))
+# Adds X-DB-Queries / Server-Timing to every response when enabled.
+DB_QUERY_HEADERS = os.getenv("DB_QUERY_HEADERS", "0").strip().lower() in {"1", "true", "yes", "on"}
+SLOWEST_KEPT = 3
+STATEMENT_LOG_CHARS = 500
+
+
+class RequestQueryStats:
+    def __init__(self, path: str = ""):
+        self.path = path
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest: List[Tuple[float, str]] = []
+
+    def record(self, statement: str, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if len(self.slowest) < SLOWEST_KEPT or elapsed_ms > self.slowest[-1][0]:
+            self.slowest.append((elapsed_ms, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[SLOWEST_KEPT:]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.total_ms:.1f};desc="{self.count} queries"'
+
+
+_current: contextvars.ContextVar[Optional[RequestQueryStats]] = contextvars.ContextVar("request_query_stats", default=None)
+
+
+def begin_request(path: str = ""):
+    # The stats object is shared by reference, so statements run in the
+    # threadpool (sync endpoints, dependencies) still land on it.
+    stats = RequestQueryStats(path)
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+def current_stats() -> Optional[RequestQueryStats]:
+    return _current.get()
+
+
+def _compact(statement: str) -> str:
+    return " ".join(str(statement).split())[:STATEMENT_LOG_CHARS]
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    elapsed_ms = (time.perf_counter() - started.pop()) * 1000
+    stats = _current.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+    tracing.record_span(
+        "db.query",
+        elapsed_ms,
+        tracing.SPAN_KIND_CLIENT,
+        **{"db.system": conn.dialect.name, "db.statement": _compact(statement)},
+    )
+    if elapsed_ms >= SLOW_QUERY_MS:
+        logger.warning("slow_query %s", json.dumps({
+            "durationMs": round(elapsed_ms, 2),
+            "path": stats.path if stats else None,
+            "statement": _compact(statement),
+        }, ensure_ascii=False))
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    started = conn.info.get("query_started") if conn is not None else None
+    if started:
+        started.pop()
+
+
+def log_request_stats(stats: RequestQueryStats, method: str, status_code: int):
+    if stats.count <= REQUEST_QUERY_WARN_COUNT:
+        return
+    logger.warning("query_heavy_request %s", json.dumps({
+        "method": method,
+        "path": stats.path,
+        "status": status_code,
+        "queries": stats.count,
+        "dbMs": round(stats.total_ms, 2),
+        "slowest": [{"durationMs": round(ms, 2), "statement": _compact(sql)} for ms, sql in stats.slowest],
+    }, ensure_ascii=False))
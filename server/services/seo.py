@@ -3,6 +3,7 @@ import json
 import re
 
 import models
+from services import tracing
 
 
 def meta_escape(text) -> str:
@@ -45,6 +46,7 @@ def inject_structured_data(html_text: str, payload: dict) -> str:
     return html_text.replace("</head>", f"  {script_tag}\n</head>")
 
 
+@tracing.traced("seo.inject_seo_html")
 def inject_seo_html(
     html_text: str,
     *,
@@ -96,21 +98,6 @@ def inject_seo_html(
     return html_text
 
 
-def ensure_list(value):
-    if value is None:
-        return []
-    if isinstance(value, list):
-        return value
-    if isinstance(value, str):
-        try:
-            parsed = json.loads(value)
-            if isinstance(parsed, list):
-                return parsed
-        except Exception:
-            return [value]
-    return []
-
-
 def inject_seo_for_route(full_path: str, db, html_template: str, public_base_url: str):
     if full_path.startswith("read/"):
         script_id = full_path.strip("/").split("/")[-1]
@@ -152,7 +139,7 @@ def inject_seo_for_route(full_path: str, db, html_template: str, public_base_url
             avatar = (persona.avatar if persona else user.avatar) or ""
             banner = (persona.bannerUrl if persona else "") or ""
             website = (persona.website if persona else user.website) or ""
-            links = ensure_list(persona.links) if persona else []
+            links = persona.links if persona else []
             same_as = [website] if website else []
             same_as.extend([x.get("url") for x in links if isinstance(x, dict) and x.get("url")])
             canonical_url = f"{public_base_url}/author/{author_id}"
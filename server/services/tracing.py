@@ -0,0 +1,295 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Share of requests traced up front (0..1).
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+# Honour the sampled flag of an incoming W3C `traceparent`. Off by default:
+# any client can send one, so only enable it behind a proxy that sets or strips
+# the header. The trace id is reused for correlation either way.
+TRACE_TRUST_PARENT_SAMPLED = os.getenv("TRACE_TRUST_PARENT_SAMPLED", "0").strip().lower() in {"1", "true", "yes", "on"}
+# Requests slower than this (ms) are exported even when not sampled; 0 = off.
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "0"))
+# OTLP/JSON export: one ExportTraceServiceRequest per line to a file and/or
+# POSTed to a collector's /v1/traces. Defaults to data/traces.jsonl.
+TRACE_EXPORT_PATH = (os.getenv("TRACE_EXPORT_PATH") or "").strip()
+TRACE_OTLP_ENDPOINT = (os.getenv("TRACE_OTLP_ENDPOINT") or "").strip()
+TRACE_SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "screenplay-api")
+TRACE_MAX_SPANS = int(os.getenv("TRACE_MAX_SPANS", "500"))
+# The export file is rotated to `<path>.1` (replacing the previous one) once it
+# reaches this size, so traces use at most about twice this on disk; 0 = no cap.
+TRACE_EXPORT_MAX_BYTES = int(os.getenv("TRACE_EXPORT_MAX_MB", "50")) * 1024 * 1024
+TRACE_QUEUE_SIZE = 1000
+DEFAULT_EXPORT_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "traces.jsonl")
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_ERROR = 2
+
+
+def tracing_enabled() -> bool:
+    return TRACE_SAMPLE_RATE > 0 or TRACE_SLOW_MS > 0
+
+
+def _new_id(n_bytes: int) -> str:
+    return f"{random.getrandbits(n_bytes * 8):0{n_bytes * 2}x}"
+
+
+class Span:
+    __slots__ = ("span_id", "parent_id", "name", "kind", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, name: str, parent_id: Optional[str], kind: int = SPAN_KIND_INTERNAL, start_ns: int = None):
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = start_ns or time.time_ns()
+        self.end_ns = None
+        self.attributes: Dict[str, object] = {}
+        self.error = None
+
+
+class Trace:
+    def __init__(self, trace_id: str = None, parent_span_id: str = None, sampled: bool = False):
+        self.trace_id = trace_id or _new_id(16)
+        self.sampled = sampled
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self.root = Span("request", parent_span_id, SPAN_KIND_SERVER)
+
+    def add(self, span: Span):
+        # Spans can finish on threadpool threads; list.append is atomic.
+        if len(self.spans) >= TRACE_MAX_SPANS:
+            self.dropped += 1
+            return
+        self.spans.append(span)
+
+
+_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("trace", default=None)
+_parent: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("trace_parent_span", default=None)
+
+
+def parse_traceparent(header: Optional[str]):
+    # -> (trace_id, parent_span_id, sampled) or None for a missing/invalid header.
+    parts = (header or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def begin_trace(traceparent: Optional[str] = None):
+    # Every request is recorded while tracing is on, so slow ones can still be
+    # exported after the fact; the rate decides which fast ones are kept.
+    parsed = parse_traceparent(traceparent)
+    sampled = random.random() < TRACE_SAMPLE_RATE
+    if parsed:
+        trace = Trace(parsed[0], parsed[1], sampled=sampled or (TRACE_TRUST_PARENT_SAMPLED and parsed[2]))
+    else:
+        trace = Trace(sampled=sampled)
+    return trace, _trace.set(trace), _parent.set(trace.root.span_id)
+
+
+def end_trace(trace: Trace, tokens) -> bool:
+    trace_token, parent_token = tokens
+    _trace.reset(trace_token)
+    _parent.reset(parent_token)
+    trace.root.end_ns = time.time_ns()
+    duration_ms = (trace.root.end_ns - trace.root.start_ns) / 1e6
+    if trace.sampled or (TRACE_SLOW_MS > 0 and duration_ms >= TRACE_SLOW_MS):
+        exporter.submit(trace)
+        return True
+    return False
+
+
+def current_trace() -> Optional[Trace]:
+    return _trace.get()
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+    current = Span(name, _parent.get(), kind)
+    current.attributes.update(attributes)
+    token = _parent.set(current.span_id)
+    try:
+        yield current
+    except BaseException as exc:
+        current.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        _parent.reset(token)
+        current.end_ns = time.time_ns()
+        trace.add(current)
+
+
+def record_span(name: str, duration_ms: float, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    # For work timed elsewhere (e.g. SQL statements by the engine hooks).
+    trace = _trace.get()
+    if trace is None:
+        return
+    end_ns = time.time_ns()
+    current = Span(name, _parent.get(), kind, start_ns=end_ns - int(duration_ms * 1e6))
+    current.end_ns = end_ns
+    current.attributes.update(attributes)
+    trace.add(current)
+
+
+def traced(name: str):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _trace.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _attribute_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_span(trace: Trace, item: Span) -> Dict:
+    payload = {
+        "traceId": trace.trace_id,
+        "spanId": item.span_id,
+        "name": item.name,
+        "kind": item.kind,
+        "startTimeUnixNano": str(item.start_ns),
+        "endTimeUnixNano": str(item.end_ns or item.start_ns),
+        "attributes": [{"key": key, "value": _attribute_value(value)} for key, value in item.attributes.items()],
+    }
+    if item.parent_id:
+        payload["parentSpanId"] = item.parent_id
+    if item.error:
+        payload["status"] = {"code": STATUS_ERROR, "message": item.error}
+    return payload
+
+
+def to_otlp(trace: Trace) -> Dict:
+    if trace.dropped:
+        trace.root.attributes["trace.dropped_spans"] = trace.dropped
+    spans = [_otlp_span(trace, trace.root)] + [_otlp_span(trace, item) for item in trace.spans]
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": TRACE_SERVICE_NAME}}]},
+            "scopeSpans": [{"scope": {"name": "screenplay.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+class Exporter:
+    # Writes/POSTs on a background thread so requests never wait on I/O; when
+    # the queue is full traces are dropped rather than applying back-pressure.
+    def __init__(self):
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=TRACE_QUEUE_SIZE)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def submit(self, trace: Trace):
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        self._queue.join()
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            try:
+                self.export(to_otlp(trace))
+            except Exception as exc:
+                logger.warning("trace export failed: %s", exc)
+            finally:
+                self._queue.task_done()
+
+    def export(self, payload: Dict):
+        body = json.dumps(payload, separators=(",", ":"))
+        path = TRACE_EXPORT_PATH or (DEFAULT_EXPORT_PATH if not TRACE_OTLP_ENDPOINT else "")
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._rotate_if_full(path, len(body) + 1)
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(body + "\n")
+        if TRACE_OTLP_ENDPOINT:
+            request = urllib.request.Request(
+                TRACE_OTLP_ENDPOINT,
+                data=body.encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            urllib.request.urlopen(request, timeout=5).close()
+
+
+    def _rotate_if_full(self, path: str, incoming: int):
+        if TRACE_EXPORT_MAX_BYTES <= 0:
+            return
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        if size and size + incoming > TRACE_EXPORT_MAX_BYTES:
+            os.replace(path, path + ".1")
+
+
+exporter = Exporter()
+
+
+def install_fastapi_serialization_span():
+    # Response-model validation + encoding happens inside fastapi.routing,
+    # which looks serialize_response up as a module global on every call.
+    import fastapi.routing
+
+    original = getattr(fastapi.routing, "serialize_response", None)
+    if original is None or getattr(original, "_traced", False):
+        return
+
+    @functools.wraps(original)
+    async def serialize_response(*args, **kwargs):
+        if _trace.get() is None:
+            return await original(*args, **kwargs)
+        field = kwargs.get("field")
+        with span("fastapi.serialize_response", model=str(getattr(field, "name", "") or "")):
+            return await original(*args, **kwargs)
+
+    serialize_response._traced = True
+    fastapi.routing.serialize_response = serialize_response
@@ -7,6 +7,8 @@ os.environ["DB_PATH"] = ":memory:"
 os.environ["ALLOW_X_USER_ID"] = "1"
 os.environ["ENVIRONMENT"] = "test"
 os.environ["ADMIN_USER_IDS"] = "admin-owner"
+os.environ["VIEW_FLUSH_INTERVAL_SECONDS"] = "0"
+os.environ["PUBLIC_JSON_CACHE_SECONDS"] = "0"
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
@@ -15,7 +17,7 @@ from fastapi.testclient import TestClient
 
 from database import Base
 from main import app
-from dependencies import get_db
+from dependencies import get_db, get_session_factory
 
 # Use in-memory SQLite for testing
 SQLALCHEMY_DATABASE_URL = "sqlite://"
@@ -63,6 +65,32 @@ def client(db_session):
 
     app.dependency_overrides[get_db] = override_get_db
     app.dependency_overrides[database_get_db] = override_get_db
+    # Streamed bodies open their own session; bind it to the test connection so
+    # it sees the uncommitted test data.
+    app.dependency_overrides[get_session_factory] = lambda: (
+        lambda: TestingSessionLocal(bind=db_session.connection())
+    )
     with TestClient(app) as c:
         yield c
         app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def query_count(client, db_session, monkeypatch):
+    """Requests a path (GET unless `method` says otherwise) and returns how many
+    SQL statements the request ran."""
+    from services import fast_json, query_stats
+
+    monkeypatch.setattr(query_stats, "DB_QUERY_HEADERS", True)
+    monkeypatch.setattr(fast_json, "PUBLIC_JSON_CACHE_SECONDS", 0)
+
+    def count(path, headers=None, method="GET", json=None):
+        # Requests share the test session; start each one with a clean identity
+        # map and no cached loader results, like a fresh session would.
+        db_session.commit()
+        db_session.expire_all()
+        res = client.request(method, path, headers=headers or {}, json=json)
+        assert res.status_code == 200, (path, res.status_code, res.text[:200])
+        return int(res.headers["X-DB-Queries"])
+
+    return count
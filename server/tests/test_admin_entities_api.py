@@ -168,6 +168,17 @@ def test_admin_can_update_script_metadata_with_tags(client, db_session):
     assert isinstance(body.get("tags"), list)
     assert len(body["tags"]) == 1
     assert body["tags"][0]["id"] == tag.id
+    db_session.refresh(tag)
+    assert tag.usageCount == 1
+
+    cleared = client.put(
+        "/api/admin/all-scripts/script-d/metadata",
+        headers={"X-User-ID": "admin-owner"},
+        json={"tags": []},
+    )
+    assert cleared.status_code == 200
+    db_session.refresh(tag)
+    assert tag.usageCount == 0
 
     get_res = client.get("/api/admin/all-scripts/script-d/metadata", headers={"X-User-ID": "admin-owner"})
     assert get_res.status_code == 200
@@ -0,0 +1,105 @@
+import hashlib
+
+from sqlalchemy import text
+
+import content_storage
+
+
+def test_encode_decode_roundtrip(monkeypatch):
+    monkeypatch.setattr(content_storage, "CONTENT_COMPRESSION", "zlib")
+    monkeypatch.setattr(content_storage, "CONTENT_COMPRESSION_MIN_BYTES", 16)
+    body = "INT. ROOM - DAY\n\n" + "Dialogue line.\n" * 200
+
+    stored = content_storage.encode_content(body)
+    assert stored.startswith(content_storage.COMPRESSED_MARKER)
+    assert len(stored) < len(body)
+    assert content_storage.decode_content(stored) == body
+
+    short = "tiny"
+    assert content_storage.encode_content(short) == short
+
+
+def test_plain_text_starting_with_marker_is_always_escaped(monkeypatch):
+    monkeypatch.setattr(content_storage, "CONTENT_COMPRESSION", "off")
+    body = content_storage.COMPRESSED_MARKER + "zlib:not really compressed"
+    stored = content_storage.encode_content(body)
+    assert stored != body
+    assert content_storage.decode_content(stored) == body
+
+
+def test_compressed_script_roundtrip_via_api(client, db_session, monkeypatch):
+    monkeypatch.setattr(content_storage, "CONTENT_COMPRESSION", "zlib")
+    monkeypatch.setattr(content_storage, "CONTENT_COMPRESSION_MIN_BYTES", 16)
+    headers = {"X-User-ID": "u-compress"}
+    body = "EXT. FOREST - NIGHT\n\n" + "The wind howls through the trees.\n" * 100
+
+    created = client.post("/api/scripts", json={"title": "Big", "content": body}, headers=headers).json()
+    raw = db_session.execute(text("SELECT content FROM scripts WHERE id = :id"), {"id": created["id"]}).scalar()
+    assert raw.startswith(content_storage.COMPRESSED_MARKER)
+
+    detail = client.get(f"/api/scripts/{created['id']}", headers=headers).json()
+    assert detail["content"] == body
+
+    listed = client.get("/api/scripts", headers=headers).json()
+    row = next(item for item in listed if item["id"] == created["id"])
+    assert row["contentLength"] == len(body)
+    assert row["contentHash"] == hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+    found = client.get("/api/search", params={"q": "wind howls"}, headers=headers).json()
+    assert [item["id"] for item in found] == [created["id"]]
+
+
+def test_search_scans_compressed_rows_in_batches_up_to_limit(db_session, monkeypatch):
+    import crud_ops as crud
+    import crud_ops.scripts_query as scripts_query
+    import schemas
+
+    monkeypatch.setattr(content_storage, "CONTENT_COMPRESSION", "zlib")
+    monkeypatch.setattr(content_storage, "CONTENT_COMPRESSION_MIN_BYTES", 16)
+    monkeypatch.setattr(scripts_query, "SEARCH_COMPRESSED_BATCH", 2)
+    body = "INT. ROOM - DAY\n\n" + "Rain taps the window.\n" * 20
+    for i in range(5):
+        crud.create_script(db_session, schemas.ScriptCreate(title=f"Big {i}", content=body), "u-batch")
+    crud.create_script(db_session, schemas.ScriptCreate(title="Plain", content="rain taps"), "u-batch")
+
+    found = crud.search_scripts(db_session, "rain taps", "u-batch", limit=3)
+    assert len(found) == 3
+    assert found[0].title == "Plain"
+    assert all(script.content.lower().count("rain taps") for script in found)
+    # "zlib" appears in the stored prefix of every compressed body, not in the text.
+    assert crud.search_scripts(db_session, "zlib", "u-batch") == []
+
+
+def test_search_is_case_insensitive_for_both_storage_forms(db_session, monkeypatch):
+    import crud_ops as crud
+    import schemas
+
+    monkeypatch.setattr(content_storage, "CONTENT_COMPRESSION", "zlib")
+    monkeypatch.setattr(content_storage, "CONTENT_COMPRESSION_MIN_BYTES", 16)
+    big = crud.create_script(
+        db_session, schemas.ScriptCreate(title="Big", content="EXT. PIER - DUSK\n\n" + "The Harbor Bell rings.\n" * 20), "u-case"
+    )
+    small = crud.create_script(db_session, schemas.ScriptCreate(title="Small", content="the HARBOR bell"), "u-case")
+    raw = db_session.execute(text("SELECT content FROM scripts WHERE id = :id"), {"id": big.id}).scalar()
+    assert raw.startswith(content_storage.COMPRESSED_MARKER)
+
+    for needle in ("harbor bell", "HARBOR BELL", "Harbor Bell"):
+        found = crud.search_scripts(db_session, needle, "u-case")
+        assert sorted(script.id for script in found) == sorted([big.id, small.id])
+
+
+def test_content_stats_follow_updates_and_patches(client):
+    headers = {"X-User-ID": "u-stats"}
+    created = client.post("/api/scripts", json={"title": "S", "content": "abc"}, headers=headers).json()
+    assert created["contentLength"] == 3
+
+    client.put(f"/api/scripts/{created['id']}", json={"content": "abcdef"}, headers=headers)
+    client.patch(
+        f"/api/scripts/{created['id']}/content",
+        json={"baseRevision": 1, "edits": [{"start": 6, "end": 6, "text": "gh"}]},
+        headers=headers,
+    )
+    listed = client.get("/api/scripts", headers=headers).json()
+    row = next(item for item in listed if item["id"] == created["id"])
+    assert row["contentLength"] == 8
+    assert row["contentHash"] == hashlib.sha256(b"abcdefgh").hexdigest()
@@ -20,3 +20,67 @@ def test_export_all(client):
         
         s1 = z.read("Script1.fountain").decode("utf-8")
         assert s1 == "Content1"
+
+
+def test_export_all_streams_in_batches(client, monkeypatch):
+    import services.export_archive as export_archive
+
+    headers = {"X-User-ID": "u_export_batch"}
+    for i in range(5):
+        client.post("/api/scripts", json={"title": f"S{i}", "content": f"Body {i}" * 50, "folder": "/A/B"}, headers=headers)
+    client.post("/api/scripts", json={"title": "Skip", "type": "folder", "folder": "/"}, headers=headers)
+
+    original = export_archive.iter_export_entries
+    monkeypatch.setattr(
+        "routers.scripts.iter_export_entries",
+        lambda db, owner_id: original(db, owner_id, batch_size=2),
+    )
+
+    response = client.get("/api/export/all", headers=headers)
+    assert response.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(response.content)) as z:
+        assert sorted(z.namelist()) == [f"A/B/S{i}.fountain" for i in range(5)]
+        assert z.read("A/B/S3.fountain").decode("utf-8") == "Body 3" * 50
+        assert z.testzip() is None
+
+
+def test_stream_zip_yields_one_chunk_per_entry():
+    from services.export_archive import stream_zip
+
+    chunks = list(stream_zip([("a.fountain", "A"), ("b/c.fountain", "C" * 1000)]))
+    assert len(chunks) == 3  # two entries + central directory
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as z:
+        assert z.read("b/c.fountain") == b"C" * 1000
+
+
+def test_export_all_closes_its_own_session(client, db_session):
+    from conftest import TestingSessionLocal
+    from dependencies import get_session_factory
+    from main import app
+
+    headers = {"X-User-ID": "u_export_session"}
+    client.post("/api/scripts", json={"title": "Only", "content": "Body"}, headers=headers)
+    closed = []
+
+    def factory():
+        session = TestingSessionLocal(bind=db_session.connection())
+        original_close = session.close
+        session.close = lambda: (closed.append(True), original_close())
+        return session
+
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    response = client.get("/api/export/all", headers=headers)
+    assert response.status_code == 200
+    assert closed == [True]
+
+
+def test_folder_export_does_not_treat_underscore_as_wildcard(client, db_session):
+    from services.export_archive import count_export_entries, iter_export_entries
+
+    headers = {"X-User-ID": "u_export_folder"}
+    client.post("/api/scripts", json={"title": "In", "content": "in", "folder": "/a_b/c"}, headers=headers)
+    client.post("/api/scripts", json={"title": "Out", "content": "out", "folder": "/axb/c"}, headers=headers)
+
+    entries = list(iter_export_entries(db_session, "u_export_folder", folder="/a_b"))
+    assert entries == [("a_b/c/In.fountain", "in")]
+    assert count_export_entries(db_session, "u_export_folder", folder="/a_b") == 1
@@ -0,0 +1,128 @@
+import io
+import zipfile
+
+import pytest
+
+from services import export_jobs
+
+
+@pytest.fixture
+def inline_jobs(monkeypatch, tmp_path, db_session):
+    monkeypatch.setenv("EXPORT_STORAGE_ROOT", str(tmp_path))
+    monkeypatch.setattr(export_jobs, "submit_export_job", lambda job_id: export_jobs.run_export_job(job_id, db_session))
+    return tmp_path
+
+
+def _seed(client, headers):
+    client.post("/api/scripts", json={"title": "Root", "content": "R" * 300}, headers=headers)
+    client.post("/api/scripts", json={"title": "Inner", "content": "I" * 300, "folder": "/Act 1"}, headers=headers)
+    client.post("/api/scripts", json={"title": "Deeper", "content": "D" * 300, "folder": "/Act 1/Scene"}, headers=headers)
+    client.post("/api/scripts", json={"title": "Other", "content": "O", "folder": "/Act 10"}, headers=headers)
+
+
+def test_account_export_job_builds_archive(client, inline_jobs):
+    headers = {"X-User-ID": "u_job"}
+    _seed(client, headers)
+
+    res = client.post("/api/export/jobs", json={}, headers=headers)
+    assert res.status_code == 202
+    job_id = res.json()["id"]
+
+    status = client.get(f"/api/export/jobs/{job_id}", headers=headers).json()
+    assert status["status"] == "done"
+    assert status["total"] == status["processed"] == 4
+    assert status["sizeBytes"] > 0
+
+    download = client.get(f"/api/export/jobs/{job_id}/download", headers=headers)
+    assert download.status_code == 200
+    assert download.headers["accept-ranges"] == "bytes"
+    with zipfile.ZipFile(io.BytesIO(download.content)) as z:
+        assert sorted(z.namelist()) == ["Act 1/Inner.fountain", "Act 1/Scene/Deeper.fountain", "Act 10/Other.fountain", "Root.fountain"]
+
+    assert [j["id"] for j in client.get("/api/export/jobs", headers=headers).json()] == [job_id]
+    assert client.get(f"/api/export/jobs/{job_id}", headers={"X-User-ID": "intruder"}).status_code == 404
+
+
+def test_folder_export_job_and_range_resume(client, inline_jobs):
+    headers = {"X-User-ID": "u_job"}
+    _seed(client, headers)
+    job = client.post("/api/export/jobs", json={"scope": "folder", "folder": "Act 1"}, headers=headers).json()
+    url = f"/api/export/jobs/{job['id']}/download"
+
+    full = client.get(url, headers=headers)
+    size = len(full.content)
+    head = client.get(url, headers={**headers, "Range": "bytes=0-99"})
+    assert head.status_code == 206
+    assert head.headers["content-range"] == f"bytes 0-99/{size}"
+    tail = client.get(url, headers={**headers, "Range": "bytes=100-", "If-Range": full.headers["etag"]})
+    assert tail.status_code == 206
+    assert head.content + tail.content == full.content
+
+    with zipfile.ZipFile(io.BytesIO(full.content)) as z:
+        assert sorted(z.namelist()) == ["Act 1/Inner.fountain", "Act 1/Scene/Deeper.fountain"]
+
+    stale = client.get(url, headers={**headers, "Range": "bytes=100-", "If-Range": '"other"'})
+    assert stale.status_code == 200 and stale.content == full.content
+    bad = client.get(url, headers={**headers, "Range": f"bytes={size}-"})
+    assert bad.status_code == 416
+
+
+def test_export_job_validation_and_pending_download(client, monkeypatch, db_session):
+    headers = {"X-User-ID": "u_job"}
+    submitted = []
+    monkeypatch.setattr(export_jobs, "submit_export_job", submitted.append)
+
+    assert client.post("/api/export/jobs", json={"scope": "series", "seriesId": "missing"}, headers=headers).status_code == 400
+    assert client.post("/api/export/jobs", json={"scope": "folder", "folder": "/"}, headers=headers).status_code == 400
+
+    first = client.post("/api/export/jobs", json={"scope": "account"}, headers=headers).json()
+    again = client.post("/api/export/jobs", json={"scope": "account"}, headers=headers).json()
+    assert again["id"] == first["id"]
+    assert set(submitted) == {first["id"]}
+    assert client.get(f"/api/export/jobs/{first['id']}/download", headers=headers).status_code == 409
+
+
+def test_parse_byte_range():
+    assert export_jobs.parse_byte_range(None, 10) is None
+    assert export_jobs.parse_byte_range("bytes=2-4", 10) == (2, 4)
+    assert export_jobs.parse_byte_range("bytes=-3", 10) == (7, 9)
+    assert export_jobs.parse_byte_range("bytes=5-100", 10) == (5, 9)
+    assert export_jobs.parse_byte_range("bytes=0-1,4-5", 10) is None
+    with pytest.raises(ValueError):
+        export_jobs.parse_byte_range("bytes=10-", 10)
+
+
+def test_failed_export_job_hides_exception_details(client, inline_jobs, monkeypatch, db_session):
+    headers = {"X-User-ID": "u_job"}
+    _seed(client, headers)
+    # The job shares the test session; a real rollback would discard the seeded rows.
+    monkeypatch.setattr(db_session, "rollback", lambda: None)
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("/secret/path: connection refused")
+
+    monkeypatch.setattr(export_jobs, "count_export_entries", broken)
+    job = client.post("/api/export/jobs", json={}, headers=headers).json()
+    status = client.get(f"/api/export/jobs/{job['id']}", headers=headers).json()
+    assert status["status"] == "failed"
+    assert status["error"] == export_jobs.EXPORT_FAILED_ERROR
+
+
+def test_stale_running_export_job_no_longer_blocks_new_exports(client, monkeypatch, db_session):
+    import models
+    from crud_ops.export_jobs import STALE_EXPORT_ERROR
+
+    headers = {"X-User-ID": "u_job"}
+    monkeypatch.setattr(export_jobs, "submit_export_job", lambda job_id: None)
+    first = client.post("/api/export/jobs", json={}, headers=headers).json()
+    # A worker claimed it and then died without a heartbeat for an hour.
+    db_session.query(models.ExportJob).filter(models.ExportJob.id == first["id"]).update(
+        {models.ExportJob.status: "running", models.ExportJob.updatedAt: 1}
+    )
+    db_session.commit()
+
+    second = client.post("/api/export/jobs", json={}, headers=headers).json()
+    assert second["id"] != first["id"]
+    stale = client.get(f"/api/export/jobs/{first['id']}", headers=headers).json()
+    assert stale["status"] == "failed"
+    assert stale["error"] == STALE_EXPORT_ERROR
@@ -0,0 +1,87 @@
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+import crud_ops as crud
+import schemas
+from routers import public as public_router
+from services import fast_json
+from tests.test_public_api_advanced import setup_data
+
+
+def _validated(schema, rows):
+    # What response_model validation used to produce for the same rows.
+    return jsonable_encoder(TypeAdapter(List[schema]).validate_python(rows, from_attributes=True))
+
+
+def test_fast_public_payloads_match_schema_validation(client, db_session):
+    setup_data(db_session)
+
+    scripts = crud.get_public_scripts(db_session)
+    expected = _validated(schemas.PublicScriptSummary, scripts)
+    for item in expected:
+        if item["owner"]:
+            item["owner"]["email"] = None
+    assert client.get("/api/public-scripts").json() == expected
+
+    personas = client.get("/api/public-personas").json()
+    assert personas == _validated(schemas.PersonaPublic, personas)
+    assert personas[0]["organizations"][0]["tags"] == ["studio"]
+
+    orgs = client.get("/api/public-organizations").json()
+    assert orgs == _validated(schemas.OrganizationPublic, orgs)
+
+    bundle = client.get("/api/public-bundle").json()
+    assert bundle["scripts"] == expected
+    assert bundle["personas"] == personas and bundle["organizations"] == orgs
+
+
+def test_public_payloads_are_cached_as_bytes(client, db_session, monkeypatch):
+    setup_data(db_session)
+    monkeypatch.setattr(fast_json, "PUBLIC_JSON_CACHE_SECONDS", 60)
+    fast_json.payload_cache.clear()
+    calls = []
+    original = public_router.list_public_personas
+
+    def counting(db):
+        calls.append(1)
+        return original(db)
+
+    monkeypatch.setattr(public_router, "list_public_personas", counting)
+    first = client.get("/api/public-personas")
+    second = client.get("/api/public-personas")
+    assert first.content == second.content
+    assert first.headers["content-type"] == "application/json"
+    assert len(calls) == 1
+
+    # Different query parameters are cached separately.
+    mine = client.get("/api/public-scripts", params={"ownerId": "user-has-persona"}).json()
+    assert [s["id"] for s in mine] == ["script-org-public"]
+    assert len(client.get("/api/public-scripts").json()) > 1
+    fast_json.payload_cache.clear()
+
+
+def test_project_coerces_like_the_schema():
+    payload = fast_json.project(schemas.UserPublic, {"id": "u1", "handle": None})
+    assert payload == {
+        "id": "u1",
+        "handle": None,
+        "email": None,
+        "displayName": "Anonymous",
+        "avatar": None,
+        "website": None,
+        "organizationRole": None,
+    }
+    summary = fast_json.project(schemas.ScriptTagsBulkResult, {"added": 2})
+    assert summary == {"added": 2, "removed": 0, "scripts": 0}
+    assert fast_json.dumps({"a": [1, "é"]}) == "{\"a\":[1,\"é\"]}".encode("utf-8")
+
+
+def test_dumps_refuses_arbitrary_objects():
+    import pytest
+    import models
+
+    row = models.User(id="u1", email="private@example.com")
+    with pytest.raises(TypeError):
+        fast_json.dumps({"owner": row})
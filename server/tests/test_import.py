@@ -0,0 +1,71 @@
+import io
+import tarfile
+import zipfile
+
+
+def _zip(entries):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        for name, data in entries.items():
+            z.writestr(name, data)
+    return buf.getvalue()
+
+
+def _upload(client, headers, payload, filename="library.zip", folder=None):
+    data = {"folder": folder} if folder else {}
+    return client.post("/api/scripts/import", files={"file": (filename, payload)}, data=data, headers=headers)
+
+
+def test_import_zip_builds_folders_and_reports_results(client):
+    headers = {"X-User-ID": "u_import"}
+    client.post("/api/scripts", json={"title": "Act 1", "type": "folder", "folder": "/"}, headers=headers)
+    archive = _zip({
+        "Opening.fountain": "INT. ROOM - DAY",
+        "Act 1/Scene A.fountain": "A",
+        "Act 1/Scene B.md": "# B",
+        "Act 1/Deep/Scene C.txt": "C",
+        "cover.png": b"\x89PNG",
+        "__MACOSX/._Opening.fountain": "junk",
+        "Bad.fountain": b"\xff\xfe\xfa",
+    })
+
+    res = _upload(client, headers, archive)
+    assert res.status_code == 200
+    body = res.json()
+    assert body["imported"] == 4
+    assert body["skipped"] == 2
+    by_path = {r["path"]: r for r in body["results"]}
+    assert by_path["Act 1/Deep/Scene C.txt"]["folder"] == "/Act 1/Deep"
+    assert by_path["cover.png"]["reason"] == "unsupported file type"
+    assert by_path["Bad.fountain"]["reason"] == "not UTF-8 text"
+
+    library = client.get("/api/scripts", headers=headers).json()
+    folders = sorted((s["folder"], s["title"]) for s in library if s["type"] == "folder")
+    assert folders == [("/", "Act 1"), ("/Act 1", "Deep")]
+    scene_a = next(s for s in library if s["title"] == "Scene A")
+    assert client.get(f"/api/scripts/{scene_a['id']}", headers=headers).json()["content"] == "A"
+    act_ranks = sorted(s["sortOrder"] for s in library if s["folder"] == "/Act 1")
+    assert len(set(act_ranks)) == len(act_ranks)
+
+    revisions = client.get(f"/api/scripts/{scene_a['id']}/revisions", headers=headers).json()
+    assert [r["revision"] for r in revisions] == [0]
+
+
+def test_import_tarball_into_target_folder(client):
+    headers = {"X-User-ID": "u_import"}
+    buf = io.BytesIO()
+    with tarfile.open(fileobj=buf, mode="w:gz") as tar:
+        data = b"FADE IN:"
+        info = tarfile.TarInfo("drafts/One.fountain")
+        info.size = len(data)
+        tar.addfile(info, io.BytesIO(data))
+
+    res = _upload(client, headers, buf.getvalue(), filename="library.tar.gz", folder="/Imported")
+    assert res.status_code == 200
+    assert res.json()["results"][0]["folder"] == "/Imported/drafts"
+
+
+def test_import_rejects_non_archives(client):
+    headers = {"X-User-ID": "u_import"}
+    res = _upload(client, headers, b"just some text", filename="notes.txt")
+    assert res.status_code == 400
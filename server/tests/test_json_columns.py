@@ -0,0 +1,46 @@
+from sqlalchemy import text
+
+import migration
+import models
+from json_columns import coerce_json_list
+
+
+def test_coerce_json_list_handles_legacy_encodings():
+    assert coerce_json_list(["a"]) == ["a"]
+    assert coerce_json_list('["a"]') == ["a"]
+    assert coerce_json_list('"[\\"a\\"]"') == ["a"]
+    assert coerce_json_list("not json") == []
+    assert coerce_json_list('{"a": 1}') == []
+    assert coerce_json_list(None) == []
+
+
+def test_legacy_rows_are_normalized_once(db_session):
+    conn = db_session.connection()
+    conn.execute(text(
+        "INSERT INTO personas (id, ownerId, displayName, links, organizationIds, tags, defaultLicenseSpecialTerms) "
+        "VALUES ('p_legacy', 'u1', 'Legacy', 'invalid', NULL, :tags, '[]')"
+    ), {"tags": '"[\\"drama\\"]"'})
+    conn.execute(text("INSERT INTO organizations (id, name, tags) VALUES ('o_legacy', 'Legacy', '\"[]\"')"))
+
+    assert migration.normalize_json_list_rows(conn) == 2
+    raw = conn.execute(text("SELECT links, organizationIds, tags FROM personas WHERE id = 'p_legacy'")).fetchone()
+    assert tuple(raw) == ("[]", "[]", '["drama"]')
+    assert conn.execute(text("SELECT tags FROM organizations WHERE id = 'o_legacy'")).scalar() == "[]"
+
+    persona = db_session.get(models.Persona, "p_legacy")
+    assert persona.tags == ["drama"] and persona.links == []
+    # The marker makes later startups skip the scan.
+    conn.execute(text("UPDATE personas SET tags = 'invalid' WHERE id = 'p_legacy'"))
+    assert migration.normalize_json_list_rows(conn) == 0
+
+
+def test_unmigrated_rows_read_as_lists(db_session):
+    conn = db_session.connection()
+    conn.execute(text(
+        "INSERT INTO personas (id, ownerId, displayName, links, organizationIds, tags, defaultLicenseSpecialTerms) "
+        "VALUES ('p_raw', 'u1', 'Raw', 'invalid', NULL, :tags, '[]')"
+    ), {"tags": '"[\\"a\\"]"'})
+
+    persona = db_session.get(models.Persona, "p_raw")
+    assert persona.tags == ["a"]
+    assert persona.links == [] and persona.organizationIds == []
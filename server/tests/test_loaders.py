@@ -0,0 +1,78 @@
+import time
+
+from sqlalchemy import event
+
+import crud_ops as crud
+import models
+from services import fast_json
+
+
+def _count_statements(db_session):
+    statements = []
+    conn = db_session.connection()
+    event.listen(conn, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+def _seed_authors(db_session, count, start=0):
+    now = int(time.time() * 1000)
+    if not start:
+        db_session.add(models.User(id="u_loader", handle="loader"))
+    for i in range(start, start + count):
+        db_session.add(models.Organization(id=f"o_loader_{i}", name=f"Org {i}", ownerId="u_loader"))
+        db_session.add(models.Persona(id=f"p_loader_{i}", ownerId="u_loader", displayName=f"P{i}", organizationIds=[f"o_loader_{i}"]))
+        db_session.add(models.PersonaOrganizationMembership(id=f"m_loader_{i}", orgId=f"o_loader_{i}", personaId=f"p_loader_{i}"))
+        db_session.add(models.Script(
+            id=f"s_loader_{i}", title=f"S{i}", ownerId="u_loader", personaId=f"p_loader_{i}",
+            organizationId=f"o_loader_{i}", folder="/", isPublic=1, type="script", createdAt=now, lastModified=now,
+        ))
+    db_session.commit()
+
+
+def test_batch_loader_coalesces_and_caches():
+    calls = []
+
+    def fetch(keys):
+        calls.append(list(keys))
+        return {key: key.upper() for key in keys if key != "missing"}
+
+    loader = crud.BatchLoader(fetch, default="?")
+    assert loader.load_many(["a", "b", "a", None, "missing"]) == {"a": "A", "b": "B", "missing": "?"}
+    assert loader.load("b") == "B" and loader.load("c") == "C" and loader.load("") == "?"
+    assert calls == [["a", "b", "missing"], ["c"]]
+
+
+def test_public_visibility_matches_folder_rule(db_session):
+    now = int(time.time() * 1000)
+    db_session.add_all([
+        models.Script(id="f_pub", title="pub", ownerId="u_vis", folder="/", isPublic=1, type="folder", createdAt=now, lastModified=now),
+        models.Script(id="s_inherit", title="a", ownerId="u_vis", personaId="p_inherit", folder="/pub", isPublic=0, type="script", createdAt=now, lastModified=now),
+        models.Script(id="s_private", title="b", ownerId="u_vis", personaId="p_private", organizationId="o_private", folder="/other", isPublic=0, type="script", createdAt=now, lastModified=now),
+    ])
+    db_session.commit()
+    loaders = crud.get_loaders(db_session)
+    assert loaders.persona_has_public_script.load_many(["p_inherit", "p_private", "p_none"]) == {
+        "p_inherit": True, "p_private": False, "p_none": False,
+    }
+    assert loaders.org_has_public_script.load("o_private") is False
+    assert loaders.user_has_public_script.load("u_vis") is True
+
+    # Writes in the session drop the cached answers.
+    db_session.query(models.Script).filter(models.Script.id == "s_private").update({models.Script.isPublic: 1})
+    assert crud.get_loaders(db_session).org_has_public_script.load("o_private") is True
+
+
+def test_public_listings_run_constant_queries(client, db_session, monkeypatch):
+    monkeypatch.setattr(fast_json, "PUBLIC_JSON_CACHE_SECONDS", 0)
+    _seed_authors(db_session, 3)
+    counts = {}
+    for label in ("small", "large"):
+        if label == "large":
+            _seed_authors(db_session, 12, start=3)
+        statements = _count_statements(db_session)
+        for path in ("/api/public-personas", "/api/public-organizations", "/api/public-scripts"):
+            assert client.get(path).status_code == 200
+        counts[label] = len(statements)
+    body = client.get("/api/public-personas").json()
+    assert len(body) == 15 and body[0]["organizations"][0]["id"] == body[0]["organizationIds"][0]
+    assert counts["small"] == counts["large"]
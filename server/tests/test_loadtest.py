@@ -0,0 +1,57 @@
+import asyncio
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+import models
+from benchmarks.dataset import DatasetConfig, generate_dataset
+from benchmarks.loadtest import _is_local_database, percentile, run_load
+from main import app
+
+SMALL = DatasetConfig(users=3, orgs=2, scripts_per_user=4, scenes_per_script=3, likes_per_user=2, acceptances=5, seed=7)
+
+
+def _generate_fresh():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        dataset = generate_dataset(db, SMALL)
+        rows = [(s.id, s.contentHash, s.folder, s.isPublic) for s in db.query(models.Script).order_by(models.Script.id)]
+        assert all(isinstance(p.links, list) for p in db.query(models.Persona))
+    return dataset, rows
+
+
+def test_dataset_is_reproducible():
+    dataset, first = _generate_fresh()
+    assert dataset.counts["scripts"] == 12
+    assert dataset.public_script_ids
+    again, second = _generate_fresh()
+    assert second == first
+    assert again.public_script_ids == dataset.public_script_ids
+
+
+def test_load_run_hits_every_scenario(client, db_session):
+    dataset = generate_dataset(db_session, SMALL)
+    # The test app shares one session, so requests must not overlap.
+    result = asyncio.run(run_load(app, dataset, concurrency=1, requests=40, seed=3))
+    assert result["requests"] == 40
+    assert result["errors"] == 0, result["scenarios"]
+    assert set(result["scenarios"]) == {"bundle", "reader", "search", "autosave", "analysis"}
+    for row in result["scenarios"].values():
+        assert row["p50Ms"] <= row["p95Ms"] <= row["p99Ms"] <= row["maxMs"]
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([5.0], 95) == 5.0
+    assert percentile([], 50) == 0.0
+
+
+def test_reset_only_trusts_local_databases():
+    assert _is_local_database("sqlite:///tmp/loadtest.db")
+    assert _is_local_database("postgresql://bench@localhost/bench")
+    assert _is_local_database("postgresql://bench@127.0.0.1:5433/bench")
+    assert _is_local_database("postgresql:///bench?host=/var/run/postgresql")
+    assert not _is_local_database("postgresql://app@db.internal:5432/prod")
@@ -0,0 +1,96 @@
+import io
+import time
+
+from services import metrics
+
+
+def _sample(text, prefix):
+    return [line for line in text.splitlines() if line.startswith(prefix)]
+
+
+def test_metrics_endpoint_reports_routes_and_pool(client):
+    client.get("/api/public-scripts")
+    client.get("/api/public-scripts/does-not-exist")
+    text = client.get("/metrics", headers={"X-User-ID": "admin-owner"}).text
+
+    assert "# TYPE http_requests_total counter" in text
+    assert any('route="/api/public-scripts/{script_id}"' in line and 'status="404"' in line
+               for line in _sample(text, "http_requests_total"))
+    assert any('le="+Inf"' in line and 'route="/api/public-scripts"' in line
+               for line in _sample(text, "http_request_duration_seconds_bucket"))
+    # The scrape itself is in flight while rendering.
+    assert "http_requests_in_progress 1" in text
+    assert "# TYPE db_pool_connections gauge" in text
+
+
+def test_metrics_are_denied_by_default(client, monkeypatch):
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"X-User-ID": "someone"}).status_code == 401
+
+    monkeypatch.setattr(metrics, "METRICS_PUBLIC", True)
+    assert client.get("/metrics").status_code == 200
+
+
+def test_metrics_token(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "secret")
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer secret"}).status_code == 200
+
+
+def test_media_upload_bytes_are_counted(client, tmp_path, monkeypatch):
+    monkeypatch.setenv("MEDIA_STORAGE_ROOT", str(tmp_path / "media"))
+    before = metrics.media_upload_bytes.samples()
+    png = b"\x89PNG\r\n\x1a\n" + b"0" * 100
+    res = client.post(
+        "/api/media/upload",
+        files={"file": ("a.png", io.BytesIO(png), "image/png")},
+        data={"purpose": "cover"},
+        headers={"X-User-ID": "metrics-user"},
+    )
+    assert res.status_code == 200
+    total = dict((tuple(k), v) for k, v in metrics.media_upload_bytes.samples())
+    previous = dict((tuple(k), v) for k, v in before)
+    assert total[("image/png",)] - previous.get(("image/png",), 0) == len(png)
+
+
+def test_worker_files_are_merged(tmp_path):
+    now = time.time()
+    for requests_seen in (3, 4):
+        registry = metrics.Registry()
+        registry._file_name = f"worker-{requests_seen}.json"
+        counter = registry.counter("jobs_total", "Jobs.", ("kind",))
+        gauge = registry.gauge("busy", "Busy workers.")
+        histogram = registry.histogram("job_seconds", "Job time.", buckets=(0.1, 1.0))
+        counter.inc(requests_seen, kind="a")
+        gauge.set(1)
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        registry.flush(str(tmp_path))
+
+    snapshots = metrics.read_snapshots(str(tmp_path))
+    text = metrics.render_snapshots(snapshots, now=now)
+    assert 'jobs_total{kind="a"} 7' in text
+    assert "busy 2" in text
+    assert 'job_seconds_bucket{le="0.1"} 2' in text
+    assert 'job_seconds_bucket{le="1"} 4' in text
+    assert 'job_seconds_bucket{le="+Inf"} 4' in text
+    assert "job_seconds_count 4" in text
+
+    # A worker that stopped reporting keeps its counters but not its gauges.
+    later = metrics.render_snapshots(snapshots, now=now + metrics.METRICS_STALE_SECONDS + 1)
+    assert 'jobs_total{kind="a"} 7' in later
+    assert not _sample(later, "busy ")
+
+
+def test_worker_file_is_written_off_the_request_path(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_MULTIPROC_DIR", str(tmp_path))
+    monkeypatch.setattr(metrics, "METRICS_FLUSH_SECONDS", 0.01)
+    registry = metrics.Registry()
+    monkeypatch.setattr(metrics, "registry", registry)
+
+    client.get("/api/public-scripts")
+    assert registry._flusher_thread is not None and registry._flusher_thread.name == "metrics-flusher"
+    deadline = time.time() + 5
+    while not list(tmp_path.glob("*.json")) and time.time() < deadline:
+        time.sleep(0.01)
+    assert list(tmp_path.glob("*.json"))
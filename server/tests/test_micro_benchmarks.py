@@ -0,0 +1,27 @@
+from benchmarks import micro
+
+
+def test_cases_cover_sizes_themes_and_templates():
+    names = set(micro.all_cases())
+    assert {f"analyzer/{size}/{theme}" for size in micro.SCRIPT_SIZES for theme in micro.THEMES} <= names
+    assert {f"seo/{tpl}/{page}" for tpl in micro.SEO_TEMPLATES for page in micro.SEO_PAGES} <= names
+
+
+def test_fixture_scripts_exercise_marker_layers():
+    cases = micro.analyzer_cases()
+    result = cases["analyzer/small/complex"]()
+    assert result["counts"]["scenes"] == micro.SCRIPT_SIZES["small"]
+    assert result["customLayers"]
+    assert not cases["analyzer/small/plain"]()["customLayers"]
+
+
+def test_run_and_compare_flag_regressions():
+    cases = {name: fn for name, fn in micro.all_cases().items() if name in {"analyzer/small/plain", "seo/app/about"}}
+    results = micro.run(cases, min_time=0.001, repeat=1)
+    for row in results.values():
+        assert row["opsPerSec"] > 0 and row["peakBytes"] > 0
+
+    slower = {name: dict(row, usPerOp=row["usPerOp"] * 1.5) for name, row in results.items()}
+    rows = micro.compare(results, slower, threshold=10)
+    assert all(row["regression"] and row["changePct"] == 50.0 for row in rows)
+    assert not any(row["regression"] for row in micro.compare(slower, results, threshold=10))
@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+
+import migration
+import models
+
+
+class _RecordingConnection:
+    def __init__(self):
+        self.statements = []
+        self.dialect = SimpleNamespace(name="postgresql")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, statement, params=None):
+        self.statements.append(" ".join(str(statement).split()))
+        return SimpleNamespace(fetchall=lambda: [], fetchone=lambda: None, scalar=lambda: None)
+
+    def commit(self):
+        pass
+
+
+def test_postgres_migrations_add_columns_missing_from_existing_tables(monkeypatch):
+    conn = _RecordingConnection()
+    fake_engine = SimpleNamespace(dialect=conn.dialect, connect=lambda: conn)
+    monkeypatch.setattr(migration, "engine", fake_engine)
+
+    migration.run_migrations()
+
+    for table_name, column_name, _ in migration.POSTGRES_ADDED_COLUMNS:
+        assert column_name in models.Base.metadata.tables[table_name].c
+        assert f'ALTER TABLE {table_name} ADD COLUMN IF NOT EXISTS "{column_name}"' in " ".join(conn.statements)
+    assert not any("PRAGMA" in statement for statement in conn.statements)
+
+
+def test_backfill_content_stats_fills_missing_rows(db_session):
+    from sqlalchemy import text
+
+    conn = db_session.connection()
+    conn.execute(text(
+        "INSERT INTO scripts (id, ownerId, title, content, contentHash) VALUES ('s_old', 'u1', 'Old', 'hello', NULL)"
+    ))
+    migration.backfill_content_stats(conn)
+    row = conn.execute(text("SELECT contentLength, contentHash FROM scripts WHERE id = 's_old'")).fetchone()
+    assert row.contentLength == 5 and row.contentHash
+
+
+def test_backfill_content_summaries_fills_missing_rows(db_session):
+    from sqlalchemy import text
+
+    conn = db_session.connection()
+    conn.execute(text(
+        "INSERT INTO scripts (id, ownerId, title, content, excerpt) VALUES ('s_old', 'u1', 'Old', 'Hello there.', NULL)"
+    ))
+    migration.backfill_content_summaries(conn)
+    assert conn.execute(text("SELECT excerpt FROM scripts WHERE id = 's_old'")).scalar() == "Hello there."
@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from services import profiler
+
+ADMIN = {"X-User-ID": "admin-owner"}
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _busy_loop_for_profiler(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(200))
+
+
+def test_sampler_collapses_busy_threads():
+    sampler = profiler.StackSampler(interval_ms=1).start()
+    worker = threading.Thread(target=_busy_loop_for_profiler, args=(0.1,), name="busy-worker")
+    worker.start()
+    worker.join()
+    samples = sampler.stop()
+
+    busy = {stack: count for stack, count in samples.items() if stack.startswith("busy-worker;")}
+    assert busy and all("_busy_loop_for_profiler (test_profiler.py:" in stack for stack in busy)
+    line = profiler.render_collapsed(busy).splitlines()[0]
+    assert line.rsplit(" ", 1)[1].isdigit()
+    # The sampler never records itself or threads that are just waiting.
+    assert not any(stack.startswith("request-profiler;") for stack in samples)
+
+
+def test_admin_profile_is_stored(client, profile_dir):
+    res = client.get("/api/public-scripts", params={"__profile": "1"}, headers=ADMIN)
+    assert res.status_code == 200
+    assert isinstance(res.json(), list)
+    profile_id = res.headers["X-Profile-Id"]
+    assert "get-api-public-scripts" in profile_id
+    assert (profile_dir / f"{profile_id}.collapsed").exists()
+    assert int(res.headers["X-Profile-Samples"]) >= 0
+
+
+def test_admin_can_download_collapsed_stacks(client):
+    res = client.get("/api/public-scripts", headers={**ADMIN, "X-Profile": "collapsed"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    assert res.headers["X-Profiled-Status"] == "200"
+
+
+def test_profile_flag_is_ignored_for_non_admins(client, profile_dir):
+    for headers in ({"X-User-ID": "someone"}, {}):
+        res = client.get("/api/public-scripts", params={"__profile": "collapsed"}, headers=headers)
+        assert res.status_code == 200
+        assert isinstance(res.json(), list)
+        assert "X-Profile-Id" not in res.headers and "X-Profile-Samples" not in res.headers
+    assert not list(profile_dir.iterdir())
+
+
+def test_profiling_can_be_disabled(client, monkeypatch):
+    monkeypatch.setattr(profiler, "REQUEST_PROFILING_ENABLED", False)
+    res = client.get("/api/public-scripts", params={"__profile": "1"}, headers=ADMIN)
+    assert "X-Profile-Id" not in res.headers
+
+
+def test_stored_profiles_are_capped(profile_dir, monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_RETENTION", 2)
+    for name in ("20240101T000000-000-get-first", "20240101T000001-000-get-second"):
+        (profile_dir / f"{name}.collapsed").write_text("a;b 1\n")
+    profile_id = profiler.store({"a;b": 3}, "GET", "/api/x")
+    kept = sorted(path.name for path in profile_dir.iterdir())
+    assert kept == ["20240101T000001-000-get-second.collapsed", f"{profile_id}.collapsed"]
@@ -67,3 +67,37 @@ def test_public_themes_list(client):
     names = [t["name"] for t in themes]
     assert "Public One" in names
     assert "Private One" not in names
+
+
+def test_public_listings_return_summaries_without_content(client, db_session):
+    from sqlalchemy import event
+
+    headers = {"X-User-ID": "author_summary"}
+    body = "Title: Big Night\n\nINT. BAR - NIGHT\n\nRain hammers the window.\n\nMAX\nWe close at two.\n" + "a" * 600
+    script_id = client.post(
+        "/api/scripts",
+        json={"title": "Big Night", "content": body, "isPublic": True},
+        headers=headers,
+    ).json()["id"]
+    client.put(f"/api/scripts/{script_id}", json={"isPublic": True}, headers=headers)
+
+    statements = []
+    engine = db_session.get_bind().engine
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        listing = client.get("/api/public-scripts", params={"ownerId": "author_summary"}).json()
+        bundle = client.get("/api/public-bundle").json()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+    for item in (listing[0], next(s for s in bundle["scripts"] if s["id"] == script_id)):
+        assert "content" not in item
+        assert item["excerpt"].startswith("Rain hammers the window. We close at two. aaa")
+        assert item["excerpt"].endswith("…")
+        assert item["contentLength"] == len(body)
+        assert item["durationMinutes"] == round(len(body.replace("\n", "").replace("Title: Big Night", "").replace("INT. BAR - NIGHT", "")) / 300, 1)
+    assert not any("scripts.content" in s for s in statements)
@@ -0,0 +1,114 @@
+import time
+
+import pytest
+from sqlalchemy import insert
+
+import crud_ops as crud
+from crud_ops.common import utc_day
+import models
+
+OWNER = {"X-User-ID": "u_budget"}
+ADMIN = {"X-User-ID": "admin-owner"}
+
+
+def seed(db_session, start, stop):
+    # Authors `start..stop-1`, each with a persona, an org, a public script and
+    # a private script inside a public folder; u_budget owns all the scripts.
+    now = int(time.time() * 1000)
+    ids = range(start, stop)
+    if start == 0:
+        db_session.execute(insert(models.User), [{"id": "u_budget", "handle": "budget"}])
+        db_session.execute(insert(models.Tag), [
+            {"id": 9000 + i, "ownerId": "u_budget", "name": f"tag{i}", "color": "bg-blue-500"} for i in range(5)
+        ])
+        db_session.execute(insert(models.Script), [{
+            "id": "f_budget", "title": "shelf", "ownerId": "u_budget", "folder": "/", "type": "folder",
+            "isPublic": 1, "createdAt": now, "lastModified": now,
+        }])
+    db_session.execute(insert(models.User), [{"id": f"u_budget_{i}", "handle": f"budget{i}"} for i in ids])
+    db_session.execute(insert(models.Organization), [
+        {"id": f"o_budget_{i}", "name": f"Org {i}", "ownerId": "u_budget", "tags": ["t"]} for i in ids
+    ])
+    db_session.execute(insert(models.Persona), [
+        {"id": f"p_budget_{i}", "ownerId": "u_budget", "displayName": f"P{i}", "links": [{"url": "x"}],
+         "organizationIds": [f"o_budget_{i}"]} for i in ids
+    ])
+    db_session.execute(insert(models.PersonaOrganizationMembership), [
+        {"id": f"pm_budget_{i}", "orgId": f"o_budget_{i}", "personaId": f"p_budget_{i}"} for i in ids
+    ])
+    db_session.execute(insert(models.OrganizationMembership), [
+        {"id": f"om_budget_{i}", "orgId": f"o_budget_{i}", "userId": f"u_budget_{i}"} for i in ids
+    ])
+    db_session.execute(insert(models.Script), [
+        {"id": f"s_budget_{i}", "title": f"S{i}", "ownerId": "u_budget", "personaId": f"p_budget_{i}",
+         "organizationId": f"o_budget_{i}", "folder": "/", "type": "script", "isPublic": 1,
+         "content": "INT. ROOM\n\nHello.", "createdAt": now - i, "lastModified": now - i}
+        for i in ids
+    ] + [
+        {"id": f"s_budget_in_{i}", "title": f"In{i}", "ownerId": "u_budget", "personaId": f"p_budget_{i}",
+         "folder": "/shelf", "type": "script", "isPublic": 0, "createdAt": now - i, "lastModified": now - i}
+        for i in ids
+    ])
+    db_session.execute(insert(models.ScriptTag), [{"scriptId": f"s_budget_{i}", "tagId": 9000 + i % 5} for i in ids])
+    db_session.execute(insert(models.ScriptLike), [{"userId": "u_budget", "scriptId": f"s_budget_{i}"} for i in ids])
+    db_session.execute(insert(models.ScriptDailyStat), [
+        {"scriptId": f"s_budget_{i}", "day": utc_day(), "views": i + 1} for i in ids
+    ])
+    db_session.commit()
+    crud.refresh_public_rankings(db_session)
+
+
+# Statements per request. Budgets are fixed: they must hold for 10 and for
+# 1,000 authors alike, so a per-row lookup shows up as a failure here.
+QUERY_BUDGETS = [
+    ("/api/public-scripts", None, 4),
+    ("/api/public-scripts?ownerId=u_budget&folder=/shelf", None, 4),
+    ("/api/public-trending", None, 4),
+    ("/api/public-scripts/s_budget_0", None, 1),
+    ("/api/public-scripts/s_budget_in_0/raw", None, 2),
+    ("/api/public-personas", None, 7),
+    ("/api/public-personas/p_budget_0", None, 6),
+    ("/api/public-organizations", None, 3),
+    ("/api/public-organizations/o_budget_0", None, 8),
+    # Listing personas after the script page may need a second loader batch.
+    ("/api/public-bundle", None, 14),
+    ("/api/public-homepage-banner", None, 1),
+    ("/api/themes/public", None, 1),
+    ("/api/scripts", OWNER, 1),
+    ("/api/scripts/s_budget_0", OWNER, 3),
+    ("/api/scripts/liked-status?ids=s_budget_0,s_budget_1,s_budget_2", OWNER, 1),
+    ("/api/scripts/engagement", OWNER, 2),
+    ("/api/personas", OWNER, 1),
+    ("/api/organizations", OWNER, 1),
+    ("/api/organizations/o_budget_0", OWNER, 1),
+    ("/api/organizations/o_budget_0/members", OWNER, 8),
+    ("/api/tags", OWNER, 1),
+    ("/api/series", OWNER, 1),
+    ("/api/me", OWNER, 5),
+]
+
+# Authoring writes, run in order after the reads (the PATCH builds on the PUT's
+# revision). They cover revision snapshots, tag recounts and CASE updates.
+WRITE_QUERY_BUDGETS = [
+    ("POST", "/api/scripts", {"title": "New", "content": "INT. ROOM\n\nHi."}, 9),
+    ("PUT", "/api/scripts/s_budget_0", {"content": "INT. ROOM\n\nHello again."}, 7),
+    ("PATCH", "/api/scripts/s_budget_0/content", {"baseRevision": 1, "edits": [{"start": 0, "end": 0, "text": "X"}]}, 6),
+    ("PUT", "/api/scripts/reorder", {"items": [{"id": "s_budget_0", "sortOrder": 5.0}, {"id": "s_budget_1", "sortOrder": 6.0}]}, 1),
+    ("PUT", "/api/scripts/s_budget_2/move", {"beforeId": "s_budget_0"}, 5),
+    ("POST", "/api/scripts/tags/bulk", {"scriptIds": ["s_budget_0", "s_budget_1", "s_budget_2"], "addTagIds": [9001], "removeTagIds": [9000]}, 8),
+]
+
+
+@pytest.mark.parametrize("authors", [10, 1000])
+def test_endpoints_stay_within_query_budget(client, db_session, query_count, authors):
+    seed(db_session, 0, authors)
+    over = {}
+    for path, headers, budget in QUERY_BUDGETS:
+        used = query_count(path, headers)
+        if used > budget:
+            over[path] = (used, budget)
+    for method, path, body, budget in WRITE_QUERY_BUDGETS:
+        used = query_count(path, OWNER, method=method, json=body)
+        if used > budget:
+            over[f"{method} {path}"] = (used, budget)
+    assert not over, f"query budget exceeded with {authors} authors (used, budget): {over}"
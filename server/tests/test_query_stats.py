@@ -0,0 +1,35 @@
+import json
+import logging
+
+from services import query_stats
+
+
+def test_query_stats_headers_and_slow_log(client, db_session, monkeypatch, caplog):
+    res = client.get("/api/public-scripts")
+    assert "X-DB-Queries" not in res.headers
+
+    monkeypatch.setattr(query_stats, "DB_QUERY_HEADERS", True)
+    monkeypatch.setattr(query_stats, "SLOW_QUERY_MS", 0)
+    monkeypatch.setattr(query_stats, "REQUEST_QUERY_WARN_COUNT", 0)
+    with caplog.at_level(logging.WARNING, logger="services.query_stats"):
+        res = client.get("/api/public-scripts")
+    count = int(res.headers["X-DB-Queries"])
+    assert count > 0
+    assert res.headers["Server-Timing"].startswith("db;dur=")
+    assert f'desc="{count} queries"' in res.headers["Server-Timing"]
+
+    slow = [r.getMessage() for r in caplog.records if r.getMessage().startswith("slow_query ")]
+    assert len(slow) == count
+    entry = json.loads(slow[0].split(" ", 1)[1])
+    assert entry["path"] == "/api/public-scripts" and entry["statement"].startswith("SELECT")
+    heavy = [r.getMessage() for r in caplog.records if r.getMessage().startswith("query_heavy_request ")]
+    summary = json.loads(heavy[0].split(" ", 1)[1])
+    assert summary["queries"] == count and len(summary["slowest"]) == min(count, query_stats.SLOWEST_KEPT)
+
+
+def test_request_stats_keep_slowest_statements():
+    stats = query_stats.RequestQueryStats("/x")
+    for ms in (5, 1, 9, 3, 7):
+        stats.record(f"q{ms}", ms)
+    assert stats.count == 5 and stats.total_ms == 25
+    assert [sql for _, sql in stats.slowest] == ["q9", "q7", "q5"]
@@ -0,0 +1,88 @@
+import time
+
+import crud_ops as crud
+import models
+from crud_ops.engagement import utc_day
+
+
+def _script(db, script_id, *, public=True, views=0, tags=()):
+    db.add(models.Script(id=script_id, ownerId="u_rank", title=script_id, type="script", folder="/", isPublic=1 if public else 0, views=views))
+    for name in tags:
+        tag = db.query(models.Tag).filter(models.Tag.name == name).first()
+        if not tag:
+            tag = models.Tag(ownerId="u_rank", name=name, color="#888888")
+            db.add(tag)
+            db.flush()
+        db.add(models.ScriptTag(scriptId=script_id, tagId=tag.id))
+
+
+def _stat(db, script_id, days_ago, now, views=0, likes=0):
+    db.add(models.ScriptDailyStat(scriptId=script_id, day=utc_day(now - days_ago * 86400), views=views, likes=likes, unlikes=0))
+
+
+def _seed(db, now):
+    db.add(models.User(id="u_rank"))
+    _script(db, "fresh", views=20, tags=["Drama", "Short"])
+    _script(db, "stale", views=400, tags=["Drama"])
+    _script(db, "liked", views=5, tags=["Comedy"])
+    _script(db, "hidden", public=False, views=999, tags=["Secret"])
+    _stat(db, "fresh", 0, now, views=20)
+    _stat(db, "stale", 9, now, views=400)  # big but ~3 half-lives old
+    _stat(db, "liked", 1, now, views=5, likes=4)
+    _stat(db, "hidden", 0, now, views=999)
+    db.commit()
+
+
+def test_refresh_ranks_trending_with_decay_and_tags_over_catalogue(db_session):
+    now = time.time()
+    _seed(db_session, now)
+
+    result = crud.refresh_public_rankings(db_session, now=now)
+    assert result["trending"] == 3
+
+    # stale: 400 * 0.5**3 = 50, fresh: 20, liked: (5 + 5*4) * 0.5**(1/3) ~ 19.8
+    assert crud.get_trending_script_ids(db_session) == ["stale", "fresh", "liked"]
+
+    assert crud.get_top_tag_names(db_session, limit=5) == ["Drama", "Short", "Comedy"]
+
+
+def test_refresh_overwrites_ranks_and_trims_shorter_lists(db_session):
+    now = time.time()
+    _seed(db_session, now)
+    crud.refresh_public_rankings(db_session, now=now)
+
+    db_session.query(models.Script).filter(models.Script.id.in_(["stale", "liked"])).update(
+        {models.Script.isPublic: 0}, synchronize_session=False
+    )
+    db_session.commit()
+    result = crud.refresh_public_rankings(db_session, now=now)
+    assert result["trending"] == 1
+    assert crud.get_trending_script_ids(db_session) == ["fresh"]
+    assert db_session.query(models.PublicRanking).filter(models.PublicRanking.kind == "trending").count() == 1
+
+
+def test_bundle_and_trending_read_precomputed_rankings(client, db_session):
+    now = time.time()
+    _seed(db_session, now)
+    crud.refresh_public_rankings(db_session, now=now)
+
+    bundle = client.get("/api/public-bundle").json()
+    assert bundle["topTags"] == ["Drama", "Short", "Comedy"]
+    assert bundle["trendingScriptIds"][0] == "stale"
+
+    owner = db_session.get(models.User, "u_rank")
+    owner.email = "rank@example.com"
+    db_session.commit()
+    trending = client.get("/api/public-trending", params={"limit": 2}).json()
+    assert [s["id"] for s in trending] == bundle["trendingScriptIds"][:2]
+    assert all(s["owner"]["email"] is None for s in trending)
+    # The listing is projected, not scrubbed in place on the shared ORM rows.
+    db_session.refresh(owner)
+    assert owner.email == "rank@example.com"
+
+
+def test_admin_can_refresh_rankings(client):
+    assert client.post("/api/admin/rankings/refresh", headers={"X-User-ID": "someone"}).status_code == 403
+    res = client.post("/api/admin/rankings/refresh", headers={"X-User-ID": "admin-owner"})
+    assert res.status_code == 200
+    assert res.json()["trending"] == 0
@@ -0,0 +1,106 @@
+import models
+from crud_ops import engagement
+from services.hyperloglog import HLL_REGISTERS, HyperLogLog
+
+
+def test_hyperloglog_estimates_and_merges():
+    first, second = HyperLogLog(), HyperLogLog()
+    for i in range(20000):
+        first.add(f"visitor-{i}")
+    for i in range(10000, 30000):
+        second.add(f"visitor-{i}")
+    assert abs(first.count() - 20000) / 20000 < 0.05
+
+    restored = HyperLogLog.from_bytes(first.to_bytes())
+    assert restored.registers == first.registers
+    union = restored.merge(second)
+    assert abs(union.count() - 30000) / 30000 < 0.05
+
+    small = HyperLogLog()
+    for _ in range(3):
+        for key in ("a", "b", "c"):
+            small.add(key)
+    assert small.count() == 3
+    assert HyperLogLog().count() == 0
+    assert len(HyperLogLog.from_bytes(small.to_bytes()).registers) == HLL_REGISTERS
+
+
+def test_views_feed_unique_readers_per_script_persona_and_org(client, db_session):
+    headers = {"X-User-ID": "u_reach"}
+    db_session.add(models.User(id="u_reach"))
+    db_session.add(models.Organization(id="org_reach", name="Reach", ownerId="u_reach"))
+    db_session.add(models.Persona(id="p_reach", ownerId="u_reach", displayName="Reach"))
+    db_session.commit()
+    first = client.post("/api/scripts", json={"title": "One"}, headers=headers).json()["id"]
+    second = client.post("/api/scripts", json={"title": "Two"}, headers=headers).json()["id"]
+    db_session.query(models.Script).filter(models.Script.id.in_([first, second])).update(
+        {models.Script.personaId: "p_reach", models.Script.organizationId: "org_reach"},
+        synchronize_session=False,
+    )
+    db_session.commit()
+
+    for visitor in ("a", "b", "c"):
+        client.post(f"/api/scripts/{first}/view", json={"visitorId": visitor})
+    for visitor in ("a", "d"):
+        client.post(f"/api/scripts/{second}/view", json={"visitorId": visitor})
+    engagement.flush_view_counts(db_session)
+
+    res = client.get(f"/api/scripts/{first}/readers", params={"days": 7}, headers=headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert body["scope"] == "script" and body["uniqueReaders"] == 3
+    assert len(body["days"]) == 7
+    assert body["days"][-1] == {"day": engagement.utc_day(), "uniqueReaders": 3}
+
+    # Visitor "a" read both scripts and is counted once for the persona/org.
+    persona = client.get("/api/personas/p_reach/readers", headers=headers).json()
+    assert persona["uniqueReaders"] == 4
+    org = client.get("/api/organizations/org_reach/readers", headers=headers).json()
+    assert org["uniqueReaders"] == 4
+
+    assert client.get(f"/api/scripts/{first}/readers", headers={"X-User-ID": "other"}).status_code == 404
+    assert client.get("/api/personas/p_reach/readers", headers={"X-User-ID": "other"}).status_code == 404
+    assert client.get("/api/organizations/org_reach/readers", headers={"X-User-ID": "other"}).status_code == 403
+
+
+def test_terms_acceptance_visitor_feeds_reader_sketch(client, db_session):
+    headers = {"X-User-ID": "u_terms_reach"}
+    script_id = client.post("/api/scripts", json={"title": "Public"}, headers=headers).json()["id"]
+    db_session.query(models.Script).filter(models.Script.id == script_id).update({models.Script.isPublic: 1})
+    db_session.commit()
+    config = client.get("/api/public-terms-config").json()
+    payload = {
+        "termsVersion": config["version"],
+        "scriptId": script_id,
+        "acceptedChecks": [item["id"] for item in config.get("requiredChecks") or []],
+    }
+    for visitor in ("reader-1", "reader-2", "reader-1"):
+        assert client.post("/api/public-terms-acceptances", json={**payload, "visitorId": visitor}).status_code == 200
+
+    body = client.get(f"/api/scripts/{script_id}/readers", headers=headers).json()
+    assert body["uniqueReaders"] == 2
+
+    client.delete(f"/api/scripts/{script_id}", headers=headers)
+    assert db_session.query(models.ScriptReaderSketch).filter(models.ScriptReaderSketch.scriptId == script_id).count() == 0
+
+
+def test_add_script_readers_merges_into_row_created_concurrently(db_session):
+    import crud_ops as crud
+    from services.hyperloglog import hash_visitor
+
+    db_session.add(models.Script(id="s_race", ownerId="u_race", title="Race", type="script", folder="/"))
+    db_session.commit()
+    crud.record_script_readers(db_session, "s_race", ["a"], day="2026-01-01")
+    # Another worker inserts "tomorrow's" row behind this session's back.
+    other = HyperLogLog()
+    other.update({hash_visitor("b")})
+    db_session.execute(
+        models.ScriptReaderSketch.__table__.insert().values(
+            scriptId="s_race", day="2026-01-02", registers=other.to_bytes(), updatedAt=0
+        )
+    )
+
+    crud.record_script_readers(db_session, "s_race", ["a", "c"], day="2026-01-02")
+    crud.record_script_readers(db_session, "s_race", ["d"], day="2026-01-01")
+    rows = {row.day: HyperLogLog.from_bytes(row.registers).count() for row in db_session.query(models.ScriptReaderSketch)}
+    assert rows == {"2026-01-01": 2, "2026-01-02": 3}
@@ -182,3 +182,422 @@ def test_script_custom_metadata_roundtrip(client):
     row = next((item for item in summary_items if item["id"] == script_id), None)
     assert row is not None
     assert isinstance(row.get("customMetadata"), list)
+
+
+def test_script_move_between_siblings_only_updates_moved_row(client):
+    headers = {"X-User-ID": "u1"}
+    s1 = client.post("/api/scripts", json={"title": "S1"}, headers=headers).json()
+    s2 = client.post("/api/scripts", json={"title": "S2"}, headers=headers).json()
+    s3 = client.post("/api/scripts", json={"title": "S3"}, headers=headers).json()
+    assert [s1["sortOrder"], s2["sortOrder"], s3["sortOrder"]] == [0.0, 1000.0, 2000.0]
+
+    res = client.put(
+        f"/api/scripts/{s3['id']}/move",
+        json={"beforeId": s1["id"], "afterId": s2["id"]},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    assert res.json()["sortOrder"] == 500.0
+
+    items = client.get("/api/scripts", headers=headers).json()
+    assert [item["id"] for item in items] == [s1["id"], s3["id"], s2["id"]]
+    assert [item["sortOrder"] for item in items] == [0.0, 500.0, 1000.0]
+
+
+def test_script_move_to_edges(client):
+    headers = {"X-User-ID": "u1"}
+    s1 = client.post("/api/scripts", json={"title": "S1"}, headers=headers).json()
+    s2 = client.post("/api/scripts", json={"title": "S2"}, headers=headers).json()
+
+    res = client.put(f"/api/scripts/{s2['id']}/move", json={"afterId": s1["id"]}, headers=headers)
+    assert res.json()["sortOrder"] == -1000.0
+
+    res = client.put(f"/api/scripts/{s2['id']}/move", json={"beforeId": s1["id"]}, headers=headers)
+    assert res.json()["sortOrder"] == 1000.0
+
+    res = client.put("/api/scripts/missing/move", json={}, headers=headers)
+    assert res.status_code == 404
+
+
+def test_script_move_with_one_neighbour_stays_before_the_next_sibling(client):
+    headers = {"X-User-ID": "u1"}
+    s1 = client.post("/api/scripts", json={"title": "S1"}, headers=headers).json()
+    s2 = client.post("/api/scripts", json={"title": "S2"}, headers=headers).json()
+    s3 = client.post("/api/scripts", json={"title": "S3"}, headers=headers).json()
+
+    res = client.put(f"/api/scripts/{s3['id']}/move", json={"beforeId": s1["id"]}, headers=headers)
+    assert res.json()["sortOrder"] == 500.0
+    res = client.put(f"/api/scripts/{s1['id']}/move", json={"afterId": s2["id"]}, headers=headers)
+    assert res.json()["sortOrder"] == 750.0
+
+    items = client.get("/api/scripts", headers=headers).json()
+    assert [item["id"] for item in items] == [s3["id"], s1["id"], s2["id"]]
+
+
+def test_script_move_rejects_neighbours_outside_the_folder(client):
+    headers = {"X-User-ID": "u1"}
+    s1 = client.post("/api/scripts", json={"title": "S1"}, headers=headers).json()
+    s2 = client.post("/api/scripts", json={"title": "S2"}, headers=headers).json()
+    other_folder = client.post("/api/scripts", json={"title": "S3", "folder": "/drafts"}, headers=headers).json()
+    foreign = client.post("/api/scripts", json={"title": "S4"}, headers={"X-User-ID": "u2"}).json()
+
+    res = client.put(f"/api/scripts/{s2['id']}/move", json={"beforeId": "missing"}, headers=headers)
+    assert res.status_code == 404
+    res = client.put(f"/api/scripts/{s2['id']}/move", json={"beforeId": foreign["id"]}, headers=headers)
+    assert res.status_code == 404
+    res = client.put(
+        f"/api/scripts/{s2['id']}/move",
+        json={"beforeId": s1["id"], "afterId": other_folder["id"]},
+        headers=headers,
+    )
+    assert res.status_code == 400
+    res = client.put(f"/api/scripts/{s2['id']}/move", json={"afterId": s2["id"]}, headers=headers)
+    assert res.status_code == 400
+
+    items = client.get("/api/scripts", headers=headers).json()
+    assert next(item for item in items if item["id"] == s2["id"])["sortOrder"] == 1000.0
+
+
+def test_script_move_rebalances_collapsed_gap(client):
+    headers = {"X-User-ID": "u1"}
+    s1 = client.post("/api/scripts", json={"title": "S1"}, headers=headers).json()
+    s2 = client.post("/api/scripts", json={"title": "S2"}, headers=headers).json()
+    s3 = client.post("/api/scripts", json={"title": "S3"}, headers=headers).json()
+    client.put(
+        "/api/scripts/reorder",
+        json={"items": [{"id": s1["id"], "sortOrder": 1.0}, {"id": s2["id"], "sortOrder": 1.0 + 1e-9}]},
+        headers=headers,
+    )
+
+    res = client.put(
+        f"/api/scripts/{s3['id']}/move",
+        json={"beforeId": s1["id"], "afterId": s2["id"]},
+        headers=headers,
+    )
+    assert res.status_code == 200
+
+    items = client.get("/api/scripts", headers=headers).json()
+    assert [item["id"] for item in items] == [s1["id"], s3["id"], s2["id"]]
+    orders = [item["sortOrder"] for item in items]
+    assert orders[1] - orders[0] >= 100.0
+    assert orders[2] - orders[1] >= 100.0
+
+
+def test_script_reorder_ignores_other_owners(client):
+    s1 = client.post("/api/scripts", json={"title": "Mine"}, headers={"X-User-ID": "u1"}).json()
+    other = client.post("/api/scripts", json={"title": "Theirs"}, headers={"X-User-ID": "u2"}).json()
+
+    res = client.put(
+        "/api/scripts/reorder",
+        json={"items": [{"id": s1["id"], "sortOrder": 42.0}, {"id": other["id"], "sortOrder": 99.0}]},
+        headers={"X-User-ID": "u1"},
+    )
+    assert res.status_code == 200
+
+    theirs = client.get(f"/api/scripts/{other['id']}", headers={"X-User-ID": "u2"}).json()
+    assert theirs["sortOrder"] == 0.0
+    mine = client.get(f"/api/scripts/{s1['id']}", headers={"X-User-ID": "u1"}).json()
+    assert mine["sortOrder"] == 42.0
+
+
+def test_script_content_patch_applies_edits(client):
+    headers = {"X-User-ID": "u1"}
+    script = client.post("/api/scripts", json={"title": "Patch", "content": "INT. ROOM - DAY\n\nHello."}, headers=headers).json()
+    assert script["revision"] == 0
+
+    res = client.patch(
+        f"/api/scripts/{script['id']}/content",
+        json={
+            "baseRevision": 0,
+            "edits": [
+                {"start": 0, "end": 3, "text": "EXT"},
+                {"start": 17, "end": 23, "text": "Goodbye."},
+            ],
+        },
+        headers=headers,
+    )
+    assert res.status_code == 200
+    assert res.json()["revision"] == 1
+
+    detail = client.get(f"/api/scripts/{script['id']}", headers=headers).json()
+    assert detail["content"] == "EXT. ROOM - DAY\n\nGoodbye."
+    assert detail["revision"] == 1
+
+
+def test_script_content_patch_detects_conflict(client):
+    headers = {"X-User-ID": "u1"}
+    script = client.post("/api/scripts", json={"title": "Patch", "content": "abc"}, headers=headers).json()
+    client.put(f"/api/scripts/{script['id']}", json={"content": "abcd"}, headers=headers)
+
+    res = client.patch(
+        f"/api/scripts/{script['id']}/content",
+        json={"baseRevision": 0, "edits": [{"start": 3, "end": 3, "text": "!"}]},
+        headers=headers,
+    )
+    assert res.status_code == 409
+    assert res.json()["detail"]["revision"] == 1
+
+    detail = client.get(f"/api/scripts/{script['id']}", headers=headers).json()
+    assert detail["content"] == "abcd"
+
+
+def test_script_content_patch_rejects_bad_edits(client):
+    headers = {"X-User-ID": "u1"}
+    script = client.post("/api/scripts", json={"title": "Patch", "content": "abc"}, headers=headers).json()
+
+    out_of_range = client.patch(
+        f"/api/scripts/{script['id']}/content",
+        json={"baseRevision": 0, "edits": [{"start": 2, "end": 10, "text": "x"}]},
+        headers=headers,
+    )
+    assert out_of_range.status_code == 422
+
+    overlapping = client.patch(
+        f"/api/scripts/{script['id']}/content",
+        json={"baseRevision": 0, "edits": [{"start": 0, "end": 2, "text": "x"}, {"start": 1, "end": 3, "text": "y"}]},
+        headers=headers,
+    )
+    assert overlapping.status_code == 422
+
+    other_owner = client.patch(
+        f"/api/scripts/{script['id']}/content",
+        json={"baseRevision": 0, "edits": []},
+        headers={"X-User-ID": "u2"},
+    )
+    assert other_owner.status_code == 404
+
+
+def test_script_content_patch_uses_utf16_offsets(client):
+    headers = {"X-User-ID": "u1"}
+    # "🎬" is one code point but two UTF-16 code units, as a JS editor counts it.
+    script = client.post("/api/scripts", json={"title": "Emoji", "content": "🎬 Scene\nHi"}, headers=headers).json()
+
+    res = client.patch(
+        f"/api/scripts/{script['id']}/content",
+        json={"baseRevision": 0, "edits": [{"start": 9, "end": 11, "text": "Hello 🎉"}]},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    detail = client.get(f"/api/scripts/{script['id']}", headers=headers).json()
+    assert detail["content"] == "🎬 Scene\nHello 🎉"
+
+    split_pair = client.patch(
+        f"/api/scripts/{script['id']}/content",
+        json={"baseRevision": 1, "edits": [{"start": 1, "end": 1, "text": "x"}]},
+        headers=headers,
+    )
+    assert split_pair.status_code == 422
+
+
+def test_script_revision_history_roundtrip(client, monkeypatch):
+    import crud_ops.revisions as revisions
+
+    monkeypatch.setattr(revisions, "SNAPSHOT_INTERVAL", 3)
+    headers = {"X-User-ID": "u1"}
+    versions = ["INT. A - DAY\n\nLine one.\n"]
+    script = client.post("/api/scripts", json={"title": "History", "content": versions[0]}, headers=headers).json()
+    for i in range(1, 7):
+        versions.append(versions[-1] + f"Line {i + 1}.\n")
+        client.put(f"/api/scripts/{script['id']}", json={"content": versions[-1]}, headers=headers)
+
+    listed = client.get(f"/api/scripts/{script['id']}/revisions", headers=headers).json()
+    assert [r["revision"] for r in listed] == [6, 5, 4, 3, 2, 1, 0]
+    kinds = {r["revision"]: r["kind"] for r in listed}
+    assert kinds[0] == "snapshot" and kinds[3] == "snapshot" and kinds[6] == "snapshot"
+    assert kinds[1] == "delta" and kinds[5] == "delta"
+
+    for rev, expected in enumerate(versions):
+        res = client.get(f"/api/scripts/{script['id']}/revisions/{rev}", headers=headers)
+        assert res.status_code == 200
+        assert res.json()["content"] == expected
+
+    diff = client.get(
+        f"/api/scripts/{script['id']}/revisions/diff",
+        params={"fromRevision": 1, "toRevision": 2},
+        headers=headers,
+    ).json()
+    assert "+Line 3.\n" in diff["diff"]
+
+    assert client.get(f"/api/scripts/{script['id']}/revisions/99", headers=headers).status_code == 404
+    assert client.get(f"/api/scripts/{script['id']}/revisions", headers={"X-User-ID": "u2"}).status_code == 404
+
+
+def test_script_revision_recorded_for_patch_and_removed_on_delete(client, db_session):
+    import models
+
+    headers = {"X-User-ID": "u1"}
+    script = client.post("/api/scripts", json={"title": "History", "content": "abc\n"}, headers=headers).json()
+    client.patch(
+        f"/api/scripts/{script['id']}/content",
+        json={"baseRevision": 0, "edits": [{"start": 3, "end": 3, "text": "def"}]},
+        headers=headers,
+    )
+    assert client.get(f"/api/scripts/{script['id']}/revisions/1", headers=headers).json()["content"] == "abcdef\n"
+
+    client.delete(f"/api/scripts/{script['id']}", headers=headers)
+    remaining = db_session.query(models.ScriptRevision).filter(models.ScriptRevision.scriptId == script["id"]).count()
+    assert remaining == 0
+
+
+def test_script_sync_returns_changes_and_tombstones(client, monkeypatch):
+    import crud_ops.sync as sync
+
+    monkeypatch.setattr(sync, "SYNC_OVERLAP_MS", 0)
+    headers = {"X-User-ID": "u1"}
+    keep = client.post("/api/scripts", json={"title": "Keep"}, headers=headers).json()
+    gone = client.post("/api/scripts", json={"title": "Gone"}, headers=headers).json()
+
+    first = client.get("/api/scripts/sync", headers=headers).json()
+    assert first["full"] is True
+    assert {s["id"] for s in first["upserts"]} == {keep["id"], gone["id"]}
+
+    cursor = first["cursor"] + 1
+    clock = {"now": cursor + 10}
+    monkeypatch.setattr(sync.time, "time", lambda: clock["now"] / 1000)
+    import crud_ops.scripts_command as scripts_command
+    monkeypatch.setattr(scripts_command.time, "time", lambda: clock["now"] / 1000)
+    import models
+    monkeypatch.setattr(models.time, "time", lambda: clock["now"] / 1000)
+
+    client.put(f"/api/scripts/{keep['id']}", json={"title": "Kept"}, headers=headers)
+    client.delete(f"/api/scripts/{gone['id']}", headers=headers)
+
+    delta = client.get("/api/scripts/sync", params={"since": cursor}, headers=headers).json()
+    assert delta["full"] is False
+    assert [s["id"] for s in delta["upserts"]] == [keep["id"]]
+    assert delta["upserts"][0]["title"] == "Kept"
+    assert delta["deletes"] == [gone["id"]]
+
+    clock["now"] += 10
+    quiet = client.get("/api/scripts/sync", params={"since": delta["cursor"] + 1}, headers=headers).json()
+    assert quiet["upserts"] == [] and quiet["deletes"] == []
+
+
+def test_script_sync_sees_theme_and_organization_unlinks(client, db_session):
+    import crud_ops as crud
+    import models
+
+    headers = {"X-User-ID": "u1"}
+    script = client.post("/api/scripts", json={"title": "Linked"}, headers=headers).json()
+    db_session.add(models.MarkerTheme(id="theme-1", ownerId="u1", name="T"))
+    db_session.add(models.Organization(id="org-1", name="Org", ownerId="u1"))
+    db_session.query(models.Script).filter(models.Script.id == script["id"]).update(
+        {models.Script.markerThemeId: "theme-1", models.Script.organizationId: "org-1", models.Script.changedAt: 1}
+    )
+    db_session.commit()
+
+    crud.delete_theme(db_session, "theme-1", "u1")
+    row = db_session.get(models.Script, script["id"])
+    db_session.refresh(row)
+    assert row.markerThemeId is None and row.changedAt > 1
+
+    row.changedAt = 1
+    db_session.commit()
+    crud.delete_organization(db_session, "org-1", "u1")
+    db_session.refresh(row)
+    assert row.organizationId is None and row.changedAt > 1
+
+
+def test_script_sync_sees_deleted_tags(client, db_session):
+    import models
+    import time as _time
+
+    headers = {"X-User-ID": "u1"}
+    tagged = client.post("/api/scripts", json={"title": "Tagged"}, headers=headers).json()
+    plain = client.post("/api/scripts", json={"title": "Plain"}, headers=headers).json()
+    tag = client.post("/api/tags", json={"name": "Drama", "color": "#f00"}, headers=headers).json()
+    client.post(f"/api/scripts/{tagged['id']}/tags", json={"tagId": tag["id"]}, headers=headers)
+    db_session.query(models.Script).filter(models.Script.ownerId == "u1").update({models.Script.changedAt: 1})
+    db_session.commit()
+
+    recent = int(_time.time() * 1000) - 1000
+    assert client.delete(f"/api/tags/{tag['id']}", headers=headers).status_code == 200
+    delta = client.get("/api/scripts/sync", params={"since": recent}, headers=headers).json()
+    changed = [s["id"] for s in delta["upserts"]]
+    assert tagged["id"] in changed and plain["id"] not in changed
+
+
+def test_script_sync_reports_transferred_scripts_as_deleted(client, db_session):
+    import crud_ops as crud
+    import models
+    import time as _time
+
+    headers = {"X-User-ID": "u1"}
+    db_session.add(models.User(id="u2"))
+    db_session.commit()
+    script = client.post("/api/scripts", json={"title": "Gift"}, headers=headers).json()
+    assert crud.transfer_script_ownership(db_session, script["id"], "u2", "u1") is True
+
+    stale = client.get("/api/scripts/sync", params={"since": 1}, headers=headers).json()
+    assert stale["full"] is True  # cursor older than the tombstone horizon forces a full resync
+    assert stale["upserts"] == []
+
+    recent = int(_time.time() * 1000) - 1000
+    delta = client.get("/api/scripts/sync", params={"since": recent}, headers=headers).json()
+    assert script["id"] in delta["deletes"]
+    receiver = client.get("/api/scripts/sync", params={"since": recent}, headers={"X-User-ID": "u2"}).json()
+    assert script["id"] in [s["id"] for s in receiver["upserts"]]
+
+
+def test_script_like_toggle_keeps_counter_and_reports_liked_status(client, db_session):
+    import models
+
+    owner = {"X-User-ID": "u_likes"}
+    first = client.post("/api/scripts", json={"title": "A"}, headers=owner).json()["id"]
+    second = client.post("/api/scripts", json={"title": "B"}, headers=owner).json()["id"]
+
+    fan = {"X-User-ID": "fan"}
+    assert client.post(f"/api/scripts/{first}/like", headers=fan).json()["liked"] is True
+    assert client.post(f"/api/scripts/{first}/like", headers={"X-User-ID": "fan2"}).json()["liked"] is True
+    assert client.post(f"/api/scripts/{first}/like", headers=fan).json()["liked"] is False
+    assert client.post(f"/api/scripts/{first}/like", headers=fan).json()["liked"] is True
+    assert client.post("/api/scripts/missing/like", headers=fan).status_code == 404
+
+    db_session.expire_all()
+    likes = db_session.query(models.Script.likes).filter(models.Script.id == first).scalar()
+    assert likes == db_session.query(models.ScriptLike).filter(models.ScriptLike.scriptId == first).count() == 2
+
+    res = client.get("/api/scripts/liked-status", params={"ids": f"{first},{second},missing"}, headers=fan)
+    assert res.status_code == 200
+    assert res.json()["liked"] == {first: True, second: False, "missing": False}
+
+    too_many = ",".join(f"s{i}" for i in range(201))
+    assert client.get("/api/scripts/liked-status", params={"ids": too_many}, headers=fan).status_code == 400
+
+
+def test_script_update_retries_revision_claim_after_concurrent_write(db_session):
+    import crud_ops as crud
+    import models
+    import schemas
+
+    script = crud.create_script(db_session, schemas.ScriptCreate(title="Race", content="a\n"), "u1")
+    # Another writer commits revision 1 behind this session's cached row.
+    db_session.query(models.Script).filter(models.Script.id == script.id).update(
+        {models.Script.revision: 1, models.Script.content: "a\nb\n"}, synchronize_session=False
+    )
+    db_session.add(crud.build_snapshot_revision(script.id, 1, "a\nb\n"))
+    db_session.commit()
+
+    updated = crud.update_script(db_session, script.id, schemas.ScriptUpdate(content="a\nb\nc\n"), "u1")
+    assert updated.revision == 2
+    assert crud.get_script_revision(db_session, script.id, 2, "u1")["content"] == "a\nb\nc\n"
+
+
+def test_script_revision_history_is_pruned(client, monkeypatch):
+    import crud_ops.revisions as revisions
+
+    monkeypatch.setattr(revisions, "SNAPSHOT_INTERVAL", 3)
+    monkeypatch.setattr(revisions, "REVISION_RETENTION", 4)
+    headers = {"X-User-ID": "u1"}
+    content = "INT. A - DAY\n"
+    script = client.post("/api/scripts", json={"title": "Pruned", "content": content}, headers=headers).json()
+    for i in range(1, 10):
+        content += f"Line {i}.\n"
+        client.put(f"/api/scripts/{script['id']}", json={"content": content}, headers=headers)
+
+    listed = client.get(f"/api/scripts/{script['id']}/revisions", headers=headers).json()
+    # Snapshot at 9 cuts at the newest snapshot <= 6, keeping 6..9.
+    assert [r["revision"] for r in listed] == [9, 8, 7, 6]
+    assert listed[-1]["kind"] == "snapshot"
+    res = client.get(f"/api/scripts/{script['id']}/revisions/7", headers=headers)
+    assert res.status_code == 200 and res.json()["content"].endswith("Line 7.\n")
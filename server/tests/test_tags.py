@@ -70,3 +70,45 @@ def test_attach_tag_failure_returns_500(client, monkeypatch):
     monkeypatch.setattr(tags_router.crud, "add_tag_to_script", lambda *args, **kwargs: False)
     res = client.post(f"/api/scripts/{sid}/tags", json={"tagId": tid}, headers=headers)
     assert res.status_code == 500
+
+
+def test_bulk_tagging_maintains_usage_counts(client):
+    headers = {"X-User-ID": "u-bulk-tags"}
+    sids = [client.post("/api/scripts", json={"title": f"S{i}"}, headers=headers).json()["id"] for i in range(3)]
+    drama = client.post("/api/tags", json={"name": "Drama", "color": "red"}, headers=headers).json()["id"]
+    comedy = client.post("/api/tags", json={"name": "Comedy", "color": "blue"}, headers=headers).json()["id"]
+
+    def usage():
+        return {t["id"]: t["usageCount"] for t in client.get("/api/tags", headers=headers).json()}
+
+    client.post(f"/api/scripts/{sids[0]}/tags", json={"tagId": comedy}, headers=headers)
+    res = client.post(
+        "/api/scripts/tags/bulk",
+        json={"scriptIds": sids, "addTagIds": [drama, comedy]},
+        headers=headers,
+    )
+    assert res.status_code == 200
+    assert res.json() == {"added": 5, "removed": 0, "scripts": 3}
+    assert usage() == {drama: 3, comedy: 3}
+
+    res = client.post(
+        "/api/scripts/tags/bulk",
+        json={"scriptIds": sids[:2], "removeTagIds": [comedy]},
+        headers=headers,
+    )
+    assert res.json() == {"added": 0, "removed": 2, "scripts": 2}
+    assert usage() == {drama: 3, comedy: 1}
+
+    client.delete(f"/api/scripts/{sids[2]}/tags/{drama}", headers=headers)
+    client.delete(f"/api/scripts/{sids[2]}", headers=headers)
+    assert usage() == {drama: 2, comedy: 0}
+
+    # Any foreign script or tag rejects the whole batch.
+    other = client.post("/api/scripts", json={"title": "Other"}, headers={"X-User-ID": "u-other"}).json()["id"]
+    res = client.post(
+        "/api/scripts/tags/bulk",
+        json={"scriptIds": [sids[0], other], "addTagIds": [comedy]},
+        headers=headers,
+    )
+    assert res.status_code == 404
+    assert usage() == {drama: 2, comedy: 0}
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from services import seo, tracing
+
+
+@pytest.fixture
+def trace_file(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "TRACE_EXPORT_PATH", str(path))
+    monkeypatch.setattr(tracing, "TRACE_OTLP_ENDPOINT", "")
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 1.0)
+    monkeypatch.setattr(tracing, "TRACE_SLOW_MS", 0.0)
+
+    def read():
+        tracing.exporter.flush()
+        if not path.exists():
+            return {}
+        traces = {}
+        for line in path.read_text(encoding="utf-8").splitlines():
+            spans = json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+            traces[spans[0]["traceId"]] = spans
+        return traces
+
+    return read
+
+
+def test_request_spans_are_exported_as_otlp(client, trace_file):
+    headers = {"X-User-ID": "trace-user"}
+    script_id = client.post("/api/scripts", json={"title": "T", "content": "INT. ROOM - DAY\n\nBOB\nHi."}, headers=headers).json()["id"]
+
+    res = client.get(f"/api/analysis/script/{script_id}", headers=headers)
+    assert res.status_code == 200
+    spans = trace_file()[res.headers["X-Trace-Id"]]
+
+    root = spans[0]
+    assert root["name"] == "GET /api/analysis/script/{script_id}"
+    assert root["kind"] == tracing.SPAN_KIND_SERVER
+    attributes = {a["key"]: a["value"] for a in root["attributes"]}
+    assert attributes["http.response.status_code"] == {"intValue": "200"}
+
+    by_name = {}
+    for span in spans[1:]:
+        by_name.setdefault(span["name"], []).append(span)
+        assert span["traceId"] == root["traceId"]
+        assert int(span["endTimeUnixNano"]) >= int(span["startTimeUnixNano"])
+    assert {"auth.get_current_user_id", "db.query", "analysis.ScriptAnalyzer.analyze", "fastapi.serialize_response"} <= set(by_name)
+    assert by_name["analysis.ScriptAnalyzer.analyze"][0]["parentSpanId"] == root["spanId"]
+    statement = {a["key"]: a["value"] for a in by_name["db.query"][0]["attributes"]}["db.statement"]["stringValue"]
+    assert statement.startswith("SELECT")
+
+
+def test_latency_threshold_sampling(client, trace_file, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(tracing, "TRACE_SLOW_MS", 60_000.0)
+    assert "X-Trace-Id" not in client.get("/api/public-scripts").headers
+
+    monkeypatch.setattr(tracing, "TRACE_SLOW_MS", 0.001)
+    res = client.get("/api/public-scripts")
+    assert res.headers["X-Trace-Id"] in trace_file()
+
+
+def test_incoming_traceparent_is_continued(client, trace_file, monkeypatch):
+    monkeypatch.setattr(tracing, "TRACE_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(tracing, "TRACE_SLOW_MS", 60_000.0)
+    trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+    headers = {"traceparent": f"00-{trace_id}-{parent_id}-01"}
+    # Untrusted by default: a client cannot force its requests to be exported.
+    assert "X-Trace-Id" not in client.get("/api/public-scripts", headers=headers).headers
+
+    monkeypatch.setattr(tracing, "TRACE_TRUST_PARENT_SAMPLED", True)
+    res = client.get("/api/public-scripts", headers=headers)
+    assert res.headers["X-Trace-Id"] == trace_id
+    assert trace_file()[trace_id][0]["parentSpanId"] == parent_id
+
+    assert tracing.parse_traceparent("garbage") is None
+
+
+def test_export_file_is_rotated_at_the_size_cap(tmp_path, monkeypatch):
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setattr(tracing, "TRACE_EXPORT_PATH", str(path))
+    monkeypatch.setattr(tracing, "TRACE_OTLP_ENDPOINT", "")
+    monkeypatch.setattr(tracing, "TRACE_EXPORT_MAX_BYTES", 100)
+    exporter = tracing.Exporter()
+    for i in range(3):
+        exporter.export({"n": i, "pad": "x" * 40})
+
+    assert [json.loads(line)["n"] for line in path.read_text().splitlines()] == [2]
+    assert [json.loads(line)["n"] for line in (tmp_path / "traces.jsonl.1").read_text().splitlines()] == [1]
+
+
+def test_spans_are_noops_outside_a_trace(trace_file):
+    with tracing.span("unused") as span:
+        assert span is None
+
+    trace, *tokens = tracing.begin_trace()
+    seo.inject_seo_html("<html><head></head></html>", title="t", description="d", canonical_url="https://x")
+    assert tracing.end_trace(trace, tokens)
+    assert [s["name"] for s in trace_file()[trace.trace_id][1:]] == ["seo.inject_seo_html"]
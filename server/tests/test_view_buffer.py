@@ -0,0 +1,109 @@
+import pytest
+
+import models
+from crud_ops import engagement
+
+
+@pytest.fixture
+def buffered(monkeypatch):
+    buffer = engagement.ViewBuffer(dedup_window_seconds=60)
+    monkeypatch.setattr(engagement, "view_buffer", buffer)
+    monkeypatch.setattr(engagement, "VIEW_FLUSH_INTERVAL_SECONDS", 60)
+    monkeypatch.setattr(engagement, "_ensure_flusher", lambda: None)
+    return buffer
+
+
+def _views(db_session, script_id):
+    db_session.expire_all()
+    return db_session.query(models.Script.views).filter(models.Script.id == script_id).scalar()
+
+
+def test_view_buffer_dedupes_per_visitor_within_window():
+    buffer = engagement.ViewBuffer(dedup_window_seconds=10)
+    assert buffer.record("s1", "v1", now=100) is True
+    assert buffer.record("s1", "v1", now=105) is False
+    assert buffer.record("s2", "v1", now=105) is True
+    assert buffer.record("s1", "v1", now=111) is True
+    assert buffer.record("s1", None, now=111) is True
+
+    stats = buffer.stats(now=102)
+    assert stats["pendingViews"] == 4
+    assert stats["deduplicated"] == 1
+    assert stats["flushLagMs"] == 2000
+    assert buffer.take()[0] == {"s1": 3, "s2": 1}
+
+
+def test_views_are_buffered_and_flushed_in_one_batch(client, db_session, buffered):
+    headers = {"X-User-ID": "u_views"}
+    a = client.post("/api/scripts", json={"title": "A"}, headers=headers).json()["id"]
+    b = client.post("/api/scripts", json={"title": "B"}, headers=headers).json()["id"]
+
+    for visitor in ("v1", "v2", "v3"):
+        client.post(f"/api/scripts/{a}/view", json={"visitorId": visitor})
+    repeat = client.post(f"/api/scripts/{a}/view", json={"visitorId": "v1"}).json()
+    assert repeat["counted"] is False
+    client.post(f"/api/scripts/{b}/view")
+    client.post(f"/api/scripts/{b}/view")  # same anonymous client
+
+    assert _views(db_session, a) == 0
+    assert buffered.stats()["pendingViews"] == 4
+
+    assert engagement.flush_view_counts(db_session) == 4
+    assert _views(db_session, a) == 3
+    assert _views(db_session, b) == 1
+    stats = buffered.stats()
+    assert stats["pendingViews"] == 0 and stats["flushes"] == 1 and stats["flushLagMs"] == 0
+
+
+def test_failed_flush_keeps_counts(db_session, buffered, monkeypatch):
+    buffered.record("s1", "v1")
+
+    def boom(*args):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(engagement, "_write_view_counts", boom)
+    assert engagement.flush_view_counts(db_session) == 0
+    stats = buffered.stats()
+    assert stats["pendingViews"] == 1
+    assert stats["flushFailures"] == 1
+
+
+def test_view_buffer_stats_admin_only(client):
+    assert client.get("/api/admin/view-buffer-stats", headers={"X-User-ID": "someone"}).status_code == 403
+    res = client.get("/api/admin/view-buffer-stats", headers={"X-User-ID": "admin-owner"})
+    assert res.status_code == 200
+    assert "flushLagMs" in res.json()
+
+
+def test_views_and_likes_roll_up_per_day(client, db_session, buffered):
+    headers = {"X-User-ID": "u_stats"}
+    script_id = client.post("/api/scripts", json={"title": "Stats"}, headers=headers).json()["id"]
+    other_id = client.post("/api/scripts", json={"title": "Other"}, headers=headers).json()["id"]
+
+    for visitor in ("a", "b"):
+        client.post(f"/api/scripts/{script_id}/view", json={"visitorId": visitor})
+    client.post(f"/api/scripts/{other_id}/view", json={"visitorId": "a"})
+    buffered.record("missing-script", "a")
+    engagement.flush_view_counts(db_session)
+    client.post(f"/api/scripts/{script_id}/view", json={"visitorId": "c"})
+    engagement.flush_view_counts(db_session)
+
+    client.post(f"/api/scripts/{script_id}/like", headers={"X-User-ID": "fan1"})
+    client.post(f"/api/scripts/{script_id}/like", headers={"X-User-ID": "fan2"})
+    client.post(f"/api/scripts/{script_id}/like", headers={"X-User-ID": "fan2"})
+
+    rows = db_session.query(models.ScriptDailyStat).all()
+    assert {r.scriptId for r in rows} == {script_id, other_id}
+
+    res = client.get(f"/api/scripts/{script_id}/engagement", params={"days": 7}, headers=headers)
+    assert res.status_code == 200
+    body = res.json()
+    assert len(body["days"]) == 7
+    assert body["days"][-1] == {"day": engagement.utc_day(), "views": 3, "likes": 2, "unlikes": 1}
+    assert body["totals"] == {"views": 3, "likes": 2, "unlikes": 1}
+
+    owner = client.get("/api/scripts/engagement", headers=headers).json()
+    assert owner["totals"]["views"] == 4
+    assert [s["id"] for s in owner["topScripts"]] == [script_id, other_id]
+
+    assert client.get(f"/api/scripts/{script_id}/engagement", headers={"X-User-ID": "fan1"}).status_code == 404
@@ -7,6 +7,9 @@ export const getOrganizations = async (ownerId) => {
 
 export const getOrganization = async (orgId) => fetchApi(`/organizations/${orgId}`);
 
+export const getOrganizationReaders = async (orgId, days = 30) =>
+  fetchApi(`/organizations/${orgId}/readers?days=${days}`);
+
 export const createOrganization = async (data) => {
   return fetchApi(`/organizations`, {
     method: "POST",
@@ -29,3 +29,6 @@ export const transferPersonaOwnership = async (personaId, targetUserId) => {
     body: JSON.stringify({ newOwnerId: targetUserId }),
   });
 };
+
+export const getPersonaReaders = async (personaId, days = 30) =>
+  fetchApi(`/personas/${personaId}/readers?days=${days}`);
@@ -1,4 +1,4 @@
-import { fetchApi } from "./client";
+import { API_BASE_URL, fetchApi, getAuthHeaders } from "./client";
 
 export const createScript = async (title, type = "script", folder = "/") => {
   const res = await fetchApi("/scripts", {
@@ -22,6 +22,24 @@ export const updateScript = async (scriptId, updates) => {
   });
 };
 
+export const patchScriptContent = async (scriptId, baseRevision, edits) => {
+  return fetchApi(`/scripts/${scriptId}/content`, {
+    method: "PATCH",
+    body: JSON.stringify({ baseRevision, edits }),
+  });
+};
+
+export const syncScripts = async (since) =>
+  fetchApi(since ? `/scripts/sync?since=${encodeURIComponent(since)}` : "/scripts/sync");
+
+export const getScriptRevisions = async (scriptId) => fetchApi(`/scripts/${scriptId}/revisions`);
+
+export const getScriptRevision = async (scriptId, revision) =>
+  fetchApi(`/scripts/${scriptId}/revisions/${revision}`);
+
+export const diffScriptRevisions = async (scriptId, fromRevision, toRevision) =>
+  fetchApi(`/scripts/${scriptId}/revisions/diff?fromRevision=${fromRevision}&toRevision=${toRevision}`);
+
 export const deleteScript = async (scriptId) => {
   return fetchApi(`/scripts/${scriptId}`, {
     method: "DELETE",
@@ -35,6 +53,13 @@ export const reorderScripts = async (updates) => {
   });
 };
 
+export const moveScript = async (scriptId, { beforeId = null, afterId = null } = {}) => {
+  return fetchApi(`/scripts/${scriptId}/move`, {
+    method: "PUT",
+    body: JSON.stringify({ beforeId, afterId }),
+  });
+};
+
 export const searchScripts = async (query) => fetchApi(`/search?q=${encodeURIComponent(query)}`);
 
 export const addTagToScript = async (scriptId, tagId) => {
@@ -54,13 +79,61 @@ export const toggleScriptLike = async (scriptId) => {
   return fetchApi(`/scripts/${scriptId}/like`, { method: "POST" });
 };
 
-export const incrementScriptView = async (scriptId) => {
-  return fetchApi(`/scripts/${scriptId}/view`, { method: "POST" });
+export const getLikedStatus = async (scriptIds = []) => {
+  if (!scriptIds.length) return { liked: {} };
+  return fetchApi(`/scripts/liked-status?ids=${scriptIds.map(encodeURIComponent).join(",")}`);
 };
 
+const readVisitorId = () => {
+  try {
+    return localStorage.getItem("public_terms_visitor_id") || undefined;
+  } catch {
+    return undefined;
+  }
+};
+
+export const incrementScriptView = async (scriptId, visitorId = readVisitorId()) => {
+  return fetchApi(`/scripts/${scriptId}/view`, {
+    method: "POST",
+    body: JSON.stringify({ visitorId }),
+  });
+};
+
+export const getScriptEngagement = async (scriptId, days = 30) =>
+  fetchApi(`/scripts/${scriptId}/engagement?days=${days}`);
+
+export const getOwnerEngagement = async (days = 30) => fetchApi(`/scripts/engagement?days=${days}`);
+
+export const getScriptReaders = async (scriptId, days = 30) =>
+  fetchApi(`/scripts/${scriptId}/readers?days=${days}`);
+
 export const transferScriptOwnership = async (scriptId, targetUserId) => {
   return fetchApi(`/scripts/${scriptId}/transfer`, {
     method: "POST",
     body: JSON.stringify({ newOwnerId: targetUserId }),
   });
 };
+
+export const importScripts = async (file, folder = "/") => {
+  const authHeaders = await getAuthHeaders();
+  const formData = new FormData();
+  formData.append("file", file);
+  formData.append("folder", folder);
+
+  const response = await fetch(`${API_BASE_URL}/scripts/import`, {
+    method: "POST",
+    headers: authHeaders,
+    body: formData,
+  });
+
+  if (!response.ok) {
+    const detail = await response.text().catch(() => "");
+    throw new Error(
+      detail?.trim()
+        ? `API Error ${response.status}: ${detail.trim()}`
+        : `API Error ${response.status}: ${response.statusText || "Import failed"}`
+    );
+  }
+
+  return response.json();
+};
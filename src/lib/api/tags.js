@@ -22,3 +22,13 @@ export const deleteTag = async (tagId) => {
     method: "DELETE",
   });
 };
+
+export const bulkUpdateScriptTags = async (scriptIds, { addTagIds = [], removeTagIds = [] } = {}, ownerIdQuery = "") => {
+  const params = new URLSearchParams();
+  if (ownerIdQuery) params.set("ownerIdQuery", ownerIdQuery);
+  const suffix = params.toString();
+  return fetchApi(`/scripts/tags/bulk${suffix ? `?${suffix}` : ""}`, {
+    method: "POST",
+    body: JSON.stringify({ scriptIds, addTagIds, removeTagIds }),
+  });
+};
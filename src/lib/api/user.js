@@ -16,3 +16,24 @@ export const exportScripts = async () => {
   if (!res.ok) throw new Error("Export failed");
   return res.blob();
 };
+
+export const createExportJob = async ({ scope = "account", folder, seriesId } = {}) => {
+  return fetchApi("/export/jobs", {
+    method: "POST",
+    body: JSON.stringify({ scope, folder, seriesId }),
+  });
+};
+
+export const getExportJob = async (jobId) => fetchApi(`/export/jobs/${jobId}`);
+
+export const downloadExportJob = async (jobId, { offset = 0, etag } = {}) => {
+  const url = `${API_BASE_URL}/export/jobs/${jobId}/download`;
+  const headers = { ...(await getAuthHeaders()) };
+  if (offset > 0) {
+    headers.Range = `bytes=${offset}-`;
+    if (etag) headers["If-Range"] = etag;
+  }
+  const res = await fetch(url, { headers });
+  if (!res.ok) throw new Error("Export download failed");
+  return res;
+};